@@ -1,53 +1,67 @@
+"""
+Application factory: create_app(config) builds a configured app.
+
+Importing the package only defines the extensions; the views, models and
+their session hooks are imported by create_app(), and heavy libraries (PDF
+rendering) on first use. The schema and default users are set up by the
+explicit `flask --app run init` command, never at import.
+"""
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
 from config import Config
 
-# Create Flask app, specifying the template folder in the project root
-app = Flask(__name__, template_folder='../templates')
-app.config.from_object(Config)
+from app import db_routing
 
-# Initialize extensions
-db = SQLAlchemy(app)
+# Extensions, bound to an app by create_app()
+db = SQLAlchemy(session_options={'class_': db_routing.RoutingSession})
 login_manager = LoginManager()
-login_manager.init_app(app)
 login_manager.login_view = 'login'  # Redirect unauthenticated users to login
 login_manager.login_message = 'Please log in to access this page.'
 
-# User loader for Flask-Login (required to load user from session)
+
+# User loader for Flask-Login (required to load user from session); served
+# from a per-worker principal cache (see AUTH_CACHE_* in config)
 @login_manager.user_loader
 def load_user(user_id):
-    from app.models import User
-    return User.query.get(int(user_id))
+    from app import auth_cache
+    return auth_cache.load_principal(int(user_id))
 
-# Import routes after initialization to avoid circular imports
-# Register HRM blueprint if present
-try:
-    from app.hrm import bp as hrm_bp
-    app.register_blueprint(hrm_bp, url_prefix='/hrm')
-except Exception:
-    # If the hrm package isn't available yet, skip registration.
-    # This keeps the app import-safe during incremental development.
-    pass
 
-# Register Finance blueprint if present
-try:
-    from app.finance import bp as finance_bp
-    app.register_blueprint(finance_bp, url_prefix='/finance')
-except Exception:
-    # Keep import-safe during incremental development
-    pass
+def create_app(config=None):
+    """Build the app from Config, overridden by the attributes of `config` (object or class)"""
+    # Templates and static files live in the project root
+    app = Flask(__name__, template_folder='../templates', static_folder='../static')
+    app.config.from_object(Config)
+    if config is not None:
+        app.config.from_object(config)
+
+    # WAL, pragmas, pooling and write-lock handling for SQLite (see SQLITE_* in config)
+    from app import db_profile
+    db_profile.init_engine_options(app)
+    # Read-only engine for heavy read views (see READ_* in config)
+    db_routing.init_app(app)
+    db.init_app(app)
+    db_profile.init_app(app)
 
-# Register CRM blueprint if present
-try:
+    # Per-request SQL timing, slow-query log and N+1 detection (see QUERY_* in config)
+    from app import query_stats
+    query_stats.init_app(app)
+    login_manager.init_app(app)
+    # Registers the principal cache's invalidation hooks before any write
+    from app import auth_cache  # noqa: F401
+    # Creates the full-text search table and triggers along with the tables
+    from app import search_utils  # noqa: F401
+
+    from app.hrm import bp as hrm_bp
+    from app.finance import bp as finance_bp
     from app.crm import bp as crm_bp
+    app.register_blueprint(hrm_bp, url_prefix='/hrm')
+    app.register_blueprint(finance_bp, url_prefix='/finance')
     app.register_blueprint(crm_bp, url_prefix='/crm')
-except Exception:
-    pass
-
-# Import other routes after initialization to avoid circular imports
-from app import routes
 
-# Optional: Debug print (remove after testing)
-print(f"Template folder set to: {app.template_folder}")
-print(f"Full template path: {app.root_path}/../templates")  # Should point to your templates
\ No newline at end of file
+    from app import routes, commands, lookup_utils
+    routes.init_app(app)
+    commands.init_app(app)
+    lookup_utils.init_app(app)
+    return app
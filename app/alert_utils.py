@@ -0,0 +1,194 @@
+"""
+Stock Alert Evaluation Engine
+Evaluates low-stock, overstock and expired-batch conditions for the whole
+catalogue (or a given set of items) with a handful of set-based statements.
+
+Alerts are keyed by (item, alert type): an open alert is kept (with a refreshed
+message) while its condition holds, a new one is opened only when none is open,
+and low/overstock/expiring-soon alerts are closed once the condition clears.
+Expired alerts record an event, so they stay open until someone resolves them.
+"""
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import and_, cast, exists, false, func, insert, literal, select, true, update, String
+
+from app import db
+from app.balance_utils import refresh_warehouse_stock
+from app.models import Item, InventoryBatch, StockAlert
+
+
+def _text(column):
+    return cast(column, String)
+
+
+def _level_conditions():
+    """alert type -> (condition on Item, message expression)"""
+    return {
+        'low_stock': (
+            Item.reorder_gap < 0,
+            literal("Item '") + Item.name + literal("' is below reorder point (")
+            + _text(Item.quantity) + literal('/') + _text(Item.reorder_point) + literal(')'),
+        ),
+        'overstock': (
+            Item.overstock_gap > 0,
+            literal("Item '") + Item.name + literal("' has exceeded maximum stock (")
+            + _text(Item.quantity) + literal('/') + _text(Item.max_stock) + literal(')'),
+        ),
+    }
+
+
+def _open_alert(alert_type, item_id_column):
+    return and_(
+        StockAlert.item_id == item_id_column,
+        StockAlert.alert_type == alert_type,
+        StockAlert.is_resolved == false(),
+    )
+
+
+def _upsert_alerts(alert_type, source, now):
+    """
+    Refresh the message of open alerts and open alerts for the rest.
+    `source` selects (item_id, message) rows for which the condition holds.
+    Returns the number of alerts opened.
+    """
+    source = source.subquery()
+
+    db.session.execute(
+        update(StockAlert)
+        .where(StockAlert.alert_type == alert_type, StockAlert.is_resolved == false(),
+               StockAlert.item_id.in_(select(source.c.item_id)))
+        .values(message=select(source.c.message).where(source.c.item_id == StockAlert.item_id)
+                .scalar_subquery())
+        .execution_options(synchronize_session=False)
+    )
+
+    new_alerts = select(
+        source.c.item_id, literal(alert_type), source.c.message, literal(now), literal(False)
+    ).where(~exists().where(_open_alert(alert_type, source.c.item_id)))
+    result = db.session.execute(
+        insert(StockAlert).from_select(
+            ['item_id', 'alert_type', 'message', 'created_at', 'is_resolved'], new_alerts
+        )
+    )
+    return result.rowcount
+
+
+def _close_alerts(alert_type, in_scope, matching_item_ids, now):
+    """Resolve open alerts of a type whose item is no longer in matching_item_ids"""
+    result = db.session.execute(
+        update(StockAlert)
+        .where(StockAlert.alert_type == alert_type, StockAlert.is_resolved == false(),
+               in_scope(StockAlert.item_id), StockAlert.item_id.not_in(matching_item_ids))
+        .values(is_resolved=True, resolved_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+
+def _batch_summary(where, label):
+    """(item_id, message) per item for the active batches matching `where`"""
+    message = (
+        _text(func.count(InventoryBatch.id)) + literal(f' batch(es) {label}, earliest ')
+        + func.date(func.min(InventoryBatch.expiry_date))
+        + literal(' (') + func.group_concat(InventoryBatch.batch_number) + literal(')')
+    )
+    return (
+        select(InventoryBatch.item_id.label('item_id'), func.substr(message, 1, 250).label('message'))
+        .where(where)
+        .group_by(InventoryBatch.item_id)
+    )
+
+
+def _expire_batches(in_scope, now, result):
+    """Alert on and deactivate active batches past their expiry date"""
+    expired = and_(
+        InventoryBatch.is_active == true(),
+        InventoryBatch.expiry_date < now,
+        in_scope(InventoryBatch.item_id),
+    )
+    result['opened'] += _upsert_alerts('expired', _batch_summary(expired, 'expired'), now)
+
+    keys = db.session.execute(
+        select(InventoryBatch.warehouse_id, InventoryBatch.item_id).where(expired).distinct()
+    ).all()
+    deactivated = db.session.execute(
+        update(InventoryBatch).where(expired).values(is_active=False)
+        .execution_options(synchronize_session=False)
+    )
+    result['expired_batches'] += deactivated.rowcount
+    refresh_warehouse_stock(keys, now=now)
+
+
+def _flag_expiring_batches(in_scope, now, days, result):
+    """Keep one 'expiring_soon' alert per item with active batches expiring within `days`"""
+    expiring = and_(
+        InventoryBatch.is_active == true(),
+        InventoryBatch.expiry_date >= now,
+        InventoryBatch.expiry_date < now + timedelta(days=days),
+        in_scope(InventoryBatch.item_id),
+    )
+    matching = select(InventoryBatch.item_id).where(expiring)
+    result['closed'] += _close_alerts('expiring_soon', in_scope, matching, now)
+    result['opened'] += _upsert_alerts('expiring_soon', _batch_summary(expiring, f'expiring within {days} days'), now)
+
+
+def _scope(item_ids):
+    def in_scope(column):
+        return column.in_(item_ids) if item_ids is not None else true()
+    return in_scope
+
+
+def _expiry_window(days):
+    return current_app.config.get('EXPIRY_WARNING_DAYS', 7) if days is None else days
+
+
+def evaluate_stock_alerts(item_ids=None, now=None, expiry_days=None, commit=True):
+    """
+    Re-evaluate stock alerts for item_ids (all items when None).
+
+    Active batches past their expiry date are deactivated, as the per-item
+    check always did, and items with batches expiring within expiry_days
+    (EXPIRY_WARNING_DAYS by default) get an 'expiring_soon' alert. Returns
+    counts of alerts opened and closed and of batches expired.
+    """
+    now = now or datetime.utcnow()
+    item_ids = list(item_ids) if item_ids is not None else None
+    result = {'opened': 0, 'closed': 0, 'expired_batches': 0}
+    if item_ids == []:
+        return result
+    in_scope = _scope(item_ids)
+
+    for alert_type, (condition, message) in _level_conditions().items():
+        matching = select(Item.id).where(in_scope(Item.id), condition)
+        result['closed'] += _close_alerts(alert_type, in_scope, matching, now)
+
+        source = select(Item.id.label('item_id'), message.label('message')).where(in_scope(Item.id), condition)
+        result['opened'] += _upsert_alerts(alert_type, source, now)
+
+    _expire_batches(in_scope, now, result)
+    _flag_expiring_batches(in_scope, now, _expiry_window(expiry_days), result)
+
+    if commit:
+        db.session.commit()
+    return result
+
+
+def sweep_expiry(now=None, expiry_days=None, commit=True):
+    """
+    Catalogue-wide expiry pass, meant to run on a schedule (flask sweep-expiry).
+
+    Deactivates and alerts on every expired batch and refreshes the
+    'expiring_soon' alerts, using the (is_active, expiry_date) index rather
+    than visiting items one by one.
+    """
+    now = now or datetime.utcnow()
+    result = {'opened': 0, 'closed': 0, 'expired_batches': 0}
+    in_scope = _scope(None)
+
+    _expire_batches(in_scope, now, result)
+    _flag_expiring_batches(in_scope, now, _expiry_window(expiry_days), result)
+
+    if commit:
+        db.session.commit()
+    return result
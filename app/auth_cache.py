@@ -0,0 +1,159 @@
+"""
+User Principal Cache
+Flask-Login calls the user loader on every authenticated request, AJAX
+fragments included. Rather than loading the User row each time, each worker
+keeps an immutable Principal (id, username, role and department
+memberships) in a small LRU, so a warm request authenticates with a
+dictionary lookup.
+
+Entries are dropped when a user's username, role or password changes, the
+user is deleted, or their department memberships change. As with the KPI
+cache, AUTH_CACHE_TTL only bounds staleness across worker processes.
+"""
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from flask import current_app
+from flask_login import UserMixin
+from sqlalchemy import event, inspect, select
+
+from app import db
+from app.enterprise_models import Department, UserDepartment
+from app.models import User, UserRole
+
+# Changes to these User columns invalidate the cached principal
+_PRINCIPAL_ATTRS = ('username', 'role', 'password_hash')
+_AUTH_TABLES = frozenset((User.__table__, UserDepartment.__table__, Department.__table__))
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+# Bumped on every invalidation so a load that raced with it is not cached
+_generation = 0
+
+
+@dataclass(frozen=True, eq=False)
+class Principal(UserMixin):
+    """The signed-in user as views and templates see it; not bound to a session"""
+    id: int
+    username: str
+    role: str
+    departments: tuple = ()  # (department_id, company_id, membership role)
+
+    @property
+    def company_ids(self):
+        return frozenset(company_id for _, company_id, _ in self.departments)
+
+    @property
+    def company_id(self):
+        """The user's company when they belong to exactly one"""
+        ids = self.company_ids
+        return next(iter(ids)) if len(ids) == 1 else None
+
+    def is_admin(self):
+        return self.role == UserRole.ADMIN.value
+
+    def is_manager(self):
+        return self.role == UserRole.MANAGER.value
+
+
+def fetch_principal(user_id):
+    """Build the principal from the database (None for an unknown id)"""
+    user = db.session.execute(
+        select(User.id, User.username, User.role).where(User.id == user_id)
+    ).first()
+    if user is None:
+        return None
+    memberships = db.session.execute(
+        select(UserDepartment.department_id, Department.company_id, UserDepartment.role)
+        .join(Department, Department.id == UserDepartment.department_id)
+        .where(UserDepartment.user_id == user_id)
+        .order_by(UserDepartment.department_id)
+    ).all()
+    return Principal(user.id, user.username, user.role, tuple(tuple(m) for m in memberships))
+
+
+def load_principal(user_id):
+    """
+    Return the cached principal for user_id, loading it when missing or older
+    than AUTH_CACHE_TTL seconds (0 disables the cache).
+    """
+    ttl = current_app.config.get('AUTH_CACHE_TTL', 300)
+    if ttl <= 0:
+        return fetch_principal(user_id)
+    now = time.monotonic()
+
+    with _cache_lock:
+        entry = _cache.get(user_id)
+        if entry and now - entry[0] < ttl:
+            _cache.move_to_end(user_id)
+            return entry[1]
+        generation = _generation
+
+    principal = fetch_principal(user_id)
+    if principal is not None:
+        with _cache_lock:
+            if generation == _generation:
+                _cache[user_id] = (now, principal)
+                _cache.move_to_end(user_id)
+                while len(_cache) > current_app.config.get('AUTH_CACHE_SIZE', 1024):
+                    _cache.popitem(last=False)
+    return principal
+
+
+def invalidate_principals(user_ids=None):
+    """Drop cached principals for user_ids (all when None)"""
+    global _generation
+    with _cache_lock:
+        _generation += 1
+        if user_ids is None:
+            _cache.clear()
+        else:
+            for user_id in user_ids:
+                _cache.pop(user_id, None)
+
+
+# ---------------- Cache invalidation via session events ----------------
+@event.listens_for(db.session, 'after_flush')
+def _mark_principal_writes(session, flush_context):
+    dirty = session.info.setdefault('auth_dirty', set())
+    for obj in session.dirty:
+        if isinstance(obj, User):
+            state = inspect(obj)
+            if any(state.attrs[attr].history.has_changes() for attr in _PRINCIPAL_ATTRS):
+                dirty.add(obj.id)
+        elif isinstance(obj, UserDepartment):
+            dirty.update(value for value in inspect(obj).attrs.user_id.history.sum() if value is not None)
+        elif isinstance(obj, Department):
+            dirty.add(None)  # moved to another company: affects every member
+    for obj in list(session.new) + list(session.deleted):
+        if isinstance(obj, (User, UserDepartment)):
+            # A new user row may reuse the id of a cached, deleted one
+            dirty.add(obj.id if isinstance(obj, User) else obj.user_id)
+        elif isinstance(obj, Department) and obj in session.deleted:
+            dirty.add(None)
+    if not dirty:
+        session.info.pop('auth_dirty')
+
+
+@event.listens_for(db.session, 'do_orm_execute')
+def _mark_principal_bulk_writes(orm_execute_state):
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    table = getattr(orm_execute_state.statement, 'table', None)
+    if table is not None and table in _AUTH_TABLES:
+        orm_execute_state.session.info.setdefault('auth_dirty', set()).add(None)
+
+
+@event.listens_for(db.session, 'after_commit')
+def _invalidate_after_commit(session):
+    # After commit, so a concurrent load cannot re-cache the old row
+    dirty = session.info.pop('auth_dirty', None)
+    if dirty:
+        invalidate_principals(None if None in dirty else dirty)
+
+
+@event.listens_for(db.session, 'after_soft_rollback')
+def _clear_after_rollback(session, previous_transaction):
+    session.info.pop('auth_dirty', None)
@@ -0,0 +1,94 @@
+"""
+Warehouse Stock Balances
+Maintains the warehouse_stock table (active/expired quantity and batch count
+per warehouse and item) so warehouse views never have to scan batches.
+
+Batches written through the ORM are picked up by a session flush hook, in
+the same transaction. Bulk Core writes (transfers, the expiry sweep) call
+refresh_warehouse_stock() with the keys they touched. Either way a key is
+recomputed from its batches rather than patched with deltas, so concurrent
+writers cannot drift the balance.
+"""
+from datetime import datetime
+
+from sqlalchemy import and_, case, event, exists, func, literal, select, tuple_
+
+from app import db
+from app.models import InventoryBatch, WarehouseStock
+from app.utils import dialect_insert
+
+# Keys per statement, well under SQLite's bound-parameter limit
+_KEY_CHUNK = 400
+
+
+def _balance_select(now, where):
+    batches = InventoryBatch.__table__
+    expired = and_(batches.c.expiry_date.isnot(None), batches.c.expiry_date < now)
+    return (
+        select(
+            batches.c.warehouse_id,
+            batches.c.item_id,
+            func.sum(case((and_(batches.c.is_active == True, ~expired), batches.c.quantity), else_=0)),
+            func.sum(case((expired, batches.c.quantity), else_=0)),
+            func.count(batches.c.id),
+            literal(now),
+        )
+        .where(where)
+        .group_by(batches.c.warehouse_id, batches.c.item_id)
+    )
+
+
+_COLUMNS = ['warehouse_id', 'item_id', 'active_quantity', 'expired_quantity', 'batch_count', 'updated_at']
+
+
+def refresh_warehouse_stock(keys, connection=None, now=None):
+    """Recompute the balance rows for (warehouse_id, item_id) keys (no commit)"""
+    keys = list({(int(w), int(i)) for w, i in keys})
+    if not keys:
+        return
+    bind = connection or db.session
+    execute, insert = bind.execute, dialect_insert(bind)
+    now = now or datetime.utcnow()
+    table = WarehouseStock.__table__
+    batches = InventoryBatch.__table__
+
+    for start in range(0, len(keys), _KEY_CHUNK):
+        chunk = keys[start:start + _KEY_CHUNK]
+        stmt = insert(table).from_select(
+            _COLUMNS, _balance_select(now, tuple_(batches.c.warehouse_id, batches.c.item_id).in_(chunk))
+        )
+        execute(stmt.on_conflict_do_update(
+            index_elements=['warehouse_id', 'item_id'],
+            set_={col: stmt.excluded[col] for col in _COLUMNS[2:]},
+        ))
+        # Keys whose last batch was deleted
+        execute(table.delete().where(
+            tuple_(table.c.warehouse_id, table.c.item_id).in_(chunk),
+            ~exists().where(batches.c.warehouse_id == table.c.warehouse_id,
+                            batches.c.item_id == table.c.item_id),
+        ))
+
+
+def rebuild_warehouse_stock(now=None):
+    """Rebuild the whole balance table from batches. Returns the number of rows."""
+    table = WarehouseStock.__table__
+    db.session.execute(table.delete())
+    db.session.execute(table.insert().from_select(_COLUMNS, _balance_select(now or datetime.utcnow(), True)))
+    db.session.commit()
+    return db.session.query(func.count()).select_from(table).scalar()
+
+
+@event.listens_for(db.session, 'before_flush')
+def _collect_batch_keys(session, flush_context, instances):
+    # Read keys before the flush: deleted batches are gone afterwards
+    keys = session.info.setdefault('warehouse_stock_keys', set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, InventoryBatch) and obj.warehouse_id and obj.item_id:
+            keys.add((obj.warehouse_id, obj.item_id))
+
+
+@event.listens_for(db.session, 'after_flush')
+def _refresh_batch_keys(session, flush_context):
+    keys = session.info.pop('warehouse_stock_keys', None)
+    if keys:
+        refresh_warehouse_stock(keys, connection=session.connection())
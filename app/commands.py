@@ -0,0 +1,217 @@
+"""
+Maintenance CLI Commands
+Run with: flask --app run <command>
+"""
+import click
+from flask.cli import with_appcontext
+
+COMMANDS = []
+
+# The users `flask init` creates on a new database
+DEFAULT_USERS = (
+    ('admin', 'adminpass', 'Admin'),
+    ('manager', 'managerpass', 'Manager'),
+    ('staff', 'staffpass', 'Staff'),
+)
+
+
+def command(name):
+    """A click command run in an app context; init_app() adds it to the app's CLI"""
+    def decorator(f):
+        cmd = click.command(name)(with_appcontext(f))
+        COMMANDS.append(cmd)
+        return cmd
+    return decorator
+
+
+def init_app(app):
+    for cmd in COMMANDS:
+        app.cli.add_command(cmd)
+
+
+def init_database():
+    """Migrate the schema and create any missing default users (needs an app context)"""
+    from app import db
+    from app.migrations import upgrade
+    from app.models import User
+
+    applied = upgrade()
+    click.echo(f"applied {', '.join(applied)}" if applied else 'database is up to date')
+    for username, password, role in DEFAULT_USERS:
+        if User.query.filter_by(username=username).first():
+            click.echo(f'{role} user already exists: {username}')
+            continue
+        user = User(username=username, role=role)
+        user.set_password(password)
+        db.session.add(user)
+        click.echo(f'Created {role} user: {username} / {password}')
+    db.session.commit()
+    db.session.remove()
+
+
+@command('init')
+def init_command():
+    """Apply schema migrations and create the default users. Run once per deploy, before the workers start."""
+    init_database()
+
+
+@command('db-upgrade')
+def db_upgrade_command():
+    """Apply pending schema migrations (creates the schema on a new database)."""
+    from app.migrations import upgrade
+
+    applied = upgrade()
+    click.echo(f"applied {', '.join(applied)}" if applied else 'database is up to date')
+
+
+@command('db-status')
+def db_status_command():
+    """List schema migrations and when each was applied."""
+    from app.migrations import migration_status
+
+    for migration in migration_status():
+        applied = migration['applied_at'].strftime('%Y-%m-%d %H:%M') if migration['applied_at'] else 'pending'
+        click.echo(f"{migration['version']}  {applied:16}  {migration['description']}")
+
+
+@command('rebuild-rollups')
+def rebuild_rollups_command():
+    """Backfill the daily sales/purchase rollup tables from history."""
+    from app.report_utils import rebuild_rollups
+
+    for table, rows in rebuild_rollups().items():
+        click.echo(f'{table}: {rows} rows')
+
+
+@command('rebuild-warehouse-stock')
+def rebuild_warehouse_stock_command():
+    """Rebuild the per-warehouse, per-item balance table from inventory batches."""
+    from app.balance_utils import rebuild_warehouse_stock
+
+    click.echo(f'warehouse_stock: {rebuild_warehouse_stock()} rows')
+
+
+@command('evaluate-alerts')
+def evaluate_alerts_command():
+    """Re-evaluate low-stock, overstock and expiry alerts for every item."""
+    from app.alert_utils import evaluate_stock_alerts
+
+    result = evaluate_stock_alerts()
+    click.echo(f"opened {result['opened']}, closed {result['closed']}, "
+               f"expired batches {result['expired_batches']}")
+
+
+@command('sweep-expiry')
+@click.option('--days', type=int, default=None, help='Expiring-soon window (default EXPIRY_WARNING_DAYS).')
+def sweep_expiry_command(days):
+    """Deactivate expired batches and refresh expiry alerts. Schedule this (e.g. daily cron)."""
+    from app.alert_utils import sweep_expiry
+
+    result = sweep_expiry(expiry_days=days)
+    click.echo(f"expired batches {result['expired_batches']}, "
+               f"opened {result['opened']}, closed {result['closed']}")
+
+
+@command('create-indexes')
+def create_indexes_command():
+    """Create model indexes missing from an existing database (create_all skips existing tables)."""
+    from app import db
+
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(db.engine, checkfirst=True)
+            click.echo(f'{table.name}: {index.name}')
+
+
+@command('search-rebuild')
+def search_rebuild_command():
+    """Refill the full-text search index from the customer, supplier, item, CRM and employee tables."""
+    from app.search_utils import rebuild_search_index
+
+    for kind, documents in rebuild_search_index().items():
+        click.echo(f'{kind}: {documents} documents')
+
+
+@command('init-ledger')
+def init_ledger_command():
+    """Record opening stock movements for items that have none (run once on an existing database)."""
+    from app.ledger_utils import record_opening_balances
+
+    click.echo(f'{record_opening_balances()} opening movements recorded')
+
+
+@command('snapshot-stock')
+def snapshot_stock_command():
+    """Fold new stock movements into balance snapshots. Schedule this (e.g. hourly cron)."""
+    from app.ledger_utils import take_stock_snapshots
+
+    click.echo(f'{take_stock_snapshots()} snapshots written')
+
+
+@command('run-jobs')
+@click.option('--workers', type=int, default=None, help='Pool processes (default JOB_WORKERS or CPU count).')
+@click.option('--until-idle', is_flag=True, help='Exit once the queue is empty instead of polling.')
+def run_jobs_command(workers, until_idle):
+    """Run queued background jobs (invoice PDFs) in a process pool."""
+    from app.job_utils import run_jobs
+
+    click.echo(f'{run_jobs(workers=workers, stop_when_idle=until_idle)} jobs processed')
+
+
+@command('import-csv')
+@click.argument('kind', type=click.Choice(['items', 'customers', 'suppliers', 'batches']))
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--chunk-size', type=int, default=None, help='Rows per insert batch (default IMPORT_CHUNK_SIZE).')
+def import_csv_command(kind, path, chunk_size):
+    """Stream-import items, customers, suppliers or batches from a CSV file with a header row."""
+    from app.import_utils import import_csv
+
+    with open(path, newline='', encoding='utf-8-sig') as stream:
+        try:
+            report = import_csv(kind, stream, chunk_size=chunk_size)
+        except ValueError as e:
+            raise click.ClickException(str(e))
+
+    for error in report['errors']:
+        click.echo(f"line {error['line']}: " + '; '.join(
+            f"{field}: {' '.join(messages)}" for field, messages in error['errors'].items()), err=True)
+    if report['errors_truncated']:
+        click.echo(f"... {report['failed'] - len(report['errors'])} more errors", err=True)
+    click.echo(f"{report['rows']} rows: {report['imported']} imported, {report['failed']} failed")
+
+
+@command('export')
+@click.argument('name', type=click.Choice(['orders', 'purchases', 'expenses', 'billing', 'payroll']))
+@click.argument('path', type=click.Path(dir_okay=False, writable=True))
+@click.option('--start', type=click.DateTime(formats=['%Y-%m-%d']), default=None, help='First day (YYYY-MM-DD).')
+@click.option('--end', type=click.DateTime(formats=['%Y-%m-%d']), default=None, help='Last day (YYYY-MM-DD).')
+def export_command(name, path, start, end):
+    """Stream an export to PATH; the format (csv or xlsx) is taken from its extension."""
+    from app.export_utils import stream_export
+
+    fmt = path.rsplit('.', 1)[-1].lower()
+    try:
+        stream = stream_export(name, fmt, start.date() if start else None, end.date() if end else None)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    with open(path, 'wb') as out:
+        for chunk in stream:
+            out.write(chunk)
+    click.echo(f'{name} written to {path}')
+
+
+@command('seed-data')
+@click.option('--scale', type=float, default=1.0, show_default=True,
+              help='Fraction of the full volume (1.0 is 2M orders, 200k items).')
+@click.option('--seed', type=int, default=42, show_default=True, help='Random seed.')
+def seed_data_command(scale, seed):
+    """Fill an empty database with a large synthetic dataset for benchmarking."""
+    from app.seed_utils import generate_dataset
+
+    def progress(name, rows, seconds):
+        click.echo(f'{name}: {rows} rows in {seconds:.1f}s' if rows is not None else f'{name}: {seconds:.1f}s')
+
+    try:
+        generate_dataset(scale=scale, seed=seed, progress=progress)
+    except ValueError as e:
+        raise click.ClickException(str(e))
@@ -1,6 +1,7 @@
 from flask_wtf import FlaskForm
-from wtforms import StringField, SubmitField, TextAreaField, SelectField, DecimalField, DateField
+from wtforms import StringField, SubmitField, TextAreaField, DecimalField, DateField
 from wtforms.validators import DataRequired, Optional, Email
+from app.forms import LookupField
 
 
 class LeadForm(FlaskForm):
@@ -12,27 +13,27 @@ class LeadForm(FlaskForm):
 
 
 class TicketForm(FlaskForm):
-    lead_id = SelectField('Lead', coerce=int, validators=[Optional()])
+    lead_id = LookupField('Lead', entity='leads', validators=[Optional()])
     subject = StringField('Subject', validators=[DataRequired()])
     description = TextAreaField('Description', validators=[Optional()])
     submit = SubmitField('Create Ticket')
 
 
 class NoteForm(FlaskForm):
-    lead_id = SelectField('Lead', coerce=int, validators=[DataRequired()])
+    lead_id = LookupField('Lead', entity='leads', validators=[DataRequired()])
     content = TextAreaField('Note', validators=[DataRequired()])
     submit = SubmitField('Add Note')
 
 
 class QuotationForm(FlaskForm):
-    lead_id = SelectField('Lead', coerce=int, validators=[Optional()])
+    lead_id = LookupField('Lead', entity='leads', validators=[Optional()])
     reference = StringField('Reference', validators=[DataRequired()])
     amount = DecimalField('Amount', validators=[DataRequired()], places=2)
     submit = SubmitField('Create Quotation')
 
 
 class FollowUpForm(FlaskForm):
-    quotation_id = SelectField('Quotation', coerce=int, validators=[DataRequired()])
+    quotation_id = LookupField('Quotation', entity='quotations', validators=[DataRequired()])
     notes = TextAreaField('Notes', validators=[Optional()])
     followup_date = DateField('Follow-up Date', validators=[Optional()], format='%Y-%m-%d')
     submit = SubmitField('Schedule Follow-up')
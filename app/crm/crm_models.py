@@ -14,6 +14,12 @@ class Lead(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     notes = db.relationship('Note', backref='lead', lazy=True)
 
+    # Typeahead by lead id or name (app/lookup_utils.py)
+    __table_args__ = (
+        db.Index("ix_lead_code_nocase", lead_id.collate("NOCASE")),
+        db.Index("ix_lead_name_nocase", name.collate("NOCASE")),
+    )
+
     def __repr__(self):
         return f"<Lead {self.lead_id} {self.name}>"
 
@@ -52,5 +58,8 @@ class Quotation(db.Model):
     status = db.Column(db.String(32), default='pending')
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    # Typeahead by reference (app/lookup_utils.py)
+    __table_args__ = (db.Index("ix_quotation_reference_nocase", reference.collate("NOCASE")),)
+
     def __repr__(self):
         return f"<Quotation {self.reference} {self.amount}>"
@@ -35,9 +35,8 @@ def leads():
 @login_required
 def tickets():
     form = TicketForm()
-    form.lead_id.choices = [(0, '- None -')] + [(l.id, f"{l.lead_id} - {l.name}") for l in Lead.query.order_by(Lead.created_at.desc()).all()]
     if form.validate_on_submit():
-        ticket = Ticket(ticket_id=f"TKT-{generate_lead_id()}", lead_id=form.lead_id.data if form.lead_id.data != 0 else None, subject=form.subject.data, description=form.description.data)
+        ticket = Ticket(ticket_id=f"TKT-{generate_lead_id()}", lead_id=form.lead_id.data, subject=form.subject.data, description=form.description.data)
         db.session.add(ticket)
         db.session.commit()
         flash('Ticket created.')
@@ -50,7 +49,6 @@ def tickets():
 @login_required
 def followups():
     form = FollowUpForm()
-    form.quotation_id.choices = [(q.id, f"{q.reference} - {q.amount}") for q in Quotation.query.order_by(Quotation.created_at.desc()).all()]
     if form.validate_on_submit():
         # in a fuller app we'd create a followup schedule entry; for now we flash and redirect
         flash('Follow-up scheduled.')
@@ -62,7 +60,6 @@ def followups():
 @login_required
 def notes():
     form = NoteForm()
-    form.lead_id.choices = [(l.id, f"{l.lead_id} - {l.name}") for l in Lead.query.order_by(Lead.created_at.desc()).all()]
     if form.validate_on_submit():
         note = Note(lead_id=form.lead_id.data, content=form.content.data)
         db.session.add(note)
@@ -77,9 +74,8 @@ def notes():
 @login_required
 def quotations():
     form = QuotationForm()
-    form.lead_id.choices = [(0, '- None -')] + [(l.id, f"{l.lead_id} - {l.name}") for l in Lead.query.order_by(Lead.created_at.desc()).all()]
     if form.validate_on_submit():
-        q = Quotation(lead_id=form.lead_id.data if form.lead_id.data != 0 else None, reference=form.reference.data, amount=form.amount.data)
+        q = Quotation(lead_id=form.lead_id.data, reference=form.reference.data, amount=form.amount.data)
         db.session.add(q)
         db.session.commit()
         flash('Quotation created.')
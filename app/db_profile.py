@@ -0,0 +1,159 @@
+"""
+SQLite Engine Profile
+Settings for running the SQLite database under several gunicorn workers
+(SQLITE_* in config). With SQLITE_TUNING on, for file databases:
+
+  - every new connection is switched to WAL, so readers never wait for a
+    writer, and gets the synchronous, busy_timeout, cache_size and mmap_size
+    pragmas
+  - each worker keeps a small QueuePool of connections
+  - transactions that are going to write (retry_on_locked units of work, and
+    the first transaction of a POST/PUT/PATCH/DELETE request) start with
+    BEGIN IMMEDIATE, so they queue
+    for the write lock up front instead of failing mid-transaction when
+    another worker committed first. Taking the lock is retried with backoff
+    when busy_timeout runs out; nothing has run yet at that point, so the
+    retry is always safe. Other transactions keep the sqlite3 module's
+    default: reads run outside a transaction and a deferred BEGIN is issued
+    before the first write.
+"""
+import random
+import sqlite3
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import partial
+
+from flask import has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+
+WRITE_METHODS = frozenset(('POST', 'PUT', 'PATCH', 'DELETE'))
+
+_write_intent = ContextVar('write_intent', default=False)
+_COMMITTED = 'erp.db_committed'
+
+
+def is_sqlite_file(uri):
+    url = make_url(uri)
+    return url.get_backend_name() == 'sqlite' and url.database not in (None, '', ':memory:')
+
+
+def engine_options(config):
+    """SQLALCHEMY_ENGINE_OPTIONS for a file-backed SQLite database"""
+    return {
+        'poolclass': QueuePool,
+        'pool_size': config.get('SQLITE_POOL_SIZE', 5),
+        'max_overflow': config.get('SQLITE_MAX_OVERFLOW', 10),
+        'pool_timeout': config.get('SQLITE_POOL_TIMEOUT', 30),
+        'connect_args': {
+            'timeout': config.get('SQLITE_BUSY_TIMEOUT', 5000) / 1000,
+            'check_same_thread': False,
+        },
+    }
+
+
+def init_engine_options(app):
+    """Pool and connect options for app's database. Call before the SQLAlchemy extension is set up."""
+    config = app.config
+    if not _tuned(config):
+        return
+    options = engine_options(config)
+    options.update(config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+
+
+def init_app(app):
+    """Apply the profile to app's SQLite engines (the primary and its binds). Call after db.init_app."""
+    from app import db
+
+    config = app.config
+    if not _tuned(config):
+        return
+    settings = dict(
+        pragmas=(
+            ('journal_mode', 'WAL'),
+            ('synchronous', config.get('SQLITE_SYNCHRONOUS', 'NORMAL')),
+            ('busy_timeout', config.get('SQLITE_BUSY_TIMEOUT', 5000)),
+            ('cache_size', config.get('SQLITE_CACHE_SIZE', -65536)),
+            ('mmap_size', config.get('SQLITE_MMAP_SIZE', 268435456)),
+            ('temp_store', 'MEMORY'),
+        ),
+        retries=config.get('DB_LOCK_RETRIES', 5),
+        backoff=config.get('DB_LOCK_BACKOFF', 0.05),
+    )
+    with app.app_context():
+        engines = list(db.engines.values())
+    for engine in engines:
+        if engine.dialect.name == 'sqlite':
+            _profile_engine(engine, settings)
+
+
+def _tuned(config):
+    return config.get('SQLITE_TUNING', True) and is_sqlite_file(config['SQLALCHEMY_DATABASE_URI'])
+
+
+@contextmanager
+def write_intent():
+    """Transactions begun inside this block take the write lock up front"""
+    token = _write_intent.set(True)
+    try:
+        yield
+    finally:
+        _write_intent.reset(token)
+
+
+def _wants_write_lock():
+    if _write_intent.get():
+        return True
+    # Reads after the request's commit (redirects, rendering) need no lock
+    return (has_request_context() and request.method in WRITE_METHODS
+            and not request.environ.get(_COMMITTED))
+
+
+def _profile_engine(engine, settings):
+    # Listeners go on this engine only, so each app's engines keep their own settings
+    event.listen(engine, 'do_connect', _note_read_only)
+    event.listen(engine, 'connect', partial(_configure_connection, settings))
+    event.listen(engine, 'begin', partial(_begin, settings))
+    event.listen(engine, 'commit', _note_commit)
+
+
+def _note_read_only(dialect, connection_record, cargs, cparams):
+    # Read-only binds (see db_routing) open the file as a mode=ro URI
+    if cargs and 'mode=ro' in str(cargs[0]):
+        connection_record.info['sqlite_read_only'] = True
+
+
+def _configure_connection(settings, dbapi_connection, connection_record):
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    read_only = connection_record.info.get('sqlite_read_only')
+    for name, value in settings['pragmas']:
+        # Only a writer can switch the journal mode; the primary has already done so
+        if not (read_only and name == 'journal_mode'):
+            dbapi_connection.execute(f'PRAGMA {name} = {value}')
+    connection_record.info['sqlite_profile'] = True
+
+
+def _begin(settings, conn):
+    info = conn.connection.info
+    if not info.get('sqlite_profile') or info.get('sqlite_read_only') or not _wants_write_lock():
+        return
+    # sqlite3 skips its own implicit BEGIN once a transaction is open
+    dbapi_connection = conn.connection.driver_connection
+    attempts, delay = settings['retries'], settings['backoff']
+    for attempt in range(attempts + 1):
+        try:
+            dbapi_connection.execute('BEGIN IMMEDIATE')
+            return
+        except sqlite3.OperationalError as e:
+            if 'database is locked' not in str(e) or attempt == attempts:
+                raise
+            time.sleep(random.uniform(0, delay * (2 ** attempt)))
+
+
+def _note_commit(conn):
+    if has_request_context():
+        request.environ[_COMMITTED] = True
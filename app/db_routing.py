@@ -0,0 +1,72 @@
+"""
+Read-only Connection Routing
+Heavy read views (reports, dashboard, account summaries, warehouse stock) run
+their queries on a second, read-only engine, so long analytical reads never
+take write locks or tie up the connections order entry uses.
+
+The read engine is the 'readonly' bind: READ_DATABASE_URL (e.g. a replica)
+when set, otherwise the primary SQLite file opened with mode=ro. Views opt in
+with @read_only; inside it the session sends SELECTs to the read engine while
+flushes and INSERT/UPDATE/DELETE statements still go to the primary.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from flask_sqlalchemy.session import Session
+from sqlalchemy.engine import make_url
+
+from app.db_profile import is_sqlite_file
+
+READ_ONLY_BIND = 'readonly'
+
+_read_only = ContextVar('read_only', default=False)
+
+
+def read_only_uri(uri):
+    """mode=ro URI for a SQLite file database"""
+    url = make_url(uri)
+    return f'sqlite:///file:{url.database}?mode=ro&uri=true'
+
+
+def init_app(app):
+    """Register the read-only bind. Call before the SQLAlchemy extension is set up."""
+    config = app.config
+    if not config.get('READ_ROUTING', True):
+        return
+    uri = config.get('READ_DATABASE_URL')
+    if not uri and is_sqlite_file(config['SQLALCHEMY_DATABASE_URI']):
+        uri = read_only_uri(config['SQLALCHEMY_DATABASE_URI'])
+    if uri:
+        config['SQLALCHEMY_BINDS'] = dict(config.get('SQLALCHEMY_BINDS') or {}, **{READ_ONLY_BIND: uri})
+
+
+class RoutingSession(Session):
+    """db.session class: reads go to the read-only bind inside read_only blocks"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (bind is None and _read_only.get() and not self._flushing
+                and not getattr(clause, 'is_dml', False)):
+            engine = self._db.engines.get(READ_ONLY_BIND)
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@contextmanager
+def read_only_session():
+    """Route the session's reads to the read-only engine inside this block"""
+    token = _read_only.set(True)
+    try:
+        yield
+    finally:
+        _read_only.reset(token)
+
+
+def read_only(view):
+    """View decorator: run the view's queries (and template rendering) on the read-only engine"""
+    @wraps(view)
+    def wrapped(*args, **kwargs):
+        with read_only_session():
+            return view(*args, **kwargs)
+    return wrapped
@@ -0,0 +1,246 @@
+"""
+Streaming Exports
+CSV and XLSX downloads of orders, purchases, expenses, billing and payroll
+(/export/<name>.<fmt>, flask export).
+
+Rows are read with yield_per, so the driver hands them over in batches of
+EXPORT_BATCH_SIZE and never materialises the result, and each batch is
+encoded and yielded before the next is fetched. Memory stays flat however
+many rows match, and the first bytes go out as soon as the first batch is read.
+
+XLSX is written directly as zipped SpreadsheetML (inline strings, no styles)
+rather than through a spreadsheet library, which would build the workbook in
+memory. Sheets roll over at Excel's row limit.
+"""
+import csv
+import io
+import re
+import zipfile
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from xml.sax.saxutils import escape
+
+from flask import current_app
+from sqlalchemy import select
+
+from app import db
+from app.finance.models import Billing, Expense, Tax
+from app.hrm.models import Employee, Payroll
+from app.models import Order, Purchase, Item, Customer, Supplier
+
+
+def _orders():
+    return (select(Order.id, Order.order_date, Item.name, Customer.name, Order.quantity, Item.price,
+                   Order.quantity * Item.price, Order.invoiced)
+            .join(Item, Order.item_id == Item.id)
+            .outerjoin(Customer, Order.customer_id == Customer.id))
+
+
+def _purchases():
+    return (select(Purchase.id, Purchase.purchase_date, Item.name, Supplier.name, Purchase.quantity, Item.price,
+                   Purchase.quantity * Item.price)
+            .join(Item, Purchase.item_id == Item.id)
+            .outerjoin(Supplier, Purchase.supplier_id == Supplier.id))
+
+
+def _expenses():
+    return select(Expense.id, Expense.date, Expense.category, Expense.description, Expense.amount)
+
+
+def _billing():
+    return (select(Billing.id, Billing.date_issued, Billing.reference, Billing.customer, Billing.amount,
+                   Tax.name, Billing.paid)
+            .outerjoin(Tax, Billing.tax_id == Tax.id))
+
+
+def _payroll():
+    return (select(Payroll.id, Payroll.period_start, Payroll.period_end, Employee.name,
+                   Payroll.gross_pay, Payroll.taxes, Payroll.net_pay)
+            .join(Employee, Payroll.employee_id == Employee.id))
+
+
+# name -> (select builder, id column, date column filtered on, header row)
+EXPORTS = {
+    'orders': (_orders, Order.id, Order.order_date,
+               ('Order ID', 'Date', 'Item', 'Customer', 'Quantity', 'Unit Price', 'Total', 'Invoiced')),
+    'purchases': (_purchases, Purchase.id, Purchase.purchase_date,
+                  ('Purchase ID', 'Date', 'Item', 'Supplier', 'Quantity', 'Unit Price', 'Total')),
+    'expenses': (_expenses, Expense.id, Expense.date,
+                 ('Expense ID', 'Date', 'Category', 'Description', 'Amount')),
+    'billing': (_billing, Billing.id, Billing.date_issued,
+                ('Billing ID', 'Date Issued', 'Reference', 'Customer', 'Amount', 'Tax', 'Paid')),
+    'payroll': (_payroll, Payroll.id, Payroll.period_end,
+                ('Payroll ID', 'Period Start', 'Period End', 'Employee', 'Gross Pay', 'Taxes', 'Net Pay')),
+}
+
+FORMATS = {
+    'csv': 'text/csv',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+
+def _export_batches(name, start=None, end=None, batch_size=None):
+    """Yield lists of result rows for export `name`, dated within [start, end] (dates, inclusive)"""
+    build, id_col, date_col, _ = EXPORTS[name]
+    batch_size = batch_size or current_app.config.get('EXPORT_BATCH_SIZE', 5000)
+    as_datetime = date_col.type.python_type is datetime
+    stmt = build()
+    if start:
+        stmt = stmt.where(date_col >= (datetime.combine(start, datetime.min.time()) if as_datetime else start))
+    if end:
+        end = end + timedelta(days=1)
+        stmt = stmt.where(date_col < (datetime.combine(end, datetime.min.time()) if as_datetime else end))
+    result = db.session.execute(stmt.order_by(id_col).execution_options(yield_per=batch_size))
+    try:
+        yield from result.partitions()
+    finally:
+        result.close()
+
+
+def _check(name):
+    if name not in EXPORTS:
+        raise ValueError(f'Unknown export: {name}')
+
+
+# ---------------- CSV ----------------
+def stream_csv(name, start=None, end=None, batch_size=None):
+    """Yield the export as UTF-8 CSV bytes, one piece per batch of rows"""
+    _check(name)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def drain():
+        data = buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+        return data
+
+    writer.writerow(EXPORTS[name][3])
+    yield drain()
+    for rows in _export_batches(name, start, end, batch_size):
+        writer.writerows(rows)
+        yield drain()
+
+
+# ---------------- XLSX ----------------
+# Excel's sheet size, header row included
+XLSX_MAX_ROWS = 1048576
+
+_ILLEGAL_XML = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+class ZipSink(io.RawIOBase):
+    """Unseekable stream that buffers what zipfile writes until it is drained"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        chunks, self._chunks = self._chunks, []
+        return b''.join(chunks)
+
+
+def _cell(value):
+    if value is None:
+        return '<c/>'
+    if isinstance(value, bool):
+        return f'<c t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float, Decimal)):
+        return f'<c><v>{value}</v></c>'
+    if isinstance(value, (date, datetime)):
+        value = value.isoformat(sep=' ') if isinstance(value, datetime) else value.isoformat()
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{escape(_ILLEGAL_XML.sub("", str(value)))}</t></is></c>'
+
+
+def _row(values):
+    return '<row>' + ''.join(_cell(value) for value in values) + '</row>'
+
+
+_SHEET_HEAD = ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+               '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>')
+_SHEET_TAIL = '</sheetData></worksheet>'
+
+
+def _workbook_parts(name, sheets):
+    """The fixed parts of a workbook with `sheets` worksheets"""
+    main = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+    rels = 'http://schemas.openxmlformats.org/package/2006/relationships'
+    doc_rels = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+    numbers = range(1, sheets + 1)
+    titles = [name.title() if sheets == 1 else f'{name.title()} {n}' for n in numbers]
+    head = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    return {
+        '[Content_Types].xml': head + (
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/xl/workbook.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+            + ''.join(f'<Override PartName="/xl/worksheets/sheet{n}.xml" '
+                      'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+                      for n in numbers)
+            + '</Types>'),
+        '_rels/.rels': head + (
+            f'<Relationships xmlns="{rels}">'
+            f'<Relationship Id="rId1" Type="{doc_rels}/officeDocument" Target="xl/workbook.xml"/>'
+            '</Relationships>'),
+        'xl/workbook.xml': head + (
+            f'<workbook xmlns="{main}" xmlns:r="{doc_rels}"><sheets>'
+            + ''.join(f'<sheet name="{title}" sheetId="{n}" r:id="rId{n}"/>' for n, title in zip(numbers, titles))
+            + '</sheets></workbook>'),
+        'xl/_rels/workbook.xml.rels': head + (
+            f'<Relationships xmlns="{rels}">'
+            + ''.join(f'<Relationship Id="rId{n}" Type="{doc_rels}/worksheet" Target="worksheets/sheet{n}.xml"/>'
+                      for n in numbers)
+            + '</Relationships>'),
+    }
+
+
+def stream_xlsx(name, start=None, end=None, batch_size=None, max_rows=XLSX_MAX_ROWS):
+    """Yield the export as an XLSX workbook, one piece per batch of rows"""
+    _check(name)
+    header = _row(EXPORTS[name][3])
+    sink = ZipSink()
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        sheets = 0
+        sheet = None
+        used = max_rows
+        for rows in _export_batches(name, start, end, batch_size):
+            while rows:
+                if used == max_rows:
+                    if sheet is not None:
+                        sheet.write(_SHEET_TAIL.encode())
+                        sheet.close()
+                    sheets += 1
+                    sheet = archive.open(f'xl/worksheets/sheet{sheets}.xml', 'w')
+                    sheet.write((_SHEET_HEAD + header).encode())
+                    used = 1
+                take, rows = rows[:max_rows - used], rows[max_rows - used:]
+                sheet.write(''.join(_row(values) for values in take).encode('utf-8'))
+                used += len(take)
+            yield sink.drain()
+        if sheet is None:
+            sheets = 1
+            sheet = archive.open('xl/worksheets/sheet1.xml', 'w')
+            sheet.write((_SHEET_HEAD + header).encode())
+        sheet.write(_SHEET_TAIL.encode())
+        sheet.close()
+        for part, xml in _workbook_parts(name, sheets).items():
+            archive.writestr(part, xml)
+    yield sink.drain()
+
+
+def stream_export(name, fmt, start=None, end=None, batch_size=None):
+    """Bytes generator for export `name` in `fmt` ('csv' or 'xlsx')"""
+    if fmt not in FORMATS:
+        raise ValueError(f'Unknown export format: {fmt}')
+    _check(name)
+    stream = stream_csv if fmt == 'csv' else stream_xlsx
+    return stream(name, start, end, batch_size)
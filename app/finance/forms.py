@@ -1,13 +1,14 @@
 from flask_wtf import FlaskForm
-from wtforms import StringField, SubmitField, DecimalField, DateField, SelectField, TextAreaField, BooleanField
+from wtforms import StringField, SubmitField, DecimalField, DateField, TextAreaField, BooleanField
 from wtforms.validators import DataRequired, Optional
+from app.forms import LookupField
 
 
 class BillForm(FlaskForm):
     reference = StringField("Reference", validators=[DataRequired()])
     customer = StringField("Customer", validators=[Optional()])
     amount = DecimalField("Amount", validators=[DataRequired()], places=2)
-    tax_id = SelectField("Tax", coerce=int, validators=[Optional()])
+    tax_id = LookupField("Tax", entity="taxes", validators=[Optional()])
     date_issued = DateField("Date Issued", validators=[Optional()], format="%Y-%m-%d")
     paid = BooleanField("Paid")
     submit = SubmitField("Save")
@@ -13,6 +13,9 @@ class Billing(db.Model):
     date_issued = db.Column(db.Date, default=date.today)
     paid = db.Column(db.Boolean, default=False)
 
+    # Covering index: period totals are summed from the index alone
+    __table_args__ = (db.Index("ix_billing_date_amount", "date_issued", "amount"),)
+
     def __repr__(self):
         return f"<Billing {self.reference} {self.amount}>"
 
@@ -23,6 +26,9 @@ class Tax(db.Model):
     name = db.Column(db.String(128), nullable=False)
     rate = db.Column(db.Numeric(5, 2), default=0.00)  # percentage
 
+    # Typeahead by name (app/lookup_utils.py)
+    __table_args__ = (db.Index("ix_tax_name_nocase", name.collate("NOCASE")),)
+
     billings = db.relationship("Billing", backref="tax", lazy=True)
 
     def __repr__(self):
@@ -37,6 +43,8 @@ class Expense(db.Model):
     date = db.Column(db.Date, default=date.today)
     category = db.Column(db.String(64))
 
+    __table_args__ = (db.Index("ix_expense_date_amount", "date", "amount"),)
+
     def __repr__(self):
         return f"<Expense {self.description} {self.amount}>"
 
@@ -1,6 +1,7 @@
 from flask import render_template, redirect, url_for, flash, request, abort
 from flask_login import login_required, current_user
 from app import db
+from app.db_routing import read_only
 from app.finance import bp
 from app.finance.models import Billing, Tax, Expense, AccountSummary
 from app.finance.forms import BillForm, ExpenseForm, TaxForm, AccountSummaryForm
@@ -21,14 +22,12 @@ def add_bill():
         abort(403)
 
     form = BillForm()
-    form.tax_id.choices = [(0, "- None -")] + [(t.id, f"{t.name} ({t.rate}%)") for t in Tax.query.order_by(Tax.name).all()]
     if form.validate_on_submit():
-        tax = form.tax_id.data if form.tax_id.data != 0 else None
         b = Billing(
             reference=form.reference.data,
             customer=form.customer.data,
             amount=form.amount.data or 0,
-            tax_id=tax,
+            tax_id=form.tax_id.data,
             date_issued=form.date_issued.data,
             paid=bool(form.paid.data),
         )
@@ -73,6 +72,7 @@ def expenses():
 
 @bp.route("/accounts", methods=["GET", "POST"])
 @login_required
+@read_only
 def accounts_summary():
     # Only Admins and Managers may generate account summaries
     if getattr(current_user, 'role', None) not in ["Admin", "Manager"]:
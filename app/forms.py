@@ -1,6 +1,6 @@
 from flask_wtf import FlaskForm
-from wtforms import StringField, IntegerField, DecimalField
-from wtforms.validators import DataRequired
+from wtforms import Field, StringField, IntegerField, DecimalField
+from wtforms.validators import DataRequired, ValidationError
 
 
 class ItemForm(FlaskForm):
@@ -8,3 +8,45 @@ class ItemForm(FlaskForm):
     sku = StringField("SKU", validators=[DataRequired()])
     quantity = IntegerField("Quantity")
     price = DecimalField("Price")
+
+
+class LookupField(Field):
+    """
+    An id picked with a typeahead over app.lookup_utils.LOOKUPS[entity]. Only
+    the chosen row is rendered, and the id is checked against the table when
+    the form validates. Empty input gives None (as does 0, like the '- None -'
+    choices it replaces).
+    """
+
+    def __init__(self, label=None, validators=None, entity=None, **kwargs):
+        super().__init__(label, validators, **kwargs)
+        self.entity = entity
+        self._label = None
+
+    def __call__(self, **kwargs):
+        kwargs.setdefault('id', self.id)
+        if 'class_' in kwargs:
+            kwargs['class'] = kwargs.pop('class_')
+        kwargs.setdefault('class', 'form-control')
+        from app.lookup_utils import lookup_input
+        return lookup_input(self.entity, self.name, self.data, self._label, **kwargs)
+
+    def _value(self):
+        return '' if self.data is None else str(self.data)
+
+    def process_formdata(self, valuelist):
+        self.data = None
+        if valuelist and valuelist[0] not in ('', '0'):
+            try:
+                self.data = int(valuelist[0])
+            except ValueError:
+                self.data = None
+                raise ValueError(self.gettext('Not a valid choice.'))
+
+    def pre_validate(self, form):
+        if self.data is None:
+            return
+        from app.lookup_utils import lookup_label
+        self._label = lookup_label(self.entity, self.data)
+        if self._label is None:
+            raise ValidationError(self.gettext('Not a valid choice.'))
@@ -2,6 +2,7 @@ from flask_wtf import FlaskForm
 from wtforms import StringField, SubmitField, DecimalField, DateField, SelectField, TextAreaField
 from wtforms.validators import DataRequired, Email, Optional
 from wtforms import ValidationError
+from app.forms import LookupField
 
 
 class EmployeeForm(FlaskForm):
@@ -15,14 +16,14 @@ class EmployeeForm(FlaskForm):
 
 
 class AttendanceForm(FlaskForm):
-    employee_id = SelectField("Employee", coerce=int, validators=[DataRequired()])
+    employee_id = LookupField("Employee", entity="employees", validators=[DataRequired()])
     date = DateField("Date", validators=[DataRequired()], format="%Y-%m-%d")
     status = SelectField("Status", choices=[("present", "Present"), ("absent", "Absent"), ("leave", "On Leave")])
     submit = SubmitField("Record")
 
 
 class PayrollForm(FlaskForm):
-    employee_id = SelectField("Employee", coerce=int, validators=[DataRequired()])
+    employee_id = LookupField("Employee", entity="employees", validators=[DataRequired()])
     period_start = DateField("Period Start", validators=[DataRequired()], format="%Y-%m-%d")
     period_end = DateField("Period End", validators=[DataRequired()], format="%Y-%m-%d")
     gross_pay = DecimalField("Gross Pay", validators=[DataRequired()], places=2)
@@ -41,7 +42,7 @@ class PayrollForm(FlaskForm):
 
 
 class LeaveForm(FlaskForm):
-    employee_id = SelectField("Employee", coerce=int, validators=[DataRequired()])
+    employee_id = LookupField("Employee", entity="employees", validators=[DataRequired()])
     start_date = DateField("Start Date", validators=[DataRequired()], format="%Y-%m-%d")
     end_date = DateField("End Date", validators=[DataRequired()], format="%Y-%m-%d")
     leave_type = StringField("Type", validators=[Optional()])
@@ -12,6 +12,9 @@ class Employee(db.Model):
     date_hired = db.Column(db.Date, default=date.today)
     salary = db.Column(db.Numeric(12, 2), default=0.00)
 
+    # Typeahead by name (app/lookup_utils.py)
+    __table_args__ = (db.Index("ix_employee_name_nocase", name.collate("NOCASE")),)
+
     attendances = db.relationship("Attendance", backref="employee", lazy=True)
     payrolls = db.relationship("Payroll", backref="employee", lazy=True)
     leaves = db.relationship("Leave", backref="employee", lazy=True)
@@ -29,6 +32,8 @@ class Attendance(db.Model):
     check_in = db.Column(db.Time, nullable=True)
     check_out = db.Column(db.Time, nullable=True)
 
+    __table_args__ = (db.Index("ix_attendance_date", "date"),)
+
     def __repr__(self):
         return f"<Attendance {self.employee_id} {self.date} {self.status}>"
 
@@ -43,6 +48,8 @@ class Payroll(db.Model):
     taxes = db.Column(db.Numeric(12, 2), default=0.00)
     net_pay = db.Column(db.Numeric(12, 2), default=0.00)
 
+    __table_args__ = (db.Index("ix_payroll_period_start", "period_start"),)
+
     def __repr__(self):
         return f"<Payroll {self.employee_id} {self.period_start} - {self.period_end}>"
 
@@ -57,5 +64,7 @@ class Leave(db.Model):
     status = db.Column(db.String(32), default="pending")  # pending/approved/rejected
     reason = db.Column(db.Text)
 
+    __table_args__ = (db.Index("ix_leave_start_date", "start_date"),)
+
     def __repr__(self):
         return f"<Leave {self.employee_id} {self.start_date} to {self.end_date}>"
@@ -37,8 +37,6 @@ def new_employee():
 @login_required
 def attendance():
     form = AttendanceForm()
-    # Populate employee choices
-    form.employee_id.choices = [(e.id, e.name) for e in Employee.query.order_by(Employee.name).all()]
     if form.validate_on_submit():
         a = Attendance(
             employee_id=form.employee_id.data,
@@ -60,7 +58,6 @@ def attendance():
 @login_required
 def payroll():
     form = PayrollForm()
-    form.employee_id.choices = [(e.id, e.name) for e in Employee.query.order_by(Employee.name).all()]
     if form.validate_on_submit():
         gross = form.gross_pay.data or 0
         taxes = form.taxes.data or 0
@@ -86,7 +83,6 @@ def payroll():
 @login_required
 def leaves():
     form = LeaveForm()
-    form.employee_id.choices = [(e.id, e.name) for e in Employee.query.order_by(Employee.name).all()]
     if form.validate_on_submit():
         l = Leave(
             employee_id=form.employee_id.data,
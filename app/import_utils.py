@@ -0,0 +1,225 @@
+"""
+Bulk CSV Import
+Streams items, customers, suppliers or inventory batches from a CSV file
+(flask import-csv, or the /import upload page) without loading the file or
+the imported rows into memory.
+
+Each row is validated with the import forms in inventory_forms (a single
+form instance is reused for the whole file). Valid rows are inserted in
+chunks of IMPORT_CHUNK_SIZE with one executemany per table, committed, and
+the session is expunged before the next chunk. Stock alerts are re-evaluated
+once, after the last chunk.
+"""
+import csv
+from collections import defaultdict
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import bindparam, insert, select, update
+from werkzeug.datastructures import MultiDict
+
+from app import db
+from app.alert_utils import evaluate_stock_alerts
+from app.balance_utils import refresh_warehouse_stock
+from app.inventory_forms import ItemImportForm, PartyImportForm, BatchImportForm
+from app.ledger_utils import record_movements
+from app.models import Item, Customer, Supplier, Warehouse, InventoryBatch
+from app.stock_utils import retry_on_locked
+
+# Above this many touched items, alerts are re-evaluated for the whole catalogue
+ALERT_SCOPE_LIMIT = 500
+
+
+def _blank_to_none(value):
+    return value or None
+
+
+# ---------------- Row builders ----------------
+def _item_row(form):
+    return {
+        'name': form.name.data,
+        'quantity': form.quantity.data,
+        'price': form.price.data,
+        'description': _blank_to_none(form.description.data),
+        'reorder_point': 10 if form.reorder_point.data is None else form.reorder_point.data,
+        'max_stock': 100 if form.max_stock.data is None else form.max_stock.data,
+    }
+
+
+def _party_row(form):
+    return {
+        'name': form.name.data,
+        'phone': _blank_to_none(form.phone.data),
+        'email': _blank_to_none(form.email.data),
+        'address': _blank_to_none(form.address.data),
+        'gst_number': _blank_to_none(form.gst_number.data),
+    }
+
+
+def _batch_row(form):
+    return {
+        'item_id': form.item_id.data,
+        'warehouse_id': form.warehouse_id.data,
+        'batch_number': form.batch_number.data,
+        'serial_number': _blank_to_none(form.serial_number.data),
+        'quantity': form.quantity.data,
+        'expiry_date': datetime.strptime(form.expiry_date.data, '%Y-%m-%d') if form.expiry_date.data else None,
+        'supplier_id': form.supplier_id.data or None,
+        'notes': _blank_to_none(form.notes.data),
+        'received_date': datetime.utcnow(),
+        'is_active': True,
+    }
+
+
+# ---------------- Chunk writers ----------------
+# Each takes [(line number, row)] and returns (touched item ids, [(line, errors)])
+def _write_items(chunk):
+    ids = db.session.execute(
+        insert(Item).returning(Item.id, sort_by_parameter_order=True), [row for _, row in chunk]
+    ).scalars().all()
+    record_movements(
+        {'item_id': item_id, 'quantity': row['quantity'], 'reason': 'opening', 'reference': 'import'}
+        for item_id, (_, row) in zip(ids, chunk)
+    )
+    return ids, []
+
+
+def _party_writer(model):
+    def write(chunk):
+        db.session.execute(insert(model), [row for _, row in chunk])
+        return [], []
+    return write
+
+
+def _existing_ids(model, ids):
+    ids = {i for i in ids if i is not None}
+    if not ids:
+        return set()
+    return set(db.session.execute(select(model.id).where(model.id.in_(ids))).scalars())
+
+
+def _write_batches(chunk):
+    known = {
+        'item_id': _existing_ids(Item, (row['item_id'] for _, row in chunk)),
+        'warehouse_id': _existing_ids(Warehouse, (row['warehouse_id'] for _, row in chunk)),
+        'supplier_id': _existing_ids(Supplier, (row['supplier_id'] for _, row in chunk)),
+    }
+    rows, errors = [], []
+    for line, row in chunk:
+        unknown = {field: ['No such record.'] for field, ids in known.items()
+                   if row[field] is not None and row[field] not in ids}
+        if unknown:
+            errors.append((line, unknown))
+        else:
+            rows.append(row)
+    if not rows:
+        return [], errors
+
+    batch_ids = db.session.execute(
+        insert(InventoryBatch).returning(InventoryBatch.id, sort_by_parameter_order=True), rows
+    ).scalars().all()
+
+    received = defaultdict(int)
+    for row in rows:
+        received[row['item_id']] += row['quantity']
+    items = Item.__table__
+    db.session.execute(
+        update(items).where(items.c.id == bindparam('b_id')).values(quantity=items.c.quantity + bindparam('b_qty')),
+        [{'b_id': item_id, 'b_qty': qty} for item_id, qty in received.items()],
+    )
+    record_movements(
+        {'item_id': row['item_id'], 'warehouse_id': row['warehouse_id'], 'batch_id': batch_id,
+         'quantity': row['quantity'], 'reason': 'batch_receipt', 'reference': 'import'}
+        for batch_id, row in zip(batch_ids, rows)
+    )
+    refresh_warehouse_stock({(row['warehouse_id'], row['item_id']) for row in rows})
+    return list(received), errors
+
+
+# kind -> (form class, required columns, row builder, chunk writer)
+IMPORT_KINDS = {
+    'items': (ItemImportForm, ('name', 'quantity', 'price'), _item_row, _write_items),
+    'customers': (PartyImportForm, ('name',), _party_row, _party_writer(Customer)),
+    'suppliers': (PartyImportForm, ('name',), _party_row, _party_writer(Supplier)),
+    'batches': (BatchImportForm, ('item_id', 'warehouse_id', 'batch_number', 'quantity'), _batch_row, _write_batches),
+}
+
+
+@retry_on_locked
+def _commit_chunk(write, chunk):
+    touched, errors = write(chunk)
+    db.session.commit()
+    return touched, errors
+
+
+class _Report:
+    """Row counts plus the first max_errors per-row errors"""
+
+    def __init__(self, kind, max_errors):
+        self.kind = kind
+        self.max_errors = max_errors
+        self.rows = self.imported = self.failed = 0
+        self.errors = []
+
+    def error(self, line, errors):
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({'line': line, 'errors': errors})
+
+    def to_dict(self):
+        return {'kind': self.kind, 'rows': self.rows, 'imported': self.imported, 'failed': self.failed,
+                'errors': self.errors, 'errors_truncated': self.failed > len(self.errors)}
+
+
+def import_csv(kind, stream, chunk_size=None, max_errors=None):
+    """
+    Import `kind` ('items', 'customers', 'suppliers', 'batches') from a text
+    stream of CSV with a header row. Returns counts and per-row errors (by
+    file line number). Raises ValueError for an unknown kind or missing columns.
+    """
+    if kind not in IMPORT_KINDS:
+        raise ValueError(f'Unknown import type: {kind}')
+    form_class, required, build_row, write = IMPORT_KINDS[kind]
+    config = current_app.config
+    chunk_size = chunk_size or config.get('IMPORT_CHUNK_SIZE', 1000)
+    report = _Report(kind, config.get('IMPORT_MAX_ERRORS', 1000) if max_errors is None else max_errors)
+
+    reader = csv.DictReader(stream)
+    columns = {(name or '').strip().lower() for name in reader.fieldnames or ()}
+    missing = [name for name in required if name not in columns]
+    if missing:
+        raise ValueError(f"Missing column(s): {', '.join(missing)}")
+
+    form = form_class(formdata=None, meta={'csrf': False})
+    chunk, touched = [], set()
+
+    def flush():
+        try:
+            chunk_touched, errors = _commit_chunk(write, chunk)
+        except Exception as e:
+            errors = [(line, {'row': [f'Not saved: {e}']}) for line, _ in chunk]
+            chunk_touched = []
+        for line, row_errors in errors:
+            report.error(line, row_errors)
+        report.imported += len(chunk) - len(errors)
+        touched.update(chunk_touched)
+        chunk.clear()
+        db.session.expunge_all()
+
+    for raw in reader:
+        line = reader.line_num
+        report.rows += 1
+        form.process(MultiDict({(k or '').strip().lower(): (v or '').strip()
+                                for k, v in raw.items() if isinstance(v, str)}))
+        if not form.validate():
+            report.error(line, form.errors)
+            continue
+        chunk.append((line, build_row(form)))
+        if len(chunk) >= chunk_size:
+            flush()
+    if chunk:
+        flush()
+
+    if touched:
+        evaluate_stock_alerts(touched if len(touched) <= ALERT_SCOPE_LIMIT else None)
+    return report.to_dict()
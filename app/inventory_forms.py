@@ -1,7 +1,9 @@
 from flask_wtf import FlaskForm
 from wtforms import StringField, IntegerField, DecimalField, DateTimeField, SelectField, TextAreaField, SubmitField
-from wtforms.validators import DataRequired, Optional, Email, ValidationError
+from datetime import datetime
+from wtforms.validators import DataRequired, InputRequired, Optional, Email, Length, NumberRange, ValidationError
 from app.models import Warehouse, Item
+from app.forms import LookupField
 
 # ==================== Warehouse Forms ====================
 class WarehouseForm(FlaskForm):
@@ -23,7 +25,7 @@ class AdvancedItemForm(FlaskForm):
     name = StringField('Item Name', validators=[DataRequired()], render_kw={"placeholder": "Enter item name"})
     quantity = IntegerField('Initial Quantity', validators=[DataRequired()], render_kw={"placeholder": "0"})
     price = DecimalField('Price per Unit (₹)', validators=[DataRequired()], places=2, render_kw={"placeholder": "0.00"})
-    description = TextAreaField('Description', validators=[Optional()], rows=2, render_kw={"placeholder": "Optional description"})
+    description = TextAreaField('Description', validators=[Optional()], render_kw={"rows": 2, "placeholder": "Optional description"})
     reorder_point = IntegerField('Reorder Point', default=10, validators=[DataRequired()], render_kw={"placeholder": "Alert at this quantity"})
     max_stock = IntegerField('Maximum Stock', default=100, validators=[DataRequired()], render_kw={"placeholder": "Max recommended"})
     submit = SubmitField('Add Item')
@@ -39,14 +41,14 @@ class EditAdvancedItemForm(FlaskForm):
 
 # ==================== Inventory Batch Forms ====================
 class InventoryBatchForm(FlaskForm):
-    item_id = SelectField('Item', coerce=int, validators=[DataRequired()])
+    item_id = LookupField('Item', entity='items', validators=[DataRequired()])
     warehouse_id = SelectField('Warehouse', coerce=int, validators=[DataRequired()])
     batch_number = StringField('Batch/Lot Number', validators=[DataRequired()], render_kw={"placeholder": "e.g., BATCH-2024-001"})
     serial_number = StringField('Serial Number', validators=[Optional()], render_kw={"placeholder": "Individual serial (optional)"})
     quantity = IntegerField('Quantity', validators=[DataRequired()], render_kw={"placeholder": "Number of units"})
     expiry_date = StringField('Expiry Date', validators=[Optional()], render_kw={"placeholder": "YYYY-MM-DD (optional)"})
-    supplier_id = SelectField('Supplier (Optional)', coerce=int, validators=[Optional()])
-    notes = TextAreaField('Notes', validators=[Optional()], rows=2, render_kw={"placeholder": "Additional notes"})
+    supplier_id = LookupField('Supplier (Optional)', entity='suppliers', validators=[Optional()])
+    notes = TextAreaField('Notes', validators=[Optional()], render_kw={"rows": 2, "placeholder": "Additional notes"})
     submit = SubmitField('Add Batch')
 
 class EditBatchForm(FlaskForm):
@@ -59,16 +61,46 @@ class EditBatchForm(FlaskForm):
 
 # ==================== Stock Movement/Transfer Form ====================
 class StockTransferForm(FlaskForm):
-    item_id = SelectField('Item', coerce=int, validators=[DataRequired()])
+    item_id = LookupField('Item', entity='items', validators=[DataRequired()])
     from_warehouse = SelectField('From Warehouse', coerce=int, validators=[DataRequired()])
     to_warehouse = SelectField('To Warehouse', coerce=int, validators=[DataRequired()])
     quantity = IntegerField('Quantity', validators=[DataRequired()], render_kw={"placeholder": "Units to transfer"})
     batch_number = StringField('Batch Number', validators=[Optional()], render_kw={"placeholder": "Specific batch (optional)"})
-    notes = TextAreaField('Transfer Notes', validators=[Optional()], rows=2)
+    notes = TextAreaField('Transfer Notes', validators=[Optional()], render_kw={"rows": 2})
     submit = SubmitField('Transfer Stock')
 
 # ==================== Stock Alert Form ====================
 class ResolveStockAlertForm(FlaskForm):
     alert_id = IntegerField('Alert ID', validators=[DataRequired()])
-    resolution_notes = TextAreaField('Resolution Notes', validators=[Optional()], rows=2)
+    resolution_notes = TextAreaField('Resolution Notes', validators=[Optional()], render_kw={"rows": 2})
     submit = SubmitField('Resolve Alert')
+
+# ==================== CSV Import Forms ====================
+# One row each; import_utils reuses a single instance per file. Same rules as the
+# add forms, except that stock levels may be 0 and ids replace the select lists.
+class ItemImportForm(AdvancedItemForm):
+    quantity = IntegerField('Initial Quantity', validators=[InputRequired(), NumberRange(min=0)])
+    price = DecimalField('Price per Unit (₹)', validators=[InputRequired(), NumberRange(min=0)], places=2)
+    reorder_point = IntegerField('Reorder Point', default=10, validators=[Optional(), NumberRange(min=0)])
+    max_stock = IntegerField('Maximum Stock', default=100, validators=[Optional(), NumberRange(min=0)])
+
+class PartyImportForm(FlaskForm):
+    """Customer or supplier row"""
+    name = StringField('Name', validators=[DataRequired(), Length(max=120)])
+    phone = StringField('Phone', validators=[Optional(), Length(max=15)])
+    email = StringField('Email', validators=[Optional(), Email(), Length(max=120)])
+    address = StringField('Address', validators=[Optional(), Length(max=250)])
+    gst_number = StringField('GST Number', validators=[Optional(), Length(max=20)])
+
+class BatchImportForm(InventoryBatchForm):
+    item_id = IntegerField('Item', validators=[DataRequired()])
+    warehouse_id = IntegerField('Warehouse', validators=[DataRequired()])
+    supplier_id = IntegerField('Supplier (Optional)', validators=[Optional()])
+    quantity = IntegerField('Quantity', validators=[DataRequired(), NumberRange(min=1)])
+
+    def validate_expiry_date(self, field):
+        if field.data:
+            try:
+                datetime.strptime(field.data, '%Y-%m-%d')
+            except ValueError:
+                raise ValidationError('Invalid expiry date format. Use YYYY-MM-DD.')
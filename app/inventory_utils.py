@@ -3,182 +3,139 @@ Inventory Management Utilities
 Handles stock alerts, batch tracking, and warehouse operations
 """
 from app import db
-from app.models import StockAlert, InventoryBatch, Item
-from datetime import datetime
+from app.models import StockAlert, InventoryBatch, Item, WarehouseStock
+from app.loaders import load_profile
+from app.alert_utils import evaluate_stock_alerts
+from app.transfer_utils import transfer_stock_lines
+from datetime import datetime, timedelta
+from sqlalchemy import func
+from sqlalchemy.orm import undefer
 
 def check_and_create_stock_alerts(item_id):
     """
-    Check if an item needs stock alerts and create them if necessary
-    """
-    item = Item.query.get(item_id)
-    if not item:
-        return
-
-    # Clear old unresolved alerts for this item
-    StockAlert.query.filter_by(item_id=item_id, is_resolved=False).delete()
-
-    alerts_created = []
-
-    # Check for low stock
-    if item.is_low_stock():
-        alert = StockAlert(
-            item_id=item_id,
-            alert_type='low_stock',
-            message=f"Item '{item.name}' is below reorder point ({item.quantity}/{item.reorder_point})"
-        )
-        db.session.add(alert)
-        alerts_created.append('low_stock')
-
-    # Check for overstock
-    if item.is_overstock():
-        alert = StockAlert(
-            item_id=item_id,
-            alert_type='overstock',
-            message=f"Item '{item.name}' has exceeded maximum stock ({item.quantity}/{item.max_stock})"
-        )
-        db.session.add(alert)
-        alerts_created.append('overstock')
-
-    # Check for expired batches
-    expired_batches = InventoryBatch.query.filter_by(item_id=item_id, is_active=True).all()
-    for batch in expired_batches:
-        if batch.is_expired():
-            alert = StockAlert(
-                item_id=item_id,
-                alert_type='expired',
-                message=f"Batch '{batch.batch_number}' has expired (Expiry: {batch.expiry_date})"
-            )
-            db.session.add(alert)
-            alerts_created.append('expired')
-            batch.is_active = False
-
-    if alerts_created:
-        db.session.commit()
-
-    return alerts_created
+    Re-evaluate stock alerts for a single item (see alert_utils.evaluate_stock_alerts)
+    """
+    return evaluate_stock_alerts([item_id])
 
 def get_warehouse_stock(warehouse_id, item_id=None):
     """
     Get total stock in a warehouse, optionally filtered by item
+    (read from the maintained warehouse_stock balances)
     """
-    query = InventoryBatch.query.filter_by(warehouse_id=warehouse_id, is_active=True)
-    
+    query = db.session.query(
+        func.coalesce(func.sum(WarehouseStock.active_quantity), 0),
+        func.coalesce(func.sum(WarehouseStock.expired_quantity), 0),
+        func.coalesce(func.sum(WarehouseStock.batch_count), 0),
+    ).filter(WarehouseStock.warehouse_id == warehouse_id)
+
     if item_id:
-        query = query.filter_by(item_id=item_id)
-    
-    batches = query.all()
-    total_stock = sum(b.quantity for b in batches if not b.is_expired())
-    
-    return {
-        'total': total_stock,
-        'batches': batches,
-        'expired': sum(b.quantity for b in batches if b.is_expired())
-    }
+        query = query.filter(WarehouseStock.item_id == item_id)
+
+    total, expired, batch_count = query.one()
+    return {'total': total, 'expired': expired, 'batch_count': batch_count}
+
+def warehouse_stock_query(warehouse_id):
+    """
+    Balance rows for one warehouse with their items (page with keyset_paginate on item_id)
+    """
+    return WarehouseStock.query.options(*load_profile('warehouse_stock')).filter(
+        WarehouseStock.warehouse_id == warehouse_id
+    )
+
+def stocked_items_query():
+    """
+    Items with batches in any warehouse (the rows of the stock matrix)
+    """
+    return Item.query.filter(Item.id.in_(db.session.query(WarehouseStock.item_id)))
+
+def stock_matrix(item_ids):
+    """
+    Item x warehouse balances for the given items:
+    {item_id: {warehouse_id: (active, expired)}} from one query
+    """
+    matrix = {item_id: {} for item_id in item_ids}
+    if not matrix:
+        return matrix
+    rows = db.session.query(
+        WarehouseStock.item_id, WarehouseStock.warehouse_id,
+        WarehouseStock.active_quantity, WarehouseStock.expired_quantity,
+    ).filter(WarehouseStock.item_id.in_(list(matrix)))
+    for item_id, warehouse_id, active, expired in rows:
+        matrix[item_id][warehouse_id] = (active, expired)
+    return matrix
 
 def transfer_stock(item_id, from_warehouse_id, to_warehouse_id, quantity, batch_number=None):
     """
-    Transfer stock from one warehouse to another
-    """
-    try:
-        if batch_number:
-            # Transfer specific batch
-            batch = InventoryBatch.query.filter_by(
-                item_id=item_id,
-                warehouse_id=from_warehouse_id,
-                batch_number=batch_number,
-                is_active=True
-            ).first()
-            
-            if not batch:
-                return {'success': False, 'message': 'Batch not found or inactive'}
-            
-            if batch.quantity < quantity:
-                return {'success': False, 'message': f'Insufficient quantity in batch (Available: {batch.quantity})'}
-            
-            # Create new batch entry in destination
-            new_batch = InventoryBatch(
-                item_id=item_id,
-                warehouse_id=to_warehouse_id,
-                batch_number=batch.batch_number,
-                serial_number=batch.serial_number,
-                quantity=quantity,
-                received_date=datetime.utcnow(),
-                expiry_date=batch.expiry_date,
-                supplier_id=batch.supplier_id,
-                notes=f"Transferred from Warehouse {from_warehouse_id}"
-            )
-            
-            batch.quantity -= quantity
-            if batch.quantity == 0:
-                batch.is_active = False
-            
-            db.session.add(new_batch)
-        else:
-            # Transfer from any available batch
-            from_batches = InventoryBatch.query.filter_by(
-                item_id=item_id,
-                warehouse_id=from_warehouse_id,
-                is_active=True
-            ).order_by(InventoryBatch.received_date).all()
-            
-            remaining = quantity
-            for batch in from_batches:
-                if batch.is_expired():
-                    continue
-                
-                transfer_qty = min(batch.quantity, remaining)
-                
-                new_batch = InventoryBatch(
-                    item_id=item_id,
-                    warehouse_id=to_warehouse_id,
-                    batch_number=batch.batch_number,
-                    serial_number=batch.serial_number,
-                    quantity=transfer_qty,
-                    received_date=datetime.utcnow(),
-                    expiry_date=batch.expiry_date,
-                    supplier_id=batch.supplier_id,
-                    notes=f"Transferred from Warehouse {from_warehouse_id}"
-                )
-                
-                batch.quantity -= transfer_qty
-                if batch.quantity == 0:
-                    batch.is_active = False
-                
-                db.session.add(new_batch)
-                remaining -= transfer_qty
-                
-                if remaining == 0:
-                    break
-            
-            if remaining > 0:
-                return {'success': False, 'message': f'Insufficient stock (Needed: {quantity}, Available: {quantity - remaining})'}
-        
-        db.session.commit()
+    Transfer stock from one warehouse to another (a one-line transfer_stock_lines document)
+    """
+    result = transfer_stock_lines(from_warehouse_id, to_warehouse_id, [
+        {'item_id': item_id, 'quantity': quantity, 'batch_number': batch_number}
+    ])
+    if result['lines'] and result['lines'][0]['message']:
+        return {'success': False, 'message': result['lines'][0]['message']}
+    if result['success']:
         return {'success': True, 'message': f'Successfully transferred {quantity} units'}
-    
-    except Exception as e:
-        db.session.rollback()
-        return {'success': False, 'message': f'Transfer failed: {str(e)}'}
+    return {'success': False, 'message': result['message']}
 
-def get_low_stock_items():
+def low_stock_query():
     """
-    Get all items that are below reorder point
+    Items below reorder point, most severe shortage first (uses ix_item_reorder_gap)
     """
-    items = Item.query.all()
-    return [item for item in items if item.is_low_stock()]
+    return Item.query.options(undefer(Item.reorder_gap)).filter(Item.reorder_gap < 0)
 
-def get_overstock_items():
+def overstock_query():
     """
-    Get all items that have exceeded max stock
+    Items above max stock (uses ix_item_overstock_gap)
     """
-    items = Item.query.all()
-    return [item for item in items if item.is_overstock()]
+    return Item.query.options(undefer(Item.overstock_gap)).filter(Item.overstock_gap > 0)
 
-def get_active_stock_alerts():
+def get_low_stock_items(limit=None):
     """
-    Get all unresolved stock alerts
+    Get items that are below reorder point, most severe first
     """
-    return StockAlert.query.filter_by(is_resolved=False).all()
+    return low_stock_query().order_by(Item.reorder_gap, Item.id).limit(limit).all()
+
+def get_overstock_items(limit=None):
+    """
+    Get items that have exceeded max stock, largest excess first
+    """
+    return overstock_query().order_by(Item.overstock_gap.desc(), Item.id.desc()).limit(limit).all()
+
+def count_low_stock_items():
+    return db.session.query(func.count(Item.id)).filter(Item.reorder_gap < 0).scalar()
+
+def count_overstock_items():
+    return db.session.query(func.count(Item.id)).filter(Item.overstock_gap > 0).scalar()
+
+def expiring_batches_query(days, now=None, warehouse_id=None):
+    """
+    Active batches expiring within the next `days` days (uses ix_batch_active_expiry)
+    """
+    now = now or datetime.utcnow()
+    query = InventoryBatch.query.options(*load_profile('batch_list')).filter(
+        InventoryBatch.is_active == True,
+        InventoryBatch.expiry_date >= now,
+        InventoryBatch.expiry_date < now + timedelta(days=days),
+    )
+    if warehouse_id:
+        query = query.filter(InventoryBatch.warehouse_id == warehouse_id)
+    return query
+
+def active_stock_alerts_query():
+    """
+    Unresolved stock alerts (uses ix_stock_alert_open)
+    """
+    return StockAlert.query.options(*load_profile('alert_list')).filter_by(is_resolved=False)
+
+def get_active_stock_alerts(limit=None):
+    """
+    Get unresolved stock alerts, newest first
+    """
+    return (active_stock_alerts_query()
+            .order_by(StockAlert.created_at.desc(), StockAlert.id.desc()).limit(limit).all())
+
+def count_active_stock_alerts():
+    return StockAlert.query.filter_by(is_resolved=False).count()
 
 def resolve_stock_alert(alert_id):
     """
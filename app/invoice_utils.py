@@ -0,0 +1,170 @@
+"""
+Invoice PDFs
+Invoices are rendered by the background job runner (see job_utils), never in a
+request: the HTML is built in the runner and converted to PDF in a pool
+process. Orders are marked invoiced only once the PDF is on disk.
+
+A month-end invoice run renders one PDF per customer in parallel and is
+downloaded as a ZIP streamed from those files.
+"""
+import os
+import zipfile
+from itertools import groupby
+
+from flask import current_app, render_template
+from sqlalchemy import select, update
+
+from app import db
+from app.export_utils import ZipSink
+from app.job_utils import job_handler
+from app.loaders import load_profile
+from app.models import Job, Order
+
+# Order ids per UPDATE when a run is marked invoiced (SQLite bound-parameter limit)
+_ID_CHUNK = 500
+
+
+def invoice_lines(orders):
+    """(line dicts, grand total) for the invoice template"""
+    items = []
+    total = 0
+    for order in orders:
+        item_total = order.total_amount()
+        items.append({
+            "name": order.item.name,
+            "qty": order.quantity,
+            "price": order.item.price,
+            "total": item_total
+        })
+        total += item_total
+    return items, total
+
+
+def invoice_dir():
+    path = current_app.config['INVOICE_DIR']
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def render_pdf(html, path):
+    """HTML -> PDF file. Runs in a pool process; writes atomically and returns the path."""
+    from xhtml2pdf import pisa
+
+    partial = path + '.part'
+    with open(partial, 'wb') as out:
+        status = pisa.CreatePDF(html, dest=out, encoding='utf-8')
+    if status.err:
+        os.remove(partial)
+        raise RuntimeError(f'PDF rendering failed with {status.err} error(s)')
+    os.replace(partial, path)
+    return path
+
+
+def _mark_invoiced(job, paths):
+    db.session.execute(
+        update(Order).where(Order.id.in_(job.payload['order_ids'])).values(invoiced=True)
+        .execution_options(synchronize_session=False)
+    )
+    job.result = paths[0]
+
+
+@job_handler('invoice_pdf', finish=_mark_invoiced)
+def prepare_invoice_pdf(job):
+    """payload: po_number, po_date, company_name, order_ids"""
+    payload = job.payload
+    orders = (Order.query.options(*load_profile('invoice_orders'))
+              .filter(Order.id.in_(payload['order_ids'])).order_by(Order.id).all())
+    if not orders:
+        raise ValueError('None of the orders on this invoice exist any more')
+
+    items, total = invoice_lines(orders)
+    html = render_template(
+        'invoice.html',
+        po_number=payload['po_number'],
+        po_date=payload['po_date'],
+        company_name=payload['company_name'],
+        items=items,
+        total=total
+    )
+    return [(render_pdf, (html, os.path.join(invoice_dir(), f'invoice_{job.id}.pdf')))]
+
+
+# ---------------- Invoice runs ----------------
+def render_run_invoice(html, path, order_ids):
+    """render_pdf for one customer's run invoice, returning (path, the order ids on it)"""
+    return render_pdf(html, path), order_ids
+
+
+def _mark_run_invoiced(job, results):
+    # Exactly the orders on a PDF that was written, not everything uninvoiced up to the cutoff
+    order_ids = [order_id for _, ids in results for order_id in ids]
+    for start in range(0, len(order_ids), _ID_CHUNK):
+        db.session.execute(
+            update(Order).where(Order.id.in_(order_ids[start:start + _ID_CHUNK]), Order.invoiced == False)
+            .values(invoiced=True)
+            .execution_options(synchronize_session=False)
+        )
+    job.result = _run_dir(job.id)
+
+
+def _orders_on_open_invoices():
+    """Ids of orders on an invoice_pdf job that is still queued or running"""
+    payloads = db.session.scalars(
+        select(Job.payload).where(Job.kind == 'invoice_pdf', Job.status.in_(('queued', 'running'))))
+    return {order_id for payload in payloads for order_id in payload['order_ids']}
+
+
+def _run_dir(job_id):
+    path = os.path.join(invoice_dir(), f'run_{job_id}')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+@job_handler('invoice_run', finish=_mark_run_invoiced)
+def prepare_invoice_run(job):
+    """
+    payload: reference, po_date, company_name, cutoff_order_id.
+    One invoice per customer (walk-in orders share one) for every uninvoiced
+    order up to the cutoff, read in a single query grouped by customer. Orders
+    already on a queued or running single invoice are left to that invoice.
+    """
+    payload = job.payload
+    skip = _orders_on_open_invoices()
+    orders = (Order.query.options(*load_profile('invoice_run'))
+              .filter(Order.invoiced == False, Order.id <= payload['cutoff_order_id'])
+              .order_by(Order.customer_id, Order.id))
+    orders = (order for order in orders if order.id not in skip)
+
+    out = _run_dir(job.id)
+    tasks = []
+    for customer_id, customer_orders in groupby(orders, key=lambda order: order.customer_id):
+        customer_orders = list(customer_orders)
+        customer = customer_orders[0].customer
+        items, total = invoice_lines(customer_orders)
+        po_number = f"{payload['reference']}-{customer_id or 'WALKIN'}"
+        html = render_template(
+            'invoice.html',
+            po_number=po_number,
+            po_date=payload['po_date'],
+            company_name=payload['company_name'],
+            bill_to=customer.name if customer else 'Walk-in customers',
+            items=items,
+            total=total
+        )
+        path = os.path.join(out, f'Invoice_{po_number}.pdf')
+        tasks.append((render_run_invoice, (html, path, [order.id for order in customer_orders])))
+    return tasks
+
+
+def stream_zip(directory, chunk_size=64 * 1024):
+    """Yield a ZIP of the PDFs in `directory` piece by piece, never holding the archive in memory"""
+    sink = ZipSink()
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for name in sorted(os.listdir(directory)):
+            if not name.endswith('.pdf'):
+                continue
+            with open(os.path.join(directory, name), 'rb') as src, archive.open(name, 'w') as dest:
+                while chunk := src.read(chunk_size):
+                    dest.write(chunk)
+                    yield sink.drain()
+    yield sink.drain()
@@ -0,0 +1,204 @@
+"""
+Background Jobs
+A durable job queue kept in the app's own database (the jobs table), so slow
+work such as invoice PDFs runs outside web requests without an external broker.
+
+Requests enqueue() a job and return its id straight away. A runner
+(flask run-jobs) claims queued jobs with a conditional UPDATE, so several
+runners never take the same job, and executes them in a process pool.
+Each job kind registers a handler:
+
+    prepare(job) -> [(fn, args), ...]   in the runner, with an app context. The
+                                        tasks run in parallel in the pool; fn
+                                        must be a picklable module-level function
+    finish(job, results)                in the runner, in the transaction that
+                                        marks the job done (results in task order)
+
+A job succeeds once all of its tasks have; if any task fails the whole job
+is retried.
+
+Jobs left 'running' by a runner that died are requeued after JOB_TIMEOUT
+seconds, up to JOB_MAX_ATTEMPTS attempts.
+"""
+import logging
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import select, update
+
+from app import db
+from app.models import Job
+from app.stock_utils import retry_on_locked
+
+logger = logging.getLogger('erp.jobs')
+
+# kind -> (prepare, finish)
+JOB_HANDLERS = {}
+
+
+def job_handler(kind, finish):
+    """Register the decorated function as the prepare step for a job kind"""
+    def register(prepare):
+        JOB_HANDLERS[kind] = (prepare, finish)
+        return prepare
+    return register
+
+
+@retry_on_locked
+def enqueue(kind, payload, created_by=None):
+    """Queue a job and return it"""
+    if kind not in JOB_HANDLERS:
+        raise ValueError(f'Unknown job kind: {kind}')
+    job = Job(kind=kind, payload=payload, created_by=created_by)
+    db.session.add(job)
+    db.session.commit()
+    return job
+
+
+@retry_on_locked
+def claim_job():
+    """Atomically move the oldest queued job to 'running'. Returns it, or None."""
+    oldest = select(Job.id).where(Job.status == 'queued').order_by(Job.id).limit(1).scalar_subquery()
+    job_id = db.session.execute(
+        update(Job)
+        .where(Job.id == oldest, Job.status == 'queued')
+        .values(status='running', started_at=datetime.utcnow(), attempts=Job.attempts + 1)
+        .returning(Job.id)
+        .execution_options(synchronize_session=False)
+    ).scalar()
+    db.session.commit()
+    return db.session.get(Job, job_id, populate_existing=True) if job_id else None
+
+
+@retry_on_locked
+def requeue_stale_jobs(timeout=None):
+    """Requeue (or fail, once out of attempts) jobs stuck in 'running' longer than `timeout` seconds"""
+    config = current_app.config
+    timeout = config.get('JOB_TIMEOUT', 600) if timeout is None else timeout
+    cutoff = datetime.utcnow() - timedelta(seconds=timeout)
+    stale = (Job.status == 'running', Job.started_at < cutoff)
+
+    failed = db.session.execute(
+        update(Job).where(*stale, Job.attempts >= config.get('JOB_MAX_ATTEMPTS', 3))
+        .values(status='failed', error='Timed out', finished_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    requeued = db.session.execute(
+        update(Job).where(*stale).values(status='queued')
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.session.commit()
+    return requeued, failed
+
+
+@retry_on_locked
+def _record_failure(job_id, error):
+    """Requeue a failed attempt, or mark the job failed once it is out of attempts"""
+    job = db.session.get(Job, job_id)
+    if job.attempts < current_app.config.get('JOB_MAX_ATTEMPTS', 3):
+        job.status = 'queued'
+    else:
+        job.status = 'failed'
+        job.finished_at = datetime.utcnow()
+    job.error = str(error)[:2000]
+    db.session.commit()
+
+
+@retry_on_locked
+def _record_success(job_id, results):
+    job = db.session.get(Job, job_id)
+    finish = JOB_HANDLERS[job.kind][1]
+    finish(job, results)
+    job.status = 'done'
+    job.error = None
+    job.finished_at = datetime.utcnow()
+    db.session.commit()
+
+
+def _complete(job_id, results, error):
+    if error is not None:
+        logger.warning('Job %s failed: %s', job_id, error)
+        _record_failure(job_id, error)
+        return
+    try:
+        _record_success(job_id, results)
+    except Exception as e:
+        logger.exception('Job %s could not be finished', job_id)
+        _record_failure(job_id, e)
+
+
+class _InFlight:
+    """Results of one job's tasks as they come back from the pool"""
+
+    def __init__(self, size):
+        self.results = [None] * size
+        self.pending = size
+        self.error = None
+
+    def task_done(self, index, future):
+        self.pending -= 1
+        try:
+            self.results[index] = future.result()
+        except Exception as e:
+            self.error = self.error or e
+
+
+def run_jobs(workers=None, poll_interval=None, stop_when_idle=False):
+    """
+    Claim and execute jobs until interrupted (or, with stop_when_idle, until
+    the queue is empty). Keeps at most `workers` jobs in flight.
+    Returns the number of jobs processed.
+    """
+    config = current_app.config
+    workers = workers or config.get('JOB_WORKERS') or os.cpu_count() or 1
+    poll_interval = poll_interval or config.get('JOB_POLL_INTERVAL', 1.0)
+    processed = 0
+
+    requeue_stale_jobs()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        running = {}   # future -> (job id, task index)
+        jobs = {}      # job id -> _InFlight
+        while True:
+            # Claim more work only while some pool process would otherwise sit idle
+            while len(running) < workers:
+                job = claim_job()
+                if job is None:
+                    break
+                try:
+                    prepare = JOB_HANDLERS[job.kind][0]
+                    tasks = list(prepare(job))
+                except Exception as e:
+                    logger.exception('Job %s could not be prepared', job.id)
+                    _record_failure(job.id, e)
+                    processed += 1
+                    continue
+                job_id = job.id
+                db.session.remove()
+                if not tasks:
+                    _complete(job_id, [], None)
+                    processed += 1
+                    continue
+                jobs[job_id] = _InFlight(len(tasks))
+                for index, (fn, args) in enumerate(tasks):
+                    running[pool.submit(fn, *args)] = (job_id, index)
+
+            if not running:
+                if stop_when_idle:
+                    return processed
+                time.sleep(poll_interval)
+                continue
+
+            done, _ = wait(running, timeout=poll_interval, return_when=FIRST_COMPLETED)
+            for future in done:
+                job_id, index = running.pop(future)
+                inflight = jobs[job_id]
+                inflight.task_done(index, future)
+                if not inflight.pending:
+                    del jobs[job_id]
+                    _complete(job_id, inflight.results, inflight.error)
+                    processed += 1
+            db.session.remove()
+
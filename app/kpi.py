@@ -0,0 +1,105 @@
+"""
+Dashboard KPI Service
+Computes headline inventory/sales figures with SQL aggregates and keeps them
+in a small in-process cache that is invalidated whenever items, orders or
+purchases are written.
+"""
+import threading
+import time
+
+from flask import current_app
+from sqlalchemy import event, func, select
+
+from app import db
+from app.models import Item, Order, Purchase
+
+# Models whose writes change the dashboard figures
+KPI_MODELS = (Item, Order, Purchase)
+_KPI_TABLES = frozenset(model.__table__ for model in KPI_MODELS)
+
+_cache = {}
+_cache_lock = threading.Lock()
+# Bumped on every invalidation so a compute that raced with it is not cached
+_generation = 0
+
+
+def compute_dashboard_kpis():
+    """
+    Compute dashboard totals in a single round trip using SQL aggregates
+    """
+    row = db.session.query(
+        select(func.count(Item.id)).scalar_subquery(),
+        select(func.coalesce(func.sum(Item.quantity * Item.price), 0)).scalar_subquery(),
+        select(func.count(Order.id)).scalar_subquery(),
+        select(func.count(Purchase.id)).scalar_subquery(),
+    ).one()
+
+    return {
+        'total_items': row[0],
+        'total_stock_value': float(row[1] or 0),
+        'total_orders': row[2],
+        'total_purchases': row[3],
+    }
+
+
+def get_dashboard_kpis():
+    """
+    Return cached dashboard totals, recomputing them when the cache is cold,
+    invalidated, or older than KPI_CACHE_TTL seconds.
+
+    The TTL only bounds staleness across worker processes; writes made in this
+    process invalidate the cache immediately.
+    """
+    ttl = current_app.config.get('KPI_CACHE_TTL', 60)
+    now = time.monotonic()
+
+    with _cache_lock:
+        entry = _cache.get('dashboard')
+        if entry and now - entry[0] < ttl:
+            return dict(entry[1])
+        generation = _generation
+
+    kpis = compute_dashboard_kpis()
+    with _cache_lock:
+        if generation == _generation:
+            _cache['dashboard'] = (now, kpis)
+    return dict(kpis)
+
+
+def invalidate_kpi_cache():
+    """Drop all cached KPI values"""
+    global _generation
+    with _cache_lock:
+        _generation += 1
+        _cache.clear()
+
+
+# ---------------- Cache invalidation via session events ----------------
+@event.listens_for(db.session, 'after_flush')
+def _mark_kpi_writes(session, flush_context):
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, KPI_MODELS):
+            session.info['kpi_dirty'] = True
+            return
+
+
+@event.listens_for(db.session, 'do_orm_execute')
+def _mark_kpi_bulk_writes(orm_execute_state):
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    table = getattr(orm_execute_state.statement, 'table', None)
+    if table is not None and table in _KPI_TABLES:
+        orm_execute_state.session.info['kpi_dirty'] = True
+
+
+@event.listens_for(db.session, 'after_commit')
+def _invalidate_after_commit(session):
+    # Invalidate only once the write is visible to other connections, so a
+    # concurrent recompute cannot re-cache pre-commit values.
+    if session.info.pop('kpi_dirty', False):
+        invalidate_kpi_cache()
+
+
+@event.listens_for(db.session, 'after_soft_rollback')
+def _clear_after_rollback(session, previous_transaction):
+    session.info.pop('kpi_dirty', None)
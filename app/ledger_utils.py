@@ -0,0 +1,175 @@
+"""
+Stock Movement Ledger
+Every stock change appends a signed StockMovement for its (item, warehouse)
+in the same transaction as the change itself; warehouse 0 carries stock that
+is not held in a warehouse batch (sales, purchases, item edits).
+
+StockSnapshot rows periodically fold the ledger into balances (flask
+snapshot-stock), so the stock on hand at any past moment is the nearest
+earlier snapshot plus the movements recorded after it.
+"""
+from datetime import datetime
+
+from sqlalchemy import and_, exists, func, insert, literal, select
+
+from app import db
+from app.models import Item, InventoryBatch, StockMovement, StockSnapshot
+
+NO_WAREHOUSE = 0
+
+
+def record_movements(movements):
+    """
+    Append movements without committing. Each is a dict with item_id,
+    quantity (signed) and reason, plus optional warehouse_id, batch_id
+    and reference.
+    """
+    now = datetime.utcnow()
+    defaults = {'warehouse_id': NO_WAREHOUSE, 'batch_id': None, 'reference': None, 'created_at': now}
+    rows = [dict(defaults, **movement) for movement in movements if movement['quantity']]
+    if rows:
+        db.session.execute(insert(StockMovement), rows)
+
+
+def record_movement(item_id, quantity, reason, warehouse_id=NO_WAREHOUSE, batch_id=None, reference=None):
+    record_movements([{
+        'item_id': item_id, 'quantity': quantity, 'reason': reason,
+        'warehouse_id': warehouse_id, 'batch_id': batch_id, 'reference': reference,
+    }])
+
+
+def record_opening_balances():
+    """
+    Seed the ledger for items that have no movements yet: active batch stock
+    per warehouse, with the rest of Item.quantity on warehouse 0.
+    Returns the number of movements written.
+    """
+    now = datetime.utcnow()
+    unledgered = ~exists().where(StockMovement.item_id == Item.id)
+    columns = ['item_id', 'warehouse_id', 'quantity', 'reason', 'created_at']
+
+    batch_totals = (
+        select(InventoryBatch.item_id, InventoryBatch.warehouse_id, func.sum(InventoryBatch.quantity).label('quantity'))
+        .join(Item, Item.id == InventoryBatch.item_id)
+        .where(InventoryBatch.is_active == True, unledgered)
+        .group_by(InventoryBatch.item_id, InventoryBatch.warehouse_id)
+        .subquery()
+    )
+    in_batches = (
+        select(func.coalesce(func.sum(InventoryBatch.quantity), 0))
+        .where(InventoryBatch.item_id == Item.id, InventoryBatch.is_active == True)
+        .scalar_subquery()
+    )
+
+    # Compute the unassigned remainder before the batch rows make the items "ledgered"
+    remainder = db.session.execute(
+        select(Item.id, Item.quantity - in_batches).where(unledgered)
+    ).all()
+    written = db.session.execute(
+        insert(StockMovement).from_select(columns, select(
+            batch_totals.c.item_id, batch_totals.c.warehouse_id, batch_totals.c.quantity,
+            literal('opening'), literal(now),
+        ).where(batch_totals.c.quantity != 0))
+    ).rowcount
+    rows = [{'item_id': item_id, 'quantity': quantity, 'reason': 'opening'}
+            for item_id, quantity in remainder if quantity]
+    record_movements(rows)
+
+    db.session.commit()
+    return written + len(rows)
+
+
+def _latest_snapshots(at=None, item_id=None, warehouse_id=None):
+    """Subquery of the newest snapshot row per (item, warehouse), optionally as of `at`"""
+    conditions = []
+    if at is not None:
+        conditions.append(StockSnapshot.taken_at <= at)
+    if item_id is not None:
+        conditions.append(StockSnapshot.item_id == item_id)
+    if warehouse_id is not None:
+        conditions.append(StockSnapshot.warehouse_id == warehouse_id)
+
+    newest = (
+        select(func.max(StockSnapshot.id).label('id'))
+        .where(*conditions)
+        .group_by(StockSnapshot.item_id, StockSnapshot.warehouse_id)
+        .subquery()
+    )
+    return (
+        select(StockSnapshot.item_id, StockSnapshot.warehouse_id,
+               StockSnapshot.quantity, StockSnapshot.last_movement_id)
+        .join(newest, StockSnapshot.id == newest.c.id)
+        .subquery()
+    )
+
+
+def _movements_since(snapshots, conditions):
+    """Movement totals per key after each key's snapshot (or all of them, for keys without one)"""
+    return (
+        select(StockMovement.item_id, StockMovement.warehouse_id, func.sum(StockMovement.quantity))
+        .outerjoin(snapshots, and_(snapshots.c.item_id == StockMovement.item_id,
+                                   snapshots.c.warehouse_id == StockMovement.warehouse_id))
+        .where(StockMovement.id > func.coalesce(snapshots.c.last_movement_id, 0), *conditions)
+        .group_by(StockMovement.item_id, StockMovement.warehouse_id)
+    )
+
+
+def take_stock_snapshots(now=None):
+    """
+    Fold movements recorded since each key's last snapshot into a new
+    snapshot row. Keys without new movements keep their previous snapshot.
+    Returns the number of snapshots written.
+    """
+    now = now or datetime.utcnow()
+    last_id = db.session.query(func.max(StockMovement.id)).scalar()
+    if last_id is None:
+        return 0
+
+    snapshots = _latest_snapshots()
+    totals = _movements_since(snapshots, [StockMovement.id <= last_id]).subquery()
+    previous = _latest_snapshots()
+    source = (
+        select(totals.c.item_id, totals.c.warehouse_id, literal(now),
+               func.coalesce(previous.c.quantity, 0) + totals.c[2], literal(last_id))
+        .outerjoin(previous, and_(previous.c.item_id == totals.c.item_id,
+                                  previous.c.warehouse_id == totals.c.warehouse_id))
+    )
+    written = db.session.execute(
+        insert(StockSnapshot).from_select(
+            ['item_id', 'warehouse_id', 'taken_at', 'quantity', 'last_movement_id'], source)
+    ).rowcount
+    db.session.commit()
+    return written
+
+
+def stock_at(at, item_id=None, warehouse_id=None):
+    """
+    Stock on hand at `at` as {(item_id, warehouse_id): quantity}, optionally
+    for one item and/or warehouse. Reads the nearest earlier snapshot per key
+    plus the movements recorded after it.
+    """
+    snapshots = _latest_snapshots(at, item_id, warehouse_id)
+    balances = {
+        (row.item_id, row.warehouse_id): row.quantity
+        for row in db.session.execute(select(snapshots)).all()
+    }
+
+    conditions = [StockMovement.created_at <= at]
+    if item_id is not None:
+        conditions.append(StockMovement.item_id == item_id)
+    if warehouse_id is not None:
+        conditions.append(StockMovement.warehouse_id == warehouse_id)
+    for key_item, key_warehouse, delta in db.session.execute(_movements_since(snapshots, conditions)).all():
+        key = (key_item, key_warehouse)
+        balances[key] = balances.get(key, 0) + delta
+    return balances
+
+
+def warehouse_stock_at(warehouse_id, at):
+    """{item_id: quantity} on hand in one warehouse at `at`"""
+    return {key[0]: qty for key, qty in stock_at(at, warehouse_id=warehouse_id).items() if qty}
+
+
+def item_stock_at(item_id, at):
+    """Total quantity of an item across all warehouses (and unassigned stock) at `at`"""
+    return sum(stock_at(at, item_id=item_id).values())
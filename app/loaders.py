@@ -0,0 +1,30 @@
+"""
+Eager-Loading Profiles
+Named loader options for the list views, so each page loads the relationships
+its template walks in a fixed number of queries instead of one per row.
+
+Usage: Order.query.options(*load_profile('order_list'))
+"""
+from sqlalchemy.orm import joinedload
+
+from app.models import Order, Purchase, InventoryBatch, StockAlert, WarehouseStock
+
+# Built lazily: backref attributes (Order.item, ...) exist only once mappers are configured
+LOADER_PROFILES = {
+    'order_list': lambda: (joinedload(Order.item), joinedload(Order.customer)),
+    'purchase_list': lambda: (joinedload(Purchase.item), joinedload(Purchase.supplier)),
+    'batch_list': lambda: (
+        joinedload(InventoryBatch.item),
+        joinedload(InventoryBatch.warehouse),
+        joinedload(InventoryBatch.supplier),
+    ),
+    'warehouse_stock': lambda: (joinedload(WarehouseStock.item),),
+    'alert_list': lambda: (joinedload(StockAlert.item),),
+    'invoice_orders': lambda: (joinedload(Order.item),),
+    'invoice_run': lambda: (joinedload(Order.item), joinedload(Order.customer)),
+}
+
+
+def load_profile(name):
+    """Loader options for a named profile"""
+    return LOADER_PROFILES[name]()
@@ -0,0 +1,119 @@
+"""
+Typeahead Lookups
+Forms that pick a row (an item, customer, lead, employee...) no longer ship
+the whole table as a <select>. A LookupField (app/forms.py) renders only the
+chosen row; static/js/lookup.js asks /api/lookup/<entity>?q= for the rows
+whose name starts with what the user typed, and the chosen id is checked
+with a single primary-key read when the form is submitted.
+
+Each search column has a NOCASE index (m0005), so a prefix search is an
+index range scan that stops after `limit` rows, whatever the table size.
+"""
+from dataclasses import dataclass
+from typing import Callable
+
+from flask import url_for
+from flask_login import current_user
+from markupsafe import Markup, escape
+from sqlalchemy import select
+
+from app import db
+from app.crm.crm_models import Lead, Quotation
+from app.finance.models import Tax
+from app.hrm.models import Employee
+from app.models import Customer, Item, Supplier
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 50
+
+
+@dataclass(frozen=True)
+class Lookup:
+    model: type
+    search: tuple              # columns matched by prefix, each with a NOCASE index
+    columns: tuple             # columns the label and hint read
+    label: Callable            # row -> text shown in the input
+    hint: Callable = None      # row -> secondary text in the suggestion list
+    roles: tuple = ()          # roles allowed to search; empty for any signed-in user
+
+
+LOOKUPS = {
+    'items': Lookup(Item, (Item.name,), (Item.name, Item.quantity, Item.price),
+                    label=lambda r: r.name,
+                    hint=lambda r: f'Stock {r.quantity} · ₹{r.price or 0:.2f}'),
+    'customers': Lookup(Customer, (Customer.name,), (Customer.name, Customer.phone),
+                        label=lambda r: r.name, hint=lambda r: r.phone),
+    'suppliers': Lookup(Supplier, (Supplier.name,), (Supplier.name, Supplier.phone),
+                        label=lambda r: r.name, hint=lambda r: r.phone, roles=('Admin', 'Manager')),
+    'employees': Lookup(Employee, (Employee.name,), (Employee.name, Employee.department),
+                        label=lambda r: r.name, hint=lambda r: r.department),
+    'leads': Lookup(Lead, (Lead.lead_id, Lead.name), (Lead.lead_id, Lead.name),
+                    label=lambda r: f'{r.lead_id} - {r.name}'),
+    'quotations': Lookup(Quotation, (Quotation.reference,), (Quotation.reference, Quotation.amount),
+                         label=lambda r: f'{r.reference} - {r.amount}'),
+    'taxes': Lookup(Tax, (Tax.name,), (Tax.name, Tax.rate),
+                    label=lambda r: f'{r.name} ({r.rate}%)', roles=('Admin', 'Manager')),
+}
+
+
+def can_lookup(name):
+    spec = LOOKUPS[name]
+    return not spec.roles or getattr(current_user, 'role', None) in spec.roles
+
+
+def like_prefix(text):
+    """LIKE pattern for values starting with text, its wildcards escaped with a backslash"""
+    return text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+
+
+def search(name, prefix='', limit=DEFAULT_LIMIT):
+    """[{id, label, hint}] for up to `limit` rows whose search columns start with prefix (any case)"""
+    spec = LOOKUPS[name]
+    limit = max(1, min(limit, MAX_LIMIT))
+    prefix = (prefix or '').strip()
+    found = {}
+    for column in spec.search:
+        query = select(spec.model.id, *spec.columns)
+        if prefix:
+            query = query.where(column.like(like_prefix(prefix), escape='\\'))
+        query = query.order_by(column.collate('NOCASE'), spec.model.id).limit(limit)
+        for row in db.session.execute(query):
+            found.setdefault(row.id, row)
+        if not prefix:
+            break  # the first column's order is enough to browse
+    rows = sorted(found.values(), key=lambda r: spec.label(r).casefold())[:limit]
+    return [{'id': r.id, 'label': spec.label(r), 'hint': spec.hint(r) if spec.hint else None} for r in rows]
+
+
+def lookup_label(name, row_id):
+    """The label of one row, or None when it does not exist"""
+    spec = LOOKUPS[name]
+    row = db.session.execute(select(spec.model.id, *spec.columns).where(spec.model.id == row_id)).first()
+    return spec.label(row) if row else None
+
+
+def lookup_input(entity, name, value=None, label=None, id=None, placeholder='Type to search...', **attrs):
+    """
+    HTML for a typeahead: a hidden input carrying the id under `name` and a
+    text input for the label. `label` is read from the database when a value
+    is given without one.
+    """
+    id = id or name
+    if not value or value == '0':  # also a missing filter (jinja Undefined)
+        value = None
+    if value is not None and label is None:
+        try:
+            label = lookup_label(entity, int(value))
+        except (TypeError, ValueError):
+            value = None
+    attrs = ' '.join(f'{escape(key.rstrip("_").replace("_", "-"))}="{escape(val)}"' for key, val in attrs.items())
+    return Markup(
+        f'<input type="hidden" id="{escape(id)}" name="{escape(name)}" value="{escape(value or "")}">'
+        f'<input type="text" id="{escape(id)}-lookup" data-lookup="{escape(url_for("api_lookup", entity=entity))}"'
+        f' data-lookup-target="{escape(id)}" value="{escape(label or "")}" placeholder="{escape(placeholder)}"'
+        f' autocomplete="off" {attrs}>'
+    )
+
+
+def init_app(app):
+    app.jinja_env.globals['lookup_input'] = lookup_input
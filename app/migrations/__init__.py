@@ -0,0 +1,96 @@
+"""
+Schema Migrations
+Brings an existing database up to the current models (flask db-upgrade, or
+flask init on deploy), where db.create_all() only adds missing tables.
+
+Each migration is a module mNNNN_<name>.py in this package: its docstring
+describes it and upgrade(conn) applies it. Applied versions are recorded in
+the schema_migrations table; pending ones run in order, each in its own
+transaction that takes the write lock first, so workers starting together
+apply every migration once.
+
+A new database gets the whole current schema from the baseline (m0001), so
+every later migration must be idempotent: use the helpers below, which skip
+objects that already exist.
+"""
+import importlib
+import pkgutil
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, MetaData, String, Table, select
+from sqlalchemy.schema import CreateIndex
+
+from app import db
+from app.db_profile import write_intent
+
+_metadata = MetaData()
+schema_migrations = Table(
+    'schema_migrations', _metadata,
+    Column('version', String(16), primary_key=True),
+    Column('description', String(200)),
+    Column('applied_at', DateTime, nullable=False),
+)
+
+
+def available_migrations():
+    """[(version, module)] for every migration in this package, in order"""
+    found = []
+    for info in pkgutil.iter_modules(__path__):
+        if info.name[:1] == 'm' and info.name[1:5].isdigit():
+            found.append((info.name[1:5], importlib.import_module(f'{__name__}.{info.name}')))
+    return sorted(found, key=lambda entry: entry[0])
+
+
+def _description(module):
+    return (module.__doc__ or '').strip().split('\n', 1)[0]
+
+
+def _applied(conn):
+    schema_migrations.create(conn, checkfirst=True)
+    return {row.version: row.applied_at for row in conn.execute(select(schema_migrations))}
+
+
+def migration_status(engine=None):
+    """Every known migration with its applied_at (None while pending)"""
+    with (engine or db.engine).begin() as conn:
+        applied = _applied(conn)
+    return [{'version': version, 'description': _description(module), 'applied_at': applied.get(version)}
+            for version, module in available_migrations()]
+
+
+def upgrade(engine=None):
+    """Apply pending migrations. Returns the versions applied."""
+    engine = engine or db.engine
+    done = []
+    with write_intent():
+        for version, module in available_migrations():
+            with engine.begin() as conn:
+                # Re-checked under the write lock: another worker may have just applied it
+                if version in _applied(conn):
+                    continue
+                module.upgrade(conn)
+                conn.execute(schema_migrations.insert().values(
+                    version=version, description=_description(module), applied_at=datetime.utcnow()))
+            done.append(version)
+    return done
+
+
+# ---------------- Helpers for migrations ----------------
+def model_index(name):
+    """The Index a model declares under `name`"""
+    for table in db.metadata.tables.values():
+        for index in table.indexes:
+            if index.name == name:
+                return index
+    raise LookupError(f'No model declares an index named {name}')
+
+
+def create_indexes(conn, *names):
+    """Create indexes declared on the models, skipping any that exist"""
+    for name in names:
+        # IF NOT EXISTS rather than checkfirst, which misses expression indexes on SQLite
+        conn.execute(CreateIndex(model_index(name), if_not_exists=True))
+
+
+def drop_index(conn, name):
+    conn.exec_driver_sql(f'DROP INDEX IF EXISTS {name}')
@@ -0,0 +1,16 @@
+"""Baseline: create any missing tables from the models
+
+A new database gets the full current schema here; an existing one keeps its
+tables and gains the ones added since it was created.
+"""
+from app import db
+# Every model module, so the metadata is complete outside a running app
+from app import models  # noqa: F401
+from app.crm import crm_models  # noqa: F401
+from app import enterprise_models  # noqa: F401
+from app.finance import models as finance_models  # noqa: F401
+from app.hrm import models as hrm_models  # noqa: F401
+
+
+def upgrade(conn):
+    db.metadata.create_all(conn)
@@ -0,0 +1,15 @@
+"""Indexes declared on models before migrations existed
+
+Databases created before these were declared only have them if the table
+was created afterwards.
+"""
+from app.migrations import create_indexes
+
+
+def upgrade(conn):
+    create_indexes(
+        conn,
+        'ix_item_quantity', 'ix_item_reorder_gap', 'ix_item_overstock_gap',
+        'ix_batch_active_expiry',
+        'ix_stock_alert_open', 'ix_stock_alert_item_type',
+    )
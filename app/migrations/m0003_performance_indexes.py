@@ -0,0 +1,42 @@
+"""Composite indexes for the list, filter and report access paths
+
+Each matches a query shape the app runs (scripts/bench_indexes.py measures
+the plan and latency of each):
+
+    ix_order_date                   sales list: ORDER BY order_date DESC, id DESC (keyset)
+    ix_order_item_date              ... filtered by item
+    ix_order_customer_date          ... filtered by customer
+    ix_order_invoiced_customer      uninvoiced orders by customer (invoice page and runs)
+    ix_purchase_date                purchase list (keyset)
+    ix_purchase_item_date           ... filtered by item
+    ix_purchase_supplier_date       ... filtered by supplier
+    ix_batch_warehouse_item_active  active batches per warehouse and item (balances,
+                                    transfers); replaces ix_batch_warehouse_item
+    ix_batch_received               batch list (keyset on received_date, id)
+    ix_batch_item_received          ... filtered by item
+    ix_customer_created             customer list (keyset)
+    ix_attendance_date              attendance list, newest first
+    ix_payroll_period_start         payroll list, newest first
+    ix_leave_start_date             leave list, newest first
+    ix_billing_date_amount          bills list; period totals covered by the index
+    ix_expense_date_amount          expenses list; period totals covered by the index
+
+The supplier and CRM lead lists read whole tables, so an index on their sort
+column would not help them.
+"""
+from app.migrations import create_indexes, drop_index
+
+INDEXES = (
+    'ix_order_date', 'ix_order_item_date', 'ix_order_customer_date', 'ix_order_invoiced_customer',
+    'ix_purchase_date', 'ix_purchase_item_date', 'ix_purchase_supplier_date',
+    'ix_batch_warehouse_item_active', 'ix_batch_received', 'ix_batch_item_received',
+    'ix_customer_created',
+    'ix_attendance_date', 'ix_payroll_period_start', 'ix_leave_start_date',
+    'ix_billing_date_amount', 'ix_expense_date_amount',
+)
+
+
+def upgrade(conn):
+    create_indexes(conn, *INDEXES)
+    # Prefix of ix_batch_warehouse_item_active
+    drop_index(conn, 'ix_batch_warehouse_item')
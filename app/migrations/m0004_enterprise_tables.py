@@ -0,0 +1,11 @@
+"""Enterprise tables: company, department, user_department
+
+The signed-in user's department memberships are read from these tables
+(app/auth_cache.py); databases created before they were in use lack them.
+"""
+from app.enterprise_models import Company, Department, UserDepartment
+
+
+def upgrade(conn):
+    for model in (Company, Department, UserDepartment):
+        model.__table__.create(conn, checkfirst=True)
@@ -0,0 +1,25 @@
+"""Case-insensitive name indexes for the typeahead lookups
+
+/api/lookup/<entity>?q= matches `column LIKE 'q%'` (app/lookup_utils.py).
+SQLite turns that into an index range scan, already in result order, only
+when the column has a NOCASE index:
+
+    ix_item_name_nocase             items by name
+    ix_customer_name_nocase         customers by name
+    ix_supplier_name_nocase         suppliers by name
+    ix_employee_name_nocase         employees by name
+    ix_lead_code_nocase             leads by lead id (L0000123)
+    ix_lead_name_nocase             ... and by name
+    ix_quotation_reference_nocase   quotations by reference
+    ix_tax_name_nocase              taxes by name
+"""
+from app.migrations import create_indexes
+
+INDEXES = (
+    'ix_item_name_nocase', 'ix_customer_name_nocase', 'ix_supplier_name_nocase', 'ix_employee_name_nocase',
+    'ix_lead_code_nocase', 'ix_lead_name_nocase', 'ix_quotation_reference_nocase', 'ix_tax_name_nocase',
+)
+
+
+def upgrade(conn):
+    create_indexes(conn, *INDEXES)
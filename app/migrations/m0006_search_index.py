@@ -0,0 +1,13 @@
+"""Full-text search index: search_index (FTS5) and its sync triggers
+
+Global search (app/search_utils.py) reads one FTS5 table covering
+customers, suppliers, items, leads, tickets, notes and employees, kept
+current by triggers on those tables. Existing databases get the table and
+triggers, then the index is filled from the rows already there.
+"""
+from app.search_utils import create_search_schema, rebuild_search_index
+
+
+def upgrade(conn):
+    create_search_schema(conn)
+    rebuild_search_index(conn)
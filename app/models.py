@@ -43,6 +43,12 @@ class Customer(db.Model):
     gst_number = db.Column(db.String(20))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    # Customer list pages newest first (keyset on created_at, id); typeahead by name
+    __table_args__ = (
+        db.Index('ix_customer_created', 'created_at', 'id'),
+        db.Index('ix_customer_name_nocase', name.collate('NOCASE')),
+    )
+
     # Relationship: One customer -> many orders
     orders = db.relationship('Order', backref='customer', cascade="all, delete-orphan", lazy='select')
 
@@ -59,6 +65,9 @@ class Supplier(db.Model):
     gst_number = db.Column(db.String(20))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    # Typeahead by name (app/lookup_utils.py)
+    __table_args__ = (db.Index('ix_supplier_name_nocase', name.collate('NOCASE')),)
+
     # Relationship: One supplier -> many purchases
     purchases = db.relationship('Purchase', backref='supplier', cascade="all, delete-orphan", lazy='select')
 
@@ -95,6 +104,19 @@ class Item(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    # Stock position relative to the thresholds; < 0 means low stock / > 0 means overstock.
+    # Filtering on these (not quantity < reorder_point) lets SQLite use the expression indexes below.
+    reorder_gap = db.column_property(quantity - reorder_point, deferred=True)
+    overstock_gap = db.column_property(quantity - max_stock, deferred=True)
+
+    __table_args__ = (
+        db.Index('ix_item_quantity', 'quantity'),
+        db.Index('ix_item_reorder_gap', quantity - reorder_point),
+        db.Index('ix_item_overstock_gap', quantity - max_stock),
+        # Typeahead by name (app/lookup_utils.py)
+        db.Index('ix_item_name_nocase', name.collate('NOCASE')),
+    )
+
     # Relationships
     orders = db.relationship('Order', backref='item', cascade="all, delete-orphan", lazy='select')
     purchases = db.relationship('Purchase', backref='item', cascade="all, delete-orphan", lazy='select')
@@ -136,6 +158,16 @@ class InventoryBatch(db.Model):
     
     supplier = db.relationship('Supplier', backref='batches')
 
+    # Expiry sweeps and "expiring in N days" range-scan active batches by expiry date;
+    # warehouse balances, transfers and active counts look up (warehouse, item, active);
+    # the batch list pages by received date, overall or for one item
+    __table_args__ = (
+        db.Index('ix_batch_active_expiry', 'is_active', 'expiry_date'),
+        db.Index('ix_batch_warehouse_item_active', 'warehouse_id', 'item_id', 'is_active'),
+        db.Index('ix_batch_received', 'received_date', 'id'),
+        db.Index('ix_batch_item_received', 'item_id', 'received_date', 'id'),
+    )
+
     def is_expired(self):
         """Check if batch has expired"""
         if self.expiry_date:
@@ -157,6 +189,11 @@ class StockAlert(db.Model):
     is_resolved = db.Column(db.Boolean, default=False)
     resolved_at = db.Column(db.DateTime)
 
+    __table_args__ = (
+        db.Index('ix_stock_alert_open', 'is_resolved', 'created_at'),
+        db.Index('ix_stock_alert_item_type', 'item_id', 'alert_type', 'is_resolved'),
+    )
+
     def __repr__(self):
         return f'<StockAlert {self.item.name}: {self.alert_type}>'
 
@@ -169,6 +206,15 @@ class Order(db.Model):
     order_date = db.Column(db.DateTime, default=datetime.utcnow)
     invoiced = db.Column(db.Boolean, default=False)
 
+    # Sales list (keyset on order_date, id), optionally for one item or customer;
+    # invoicing reads uninvoiced orders by customer
+    __table_args__ = (
+        db.Index('ix_order_date', 'order_date', 'id'),
+        db.Index('ix_order_item_date', 'item_id', 'order_date', 'id'),
+        db.Index('ix_order_customer_date', 'customer_id', 'order_date', 'id'),
+        db.Index('ix_order_invoiced_customer', 'invoiced', 'customer_id', 'id'),
+    )
+
     def total_amount(self):
         return float(self.quantity * self.item.price) if self.item else 0.0
 
@@ -183,8 +229,135 @@ class Purchase(db.Model):
     quantity = db.Column(db.Integer, nullable=False)
     purchase_date = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        db.Index('ix_purchase_date', 'purchase_date', 'id'),
+        db.Index('ix_purchase_item_date', 'item_id', 'purchase_date', 'id'),
+        db.Index('ix_purchase_supplier_date', 'supplier_id', 'purchase_date', 'id'),
+    )
+
     def total_amount(self):
         return float(self.quantity * self.item.price) if self.item else 0.0
 
     def __repr__(self):
         return f'<Purchase {self.id} for {self.quantity} of {self.item.name if self.item else "Unknown"}>'
+
+# ----------------- Daily Sales Rollup -----------------
+class SalesDailyRollup(db.Model):
+    """Orders aggregated per day, item and customer (customer_id 0 = walk-in)"""
+    __tablename__ = "sales_daily_rollups"
+    __table_args__ = (db.UniqueConstraint('day', 'item_id', 'customer_id', name='uq_sales_rollup_key'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, nullable=False)
+    item_id = db.Column(db.Integer, nullable=False)
+    customer_id = db.Column(db.Integer, nullable=False, default=0)
+    order_count = db.Column(db.Integer, nullable=False, default=0)
+    quantity = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<SalesDailyRollup {self.day} item={self.item_id} customer={self.customer_id}: {self.quantity}>'
+
+# ----------------- Daily Purchase Rollup -----------------
+class PurchaseDailyRollup(db.Model):
+    """Purchases aggregated per day, item and supplier (supplier_id 0 = unknown)"""
+    __tablename__ = "purchase_daily_rollups"
+    __table_args__ = (db.UniqueConstraint('day', 'item_id', 'supplier_id', name='uq_purchase_rollup_key'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, nullable=False)
+    item_id = db.Column(db.Integer, nullable=False)
+    supplier_id = db.Column(db.Integer, nullable=False, default=0)
+    purchase_count = db.Column(db.Integer, nullable=False, default=0)
+    quantity = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<PurchaseDailyRollup {self.day} item={self.item_id} supplier={self.supplier_id}: {self.quantity}>'
+
+# ----------------- Warehouse Stock Balance -----------------
+class WarehouseStock(db.Model):
+    """
+    Batch stock per (warehouse, item), maintained from batch writes
+    (see balance_utils). Expired quantity is as of the last refresh.
+    """
+    __tablename__ = "warehouse_stock"
+
+    warehouse_id = db.Column(db.Integer, db.ForeignKey('warehouse.id'), primary_key=True)
+    item_id = db.Column(db.Integer, db.ForeignKey('item.id'), primary_key=True)
+    active_quantity = db.Column(db.Integer, nullable=False, default=0)
+    expired_quantity = db.Column(db.Integer, nullable=False, default=0)
+    batch_count = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    item = db.relationship('Item', viewonly=True)
+    warehouse = db.relationship('Warehouse', viewonly=True)
+
+    __table_args__ = (db.Index('ix_warehouse_stock_item', 'item_id', 'warehouse_id'),)
+
+    @property
+    def total_quantity(self):
+        return self.active_quantity + self.expired_quantity
+
+    def __repr__(self):
+        return f'<WarehouseStock wh={self.warehouse_id} item={self.item_id}: {self.active_quantity}+{self.expired_quantity}>'
+
+# ----------------- Stock Movement Ledger -----------------
+class StockMovement(db.Model):
+    """
+    Append-only record of every stock change. warehouse_id 0 = stock not held
+    in a warehouse batch (sales, purchases and manual item adjustments).
+    """
+    __tablename__ = "stock_movements"
+    __table_args__ = (db.Index('ix_stock_movement_key_time', 'item_id', 'warehouse_id', 'created_at'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    item_id = db.Column(db.Integer, nullable=False)
+    warehouse_id = db.Column(db.Integer, nullable=False, default=0)
+    batch_id = db.Column(db.Integer)
+    quantity = db.Column(db.Integer, nullable=False)  # signed delta
+    reason = db.Column(db.String(20), nullable=False)  # 'sale', 'purchase', 'transfer_in', ...
+    reference = db.Column(db.String(50))                # e.g. 'order:12'
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<StockMovement {self.reason} item={self.item_id} wh={self.warehouse_id}: {self.quantity:+d}>'
+
+# ----------------- Stock Balance Snapshot -----------------
+class StockSnapshot(db.Model):
+    """Balance per (item, warehouse) covering all movements up to last_movement_id"""
+    __tablename__ = "stock_snapshots"
+    __table_args__ = (db.Index('ix_stock_snapshot_key_time', 'item_id', 'warehouse_id', 'taken_at'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    item_id = db.Column(db.Integer, nullable=False)
+    warehouse_id = db.Column(db.Integer, nullable=False, default=0)
+    taken_at = db.Column(db.DateTime, nullable=False)
+    quantity = db.Column(db.Integer, nullable=False)
+    last_movement_id = db.Column(db.Integer, nullable=False)
+
+    def __repr__(self):
+        return f'<StockSnapshot {self.taken_at} item={self.item_id} wh={self.warehouse_id}: {self.quantity}>'
+
+# ----------------- Background Job -----------------
+class Job(db.Model):
+    """Durable background job (see job_utils); status: queued -> running -> done / failed"""
+    __tablename__ = "jobs"
+    __table_args__ = (db.Index('ix_job_status', 'status', 'id'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(30), nullable=False)          # e.g. 'invoice_pdf'
+    status = db.Column(db.String(10), nullable=False, default='queued')
+    payload = db.Column(db.JSON, nullable=False, default=dict)
+    result = db.Column(db.String(255))                       # output file path
+    error = db.Column(db.Text)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    created_by = db.Column(db.Integer, db.ForeignKey('user.id'))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+    @property
+    def is_finished(self):
+        return self.status in ('done', 'failed')
+
+    def __repr__(self):
+        return f'<Job {self.id} {self.kind}: {self.status}>'
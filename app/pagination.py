@@ -0,0 +1,144 @@
+"""
+Keyset (Cursor) Pagination
+Pages through large tables by seeking past the last row seen on a
+(sort column, id) key instead of using OFFSET, so the cost of a page does
+not grow with its position in the table.
+"""
+import base64
+import json
+from datetime import datetime, date
+
+from flask import request
+from sqlalchemy import and_, tuple_
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+class KeysetPage:
+    """One page of results plus the cursor for the next page"""
+
+    def __init__(self, items, next_cursor, limit):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.limit = limit
+
+    @property
+    def has_more(self):
+        return self.next_cursor is not None
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {'dt': value.isoformat()}
+    if isinstance(value, date):
+        return {'d': value.isoformat()}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict):
+        if 'dt' in value:
+            return datetime.fromisoformat(value['dt'])
+        if 'd' in value:
+            return date.fromisoformat(value['d'])
+    return value
+
+
+def encode_cursor(sort_value, row_id):
+    raw = json.dumps([_encode_value(sort_value), row_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Decode a cursor into (sort value, id). Raises ValueError if malformed."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return _decode_value(sort_value), int(row_id)
+    except (TypeError, ValueError, json.JSONDecodeError) as e:
+        raise ValueError(f'Invalid cursor: {cursor!r}') from e
+
+
+def keyset_paginate(query, sort_column, id_column, cursor=None, limit=DEFAULT_PAGE_SIZE, descending=True):
+    """
+    Return a KeysetPage of query results ordered by (sort_column, id_column).
+
+    The (sort, id) row-value comparison lets SQLite seek straight to the page
+    start using an index on the same columns. A row-value comparison never
+    matches a NULL sort value, so rows without one are paged as a run of
+    their own by id: after the keyed rows when descending, before them when
+    ascending (where SQLite sorts NULLs). A page that crosses from one run to
+    the other takes a second query.
+    """
+    # Paging on the id alone (sort_column is id_column) seeks on the primary key directly
+    if sort_column is id_column:
+        if cursor:
+            _, row_id = decode_cursor(cursor)
+            query = query.filter(id_column < row_id if descending else id_column > row_id)
+        rows = _ordered(query, [id_column], descending).limit(limit + 1).all()
+        return _page(rows, sort_column, id_column, limit)
+
+    # (filter, order, seek key) per run, in page order
+    keyed = (sort_column.isnot(None), [sort_column, id_column], tuple_(sort_column, id_column))
+    unkeyed = (sort_column.is_(None), [id_column], id_column)
+    if not _nullable(sort_column):
+        runs = [keyed]
+    else:
+        runs = [keyed, unkeyed] if descending else [unkeyed, keyed]
+    if cursor:
+        sort_value, row_id = decode_cursor(cursor)
+        in_keyed = sort_value is not None
+        position = next((n for n, run in enumerate(runs) if (run is keyed) == in_keyed), None)
+        if position is None:
+            raise ValueError(f'Invalid cursor: {cursor!r}')
+        condition, order, key = runs[position]
+        bound = (sort_value, row_id) if in_keyed else row_id
+        seek = key < bound if descending else key > bound
+        # The row-value seek already leaves out NULL sort values
+        runs = [(seek if in_keyed else and_(condition, seek), order, key)] + runs[position + 1:]
+
+    rows = []
+    for condition, order, _ in runs:
+        rows += _ordered(query.filter(condition), order, descending).limit(limit + 1 - len(rows)).all()
+        if len(rows) > limit:
+            break
+    return _page(rows, sort_column, id_column, limit)
+
+
+def _nullable(column):
+    # Computed expressions (hybrids) carry no nullability; treat them as nullable
+    return getattr(getattr(column, 'expression', column), 'nullable', True)
+
+
+def _ordered(query, columns, descending):
+    return query.order_by(*[col.desc() if descending else col.asc() for col in columns])
+
+
+def _page(rows, sort_column, id_column, limit):
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, sort_column.key), getattr(last, id_column.key))
+    return KeysetPage(rows, next_cursor, limit)
+
+
+def page_args():
+    """Read (cursor, limit) from the query string"""
+    cursor = request.args.get('cursor') or None
+    try:
+        limit = int(request.args.get('limit', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        limit = DEFAULT_PAGE_SIZE
+    return cursor, max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def wants_json():
+    return request.args.get('format') == 'json'
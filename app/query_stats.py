@@ -0,0 +1,203 @@
+"""
+Per-request SQL statistics, slow-query log and N+1 query detection
+Times every statement issued while handling a request (or inside
+track_queries()) and:
+  - reports the query count and DB time in a Server-Timing response header
+  - keeps the most recent requests for the admin debug endpoint
+  - logs statements slower than SLOW_QUERY_MS with their EXPLAIN QUERY PLAN
+  - flags statements repeated often enough to suggest a lazy-loaded
+    relationship being walked row by row
+
+Set QUERY_AUDIT = 'warn' (log) or 'raise' (fail the request) to enable
+the N+1 check in development or CI.
+"""
+import logging
+import os
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from flask import g, request, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+SLOWEST_KEPT = 5
+
+slow_query_logger = logging.getLogger('erp.slow_queries')
+
+_active_stats = ContextVar('query_stats', default=None)
+_recent_lock = threading.Lock()
+_recent_requests = deque(maxlen=50)
+_recent_slow_queries = deque(maxlen=50)
+
+
+class NPlusOneError(RuntimeError):
+    """Raised in QUERY_AUDIT='raise' mode when a request repeats a query shape too often"""
+
+
+class QueryStats:
+    """Statements seen during one request or tracking block"""
+
+    def __init__(self, slow_query_ms=None):
+        self.slow_query_ms = slow_query_ms
+        self.count = 0
+        self.total_time = 0.0
+        self.statements = Counter()
+        self.slowest = []  # (seconds, statement), longest first
+
+    def record(self, statement, duration=0.0):
+        self.count += 1
+        self.total_time += duration
+        self.statements[statement] += 1
+        if len(self.slowest) < SLOWEST_KEPT or duration > self.slowest[-1][0]:
+            self.slowest.append((duration, statement))
+            self.slowest.sort(key=lambda entry: entry[0], reverse=True)
+            del self.slowest[SLOWEST_KEPT:]
+
+    def is_slow(self, duration):
+        return self.slow_query_ms is not None and duration * 1000 >= self.slow_query_ms
+
+    def repeated(self, limit):
+        """(statement, times) for query shapes executed more than `limit` times"""
+        return [(stmt, n) for stmt, n in self.statements.most_common() if n > limit]
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'total_ms': round(self.total_time * 1000, 2),
+            'slowest': [{'ms': round(d * 1000, 2), 'statement': s} for d, s in self.slowest],
+        }
+
+
+@contextmanager
+def track_queries(slow_query_ms=None):
+    """Collect QueryStats for the statements executed inside the block"""
+    stats = QueryStats(slow_query_ms)
+    token = _active_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _active_stats.reset(token)
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _start_statement(conn, cursor, statement, parameters, context, executemany):
+    if _active_stats.get() is not None:
+        conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _record_statement(conn, cursor, statement, parameters, context, executemany):
+    stats = _active_stats.get()
+    starts = conn.info.get('query_start')
+    if stats is None or not starts:
+        return
+    duration = time.perf_counter() - starts.pop()
+    # SQLAlchemy binds parameters, so identical text means an identical query shape
+    stats.record(statement, duration)
+    if stats.is_slow(duration) and not executemany:
+        _log_slow_query(conn, statement, parameters, duration)
+
+
+def explain_query_plan(conn, statement, parameters=()):
+    """EXPLAIN QUERY PLAN detail lines for a SELECT on SQLite; empty for anything else"""
+    if conn.dialect.name != 'sqlite' or not statement.lstrip().upper().startswith(('SELECT', 'WITH')):
+        return []
+    # A raw DBAPI cursor keeps the EXPLAIN itself out of the statement events and stats
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        cursor.execute('EXPLAIN QUERY PLAN ' + statement, parameters or ())
+        return [row[-1] for row in cursor.fetchall()]
+    except Exception:
+        return []
+    finally:
+        cursor.close()
+
+
+def _log_slow_query(conn, statement, parameters, duration):
+    plan = explain_query_plan(conn, statement, parameters)
+    entry = {
+        'ms': round(duration * 1000, 2),
+        'statement': statement,
+        'plan': plan,
+        'path': request.path if has_request_context() else None,
+    }
+    with _recent_lock:
+        _recent_slow_queries.append(entry)
+    slow_query_logger.warning('Slow query (%.1f ms) on %s: %s | plan: %s',
+                              entry['ms'], entry['path'], statement, '; '.join(plan) or 'n/a')
+
+
+def check_repeated_queries(stats, limit, mode, logger, label=''):
+    offenders = stats.repeated(limit)
+    if not offenders:
+        return
+    statement, times = offenders[0]
+    message = f'Possible N+1 query{" in " + label if label else ""}: executed {times}x: {statement}'
+    if mode == 'raise':
+        raise NPlusOneError(message)
+    logger.warning(message)
+
+
+def recent_query_stats():
+    """Stats for the most recent requests and slow queries, newest first"""
+    with _recent_lock:
+        return {
+            'requests': list(reversed(_recent_requests)),
+            'slow_queries': list(reversed(_recent_slow_queries)),
+        }
+
+
+def _add_slow_query_log(path):
+    # The logger is process-wide: every app built in this process shares one handler per file
+    path = os.path.abspath(path)
+    if any(getattr(handler, 'baseFilename', None) == path for handler in slow_query_logger.handlers):
+        return
+    handler = logging.FileHandler(path)
+    handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+    slow_query_logger.addHandler(handler)
+
+
+def init_app(app):
+    app.config.setdefault('QUERY_STATS', True)
+    app.config.setdefault('SLOW_QUERY_MS', 100)
+    app.config.setdefault('SLOW_QUERY_LOG', None)
+    app.config.setdefault('QUERY_AUDIT', None)
+    app.config.setdefault('QUERY_AUDIT_REPEAT_LIMIT', 5)
+
+    if app.config['SLOW_QUERY_LOG']:
+        _add_slow_query_log(app.config['SLOW_QUERY_LOG'])
+
+    @app.before_request
+    def _start_query_stats():
+        if not (app.config['QUERY_STATS'] or app.config['QUERY_AUDIT']):
+            return
+        g.query_stats = QueryStats(app.config['SLOW_QUERY_MS'])
+        g.query_stats_token = _active_stats.set(g.query_stats)
+
+    @app.after_request
+    def _report_query_stats(response):
+        stats = g.get('query_stats')
+        if stats is None:
+            return response
+
+        response.headers.add('Server-Timing', f'db;dur={stats.total_time * 1000:.2f};desc="{stats.count} queries"')
+        if request.endpoint != 'debug_queries':
+            with _recent_lock:
+                _recent_requests.append(dict(
+                    stats.to_dict(), method=request.method, path=request.full_path.rstrip('?'),
+                    endpoint=request.endpoint, status=response.status_code,
+                ))
+
+        if app.config['QUERY_AUDIT']:
+            check_repeated_queries(stats, app.config['QUERY_AUDIT_REPEAT_LIMIT'],
+                                   app.config['QUERY_AUDIT'], app.logger, request.endpoint)
+        return response
+
+    @app.teardown_request
+    def _stop_query_stats(exc):
+        token = g.pop('query_stats_token', None)
+        if token is not None:
+            _active_stats.reset(token)
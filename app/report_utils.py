@@ -0,0 +1,227 @@
+"""
+Reporting Utilities
+Maintains the daily sales/purchase rollup tables and answers report queries
+from them instead of scanning raw orders and purchases.
+"""
+from collections import defaultdict
+from datetime import datetime
+
+from sqlalchemy import event, func, inspect, select
+
+from app import db
+from app.models import (
+    Order, Purchase, Item, Customer, Supplier, SalesDailyRollup, PurchaseDailyRollup
+)
+from app.utils import dialect_insert
+
+# Rollup definitions: source model -> (rollup model, date attr, party attr, count column)
+_ROLLUPS = {
+    Order: (SalesDailyRollup, 'order_date', 'customer_id', 'order_count'),
+    Purchase: (PurchaseDailyRollup, 'purchase_date', 'supplier_id', 'purchase_count'),
+}
+
+
+def _day(value):
+    value = value or datetime.utcnow()
+    return value.date() if isinstance(value, datetime) else value
+
+
+def _old_value(obj, attr):
+    """Value of attr as it was before the pending flush"""
+    history = inspect(obj).attrs[attr].history
+    if history.deleted:
+        return history.deleted[0]
+    if history.unchanged:
+        return history.unchanged[0]
+    return getattr(obj, attr)
+
+
+def _rollup_key(obj, date_attr, party_attr, getter=getattr):
+    return (_day(getter(obj, date_attr)), getter(obj, 'item_id'), getter(obj, party_attr) or 0)
+
+
+def _rollup_attrs(spec):
+    return (spec[1], spec[2], 'item_id', 'quantity')
+
+
+def _rollup_fields_changed(obj, spec):
+    state = inspect(obj)
+    return any(state.attrs[attr].history.has_changes() for attr in _rollup_attrs(spec))
+
+
+def _apply_rollup_deltas(connection, rollup_model, party_col, count_col, deltas):
+    """Upsert (count, quantity) deltas into a rollup table"""
+    table = rollup_model.__table__
+    key_cols = ['day', 'item_id', party_col]
+    insert = dialect_insert(connection)
+
+    for key, (count, quantity) in deltas.items():
+        if not count and not quantity:
+            continue
+        values = dict(zip(key_cols, key), **{count_col: count, 'quantity': quantity})
+        stmt = insert(table).values(**values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=key_cols,
+            set_={
+                count_col: table.c[count_col] + stmt.excluded[count_col],
+                'quantity': table.c.quantity + stmt.excluded.quantity,
+            },
+        )
+        connection.execute(stmt)
+
+        if count < 0:
+            # Drop buckets emptied by cancellations
+            connection.execute(
+                table.delete().where(
+                    table.c.day == key[0],
+                    table.c.item_id == key[1],
+                    table.c[party_col] == key[2],
+                    table.c[count_col] <= 0,
+                )
+            )
+
+
+def _noop_set(target, value, oldvalue, initiator):
+    return value
+
+
+# Load the previous value on assignment so edits to expired instances still
+# produce an accurate "before" history for the rollup deltas.
+for _model, _spec in _ROLLUPS.items():
+    for _attr in _rollup_attrs(_spec):
+        event.listen(getattr(_model, _attr), 'set', _noop_set, retval=True, active_history=True)
+
+
+@event.listens_for(db.session, 'before_flush')
+def _load_deleted_rollup_rows(session, flush_context, instances):
+    # Rows are gone by after_flush, so read the values of deleted records now
+    for obj in session.deleted:
+        spec = _ROLLUPS.get(type(obj))
+        if spec:
+            for attr in _rollup_attrs(spec):
+                getattr(obj, attr)
+
+
+@event.listens_for(db.session, 'after_flush')
+def _maintain_rollups(session, flush_context):
+    """
+    Keep rollups in step with order/purchase inserts, edits and deletes
+    (including cascade deletes from items and customers) in the same transaction.
+    """
+    deltas = defaultdict(lambda: defaultdict(lambda: [0, 0]))
+
+    def add(model, key, count, quantity):
+        bucket = deltas[model][key]
+        bucket[0] += count
+        bucket[1] += quantity
+
+    for obj in session.new:
+        spec = _ROLLUPS.get(type(obj))
+        if spec:
+            add(type(obj), _rollup_key(obj, spec[1], spec[2]), 1, obj.quantity or 0)
+
+    for obj in session.deleted:
+        spec = _ROLLUPS.get(type(obj))
+        if spec:
+            add(type(obj), _rollup_key(obj, spec[1], spec[2], _old_value), -1, -(_old_value(obj, 'quantity') or 0))
+
+    for obj in session.dirty:
+        spec = _ROLLUPS.get(type(obj))
+        if spec and _rollup_fields_changed(obj, spec):
+            add(type(obj), _rollup_key(obj, spec[1], spec[2], _old_value), -1, -(_old_value(obj, 'quantity') or 0))
+            add(type(obj), _rollup_key(obj, spec[1], spec[2]), 1, obj.quantity or 0)
+
+    if not deltas:
+        return
+
+    connection = session.connection()
+    for model, model_deltas in deltas.items():
+        rollup_model, _, party_col, count_col = _ROLLUPS[model]
+        _apply_rollup_deltas(connection, rollup_model, party_col, count_col, model_deltas)
+
+
+def rebuild_rollups():
+    """
+    Rebuild both rollup tables from order/purchase history.
+    Returns the number of rollup rows written per table.
+    """
+    result = {}
+    for model, (rollup_model, date_attr, party_attr, count_col) in _ROLLUPS.items():
+        date_col = getattr(model, date_attr)
+        party = func.coalesce(getattr(model, party_attr), 0)
+        day = func.date(date_col)
+        source = (
+            select(day, model.item_id, party, func.count(model.id), func.sum(model.quantity))
+            .where(date_col.isnot(None))
+            .group_by(day, model.item_id, party)
+        )
+        table = rollup_model.__table__
+        db.session.execute(table.delete())
+        db.session.execute(
+            table.insert().from_select(['day', 'item_id', party_attr, count_col, 'quantity'], source)
+        )
+        result[table.name] = db.session.query(func.count(rollup_model.id)).scalar()
+
+    db.session.commit()
+    return result
+
+
+# ---------------- Report queries ----------------
+def _in_range(query, rollup_model, start=None, end=None):
+    if start:
+        query = query.filter(rollup_model.day >= start)
+    if end:
+        query = query.filter(rollup_model.day <= end)
+    return query
+
+
+def sales_summary(start=None, end=None):
+    """Order count and value (at current item prices) for a date range"""
+    query = db.session.query(
+        func.coalesce(func.sum(SalesDailyRollup.order_count), 0),
+        func.coalesce(func.sum(SalesDailyRollup.quantity * Item.price), 0),
+    ).join(Item, Item.id == SalesDailyRollup.item_id)
+    count, total = _in_range(query, SalesDailyRollup, start, end).one()
+    return {'count': count, 'total': float(total)}
+
+
+def purchases_summary(start=None, end=None):
+    """Purchase count and value (at current item prices) for a date range"""
+    query = db.session.query(
+        func.coalesce(func.sum(PurchaseDailyRollup.purchase_count), 0),
+        func.coalesce(func.sum(PurchaseDailyRollup.quantity * Item.price), 0),
+    ).join(Item, Item.id == PurchaseDailyRollup.item_id)
+    count, total = _in_range(query, PurchaseDailyRollup, start, end).one()
+    return {'count': count, 'total': float(total)}
+
+
+def top_selling_items(start=None, end=None, limit=10):
+    amount = func.sum(SalesDailyRollup.quantity * Item.price)
+    query = db.session.query(
+        Item.id, Item.name, func.sum(SalesDailyRollup.quantity), amount
+    ).select_from(SalesDailyRollup).join(Item, Item.id == SalesDailyRollup.item_id)
+    query = _in_range(query, SalesDailyRollup, start, end)
+    rows = query.group_by(Item.id, Item.name).order_by(amount.desc()).limit(limit).all()
+    return [{'id': r[0], 'name': r[1], 'quantity': r[2], 'total': float(r[3] or 0)} for r in rows]
+
+
+def top_customers(start=None, end=None, limit=10):
+    amount = func.sum(SalesDailyRollup.quantity * Item.price)
+    query = db.session.query(
+        SalesDailyRollup.customer_id, Customer.name, func.sum(SalesDailyRollup.order_count), amount
+    ).join(Item, Item.id == SalesDailyRollup.item_id
+    ).outerjoin(Customer, Customer.id == SalesDailyRollup.customer_id)
+    query = _in_range(query, SalesDailyRollup, start, end)
+    rows = query.group_by(SalesDailyRollup.customer_id, Customer.name).order_by(amount.desc()).limit(limit).all()
+    return [{'id': r[0], 'name': r[1] or 'Walk-in', 'orders': r[2], 'total': float(r[3] or 0)} for r in rows]
+
+
+def top_suppliers(start=None, end=None, limit=10):
+    amount = func.sum(PurchaseDailyRollup.quantity * Item.price)
+    query = db.session.query(
+        PurchaseDailyRollup.supplier_id, Supplier.name, func.sum(PurchaseDailyRollup.purchase_count), amount
+    ).join(Item, Item.id == PurchaseDailyRollup.item_id
+    ).outerjoin(Supplier, Supplier.id == PurchaseDailyRollup.supplier_id)
+    query = _in_range(query, PurchaseDailyRollup, start, end)
+    rows = query.group_by(PurchaseDailyRollup.supplier_id, Supplier.name).order_by(amount.desc()).limit(limit).all()
+    return [{'id': r[0], 'name': r[1] or 'Unknown', 'purchases': r[2], 'total': float(r[3] or 0)} for r in rows]
@@ -1,21 +1,70 @@
-from flask import render_template, request, redirect, url_for, flash, send_file
+from flask import (render_template, request, redirect, url_for, flash, send_file, jsonify, abort, stream_with_context,
+                   current_app)
 from flask_login import login_user, logout_user, login_required, current_user
-from app import app, db
-from app.models import User, Item, Order, Purchase, Customer, Supplier, Warehouse, InventoryBatch, StockAlert
+from app import db
+from app.models import User, Item, Order, Purchase, Customer, Supplier, Warehouse, InventoryBatch, StockAlert, WarehouseStock, Job
 from app.inventory_utils import (
     check_and_create_stock_alerts, get_warehouse_stock, transfer_stock,
-    get_low_stock_items, get_overstock_items, get_active_stock_alerts, resolve_stock_alert
+    get_low_stock_items, get_overstock_items, get_active_stock_alerts, resolve_stock_alert,
+    low_stock_query, overstock_query, active_stock_alerts_query,
+    count_low_stock_items, count_overstock_items, count_active_stock_alerts,
+    expiring_batches_query, warehouse_stock_query, stocked_items_query, stock_matrix
 )
+from app.kpi import get_dashboard_kpis
+from app.report_utils import (
+    sales_summary, purchases_summary, top_selling_items, top_customers, top_suppliers
+)
+from app.pagination import KeysetPage, keyset_paginate, page_args, wants_json
+from app.db_routing import read_only
+from app.loaders import load_profile
+from app.transfer_utils import transfer_stock_lines
+from app.job_utils import enqueue
+from app.export_utils import EXPORTS, FORMATS, stream_export
+from app.import_utils import IMPORT_KINDS, import_csv
+from app.invoice_utils import stream_zip  # also registers the invoice job kinds
+from app.ledger_utils import record_movement, stock_at
+from app.stock_utils import (
+    InsufficientStock, place_order, cancel_sales_order, record_purchase,
+    update_item, receive_batch, update_batch, remove_batch, remove_item,
+)
+from app.query_stats import recent_query_stats
+from app.lookup_utils import LOOKUPS, DEFAULT_LIMIT as LOOKUP_LIMIT, can_lookup, like_prefix, search as lookup_search
+from app.search_utils import SOURCES as SEARCH_SOURCES, search as search_records, visible_kinds
 from app.inventory_forms import (
     WarehouseForm, EditWarehouseForm, AdvancedItemForm, EditAdvancedItemForm,
     InventoryBatchForm, EditBatchForm, StockTransferForm
 )
 from datetime import datetime, date
 from decimal import Decimal
-from xhtml2pdf import pisa
 import io
 from functools import wraps
 
+# Low-stock/overstock items and alerts listed inline on the inventory page
+STOCK_STATUS_PREVIEW = 10
+# Recent invoice jobs listed on the invoice page
+INVOICE_JOBS_SHOWN = 10
+
+
+class RouteTable:
+    """Collects the views below; init_app() adds them under their own endpoint names"""
+
+    def __init__(self):
+        self.rules = []
+
+    def route(self, rule, **options):
+        def decorator(view):
+            self.rules.append((rule, options, view))
+            return view
+        return decorator
+
+
+routes = RouteTable()
+
+
+def init_app(app):
+    for rule, options, view in routes.rules:
+        app.add_url_rule(rule, view_func=view, **options)
+
 # ---------------- Role-based access decorator ----------------
 def roles_required(*roles):
     def wrapper(f):
@@ -28,24 +77,50 @@ def roles_required(*roles):
         return decorated_view
     return wrapper
 
+# ---------------- Keyset list helpers ----------------
+def _date_arg(name, end_of_day=False):
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        parsed = datetime.strptime(value, '%Y-%m-%d')
+    except ValueError:
+        return None
+    return parsed.replace(hour=23, minute=59, second=59, microsecond=999999) if end_of_day else parsed
+
+def _list_filters(*names):
+    """Non-empty filter arguments, used to rebuild list URLs"""
+    return {name: request.args[name] for name in names if request.args.get(name)}
+
+def _keyset_page(query, sort_column, id_column, descending=True):
+    cursor, limit = page_args()
+    try:
+        return keyset_paginate(query, sort_column, id_column, cursor=cursor, limit=limit, descending=descending)
+    except ValueError:
+        abort(400)
+
+def _keyset_json(page, rows_template, serialize):
+    """JSON page for API clients and the infinite-scroll tables (rows_html)"""
+    return jsonify(
+        items=[serialize(row) for row in page.items],
+        next_cursor=page.next_cursor,
+        rows_html=render_template(rows_template, page=page),
+    )
+
 # ---------------- Dashboard ----------------
-@app.route('/')
-@app.route('/dashboard')
+@routes.route('/')
+@routes.route('/dashboard')
 @login_required
+@read_only
 def dashboard():
-    total_items = Item.query.count()
-    total_orders = Order.query.count()
-    total_purchases = Purchase.query.count()
-    total_stock_value = sum(item.total_value() for item in Item.query.all())
+    kpis = get_dashboard_kpis()
     # Optional section selector from query string to show modules for a section
     from flask import request
     selected_section = request.args.get('section')
 
     # If requested via AJAX (or partial param), return only the dashboard content fragment.
     is_ajax = request.headers.get('X-Requested-With') == 'XMLHttpRequest' or request.args.get('partial') == '1'
-    context = dict(total_items=total_items, total_orders=total_orders,
-                   total_purchases=total_purchases, total_stock_value=total_stock_value,
-                   selected_section=selected_section)
+    context = dict(kpis, selected_section=selected_section)
 
     if is_ajax:
         return render_template('_dashboard_content.html', **context)
@@ -53,7 +128,7 @@ def dashboard():
     return render_template('dashboard.html', **context)
 
 # ---------------- Login with Role ----------------
-@app.route('/login', methods=['GET', 'POST'])
+@routes.route('/login', methods=['GET', 'POST'])
 def login():
     if current_user.is_authenticated:
         return redirect(url_for('dashboard'))
@@ -84,7 +159,7 @@ def login():
     return render_template('login.html')
 
 # ---------------- Logout ----------------
-@app.route('/logout')
+@routes.route('/logout')
 @login_required
 def logout():
     logout_user()
@@ -92,7 +167,7 @@ def logout():
     return redirect(url_for('login'))
 
 # ---------------- Customers (List / Add) ----------------
-@app.route('/customers', methods=['GET', 'POST'])
+@routes.route('/customers', methods=['GET', 'POST'])
 @login_required
 def customers():
     # GET: show customers list and add form (if role permits)
@@ -118,11 +193,30 @@ def customers():
         flash('Customer added successfully.', 'success')
         return redirect(url_for('customers'))
 
-    customers_list = Customer.query.order_by(Customer.created_at.desc()).all()
-    return render_template('customers.html', customers=customers_list)
+    filters = _list_filters('q')
+    query = Customer.query
+    if filters.get('q'):
+        query = query.filter(Customer.name.like(like_prefix(filters['q']), escape='\\'))
+
+    page = _keyset_page(query, Customer.created_at, Customer.id)
+    if wants_json():
+        return _keyset_json(page, '_customer_rows.html', _customer_json)
+    return render_template('customers.html', customers=page, filters=filters,
+                           json_url=url_for('customers', format='json', **filters))
+
+def _customer_json(customer):
+    return {
+        'id': customer.id,
+        'name': customer.name,
+        'phone': customer.phone,
+        'email': customer.email,
+        'address': customer.address,
+        'gst_number': customer.gst_number,
+        'created_at': customer.created_at.isoformat() if customer.created_at else None,
+    }
 
 # ---------------- Customer: Add (separate page) ----------------
-@app.route('/customers/add', methods=['GET', 'POST'])
+@routes.route('/customers/add', methods=['GET', 'POST'])
 @login_required
 @roles_required('Admin', 'Manager')
 def add_customer():
@@ -146,7 +240,7 @@ def add_customer():
     return render_template('customer_form.html', action='Add', customer=None)
 
 # ---------------- Edit Customer ----------------
-@app.route('/edit_customer/<int:customer_id>', methods=['POST'])
+@routes.route('/edit_customer/<int:customer_id>', methods=['POST'])
 @login_required
 @roles_required('Admin', 'Manager', 'Staff')
 def edit_customer(customer_id):
@@ -167,7 +261,7 @@ def edit_customer(customer_id):
 
 
 # ---------------- Delete Customer ----------------
-@app.route('/delete_customer/<int:customer_id>', methods=['POST'])
+@routes.route('/delete_customer/<int:customer_id>', methods=['POST'])
 @login_required
 @roles_required('Admin', 'Manager', 'Staff')
 def delete_customer(customer_id):
@@ -178,7 +272,7 @@ def delete_customer(customer_id):
     return redirect(url_for('customers'))
 
 # ---------------- Suppliers (List / Add) ----------------
-@app.route('/suppliers', methods=['GET', 'POST'])
+@routes.route('/suppliers', methods=['GET', 'POST'])
 @login_required
 def suppliers():
     # POST: add supplier (only Admin/Manager)
@@ -207,7 +301,7 @@ def suppliers():
     return render_template('suppliers.html', suppliers=suppliers_list)
 
 # ---------------- Supplier: Add (separate page) ----------------
-@app.route('/suppliers/add', methods=['GET', 'POST'])
+@routes.route('/suppliers/add', methods=['GET', 'POST'])
 @login_required
 @roles_required('Admin', 'Manager')
 def add_supplier():
@@ -231,7 +325,7 @@ def add_supplier():
     return render_template('supplier_form.html', action='Add', supplier=None)
 
 # ---------------- Supplier: Edit ----------------
-@app.route('/suppliers/edit/<int:supplier_id>', methods=['GET', 'POST'])
+@routes.route('/suppliers/edit/<int:supplier_id>', methods=['GET', 'POST'])
 @login_required
 @roles_required('Admin', 'Manager')
 def edit_supplier(supplier_id):
@@ -250,7 +344,7 @@ def edit_supplier(supplier_id):
     return render_template('supplier_form.html', action='Edit', supplier=supplier)
 
 # ---------------- Supplier: Delete ----------------
-@app.route('/suppliers/delete/<int:supplier_id>', methods=['POST'])
+@routes.route('/suppliers/delete/<int:supplier_id>', methods=['POST'])
 @login_required
 @roles_required('Admin', 'Manager')
 def delete_supplier(supplier_id):
@@ -266,7 +360,7 @@ def delete_supplier(supplier_id):
     return redirect(url_for('suppliers'))
 
 # ---------------- Inventory ----------------
-@app.route('/inventory', methods=['GET', 'POST'])
+@routes.route('/inventory', methods=['GET', 'POST'])
 @login_required
 @roles_required('Admin', 'Manager')
 def inventory():
@@ -299,6 +393,8 @@ def inventory():
                         max_stock=max_stock_int
                     )
                     db.session.add(item)
+                    db.session.flush()
+                    record_movement(item.id, quantity_int, 'opening')
                     db.session.commit()
                     
                     # Check and create alerts
@@ -310,16 +406,105 @@ def inventory():
         else:
             flash('Please provide item name and quantity.', 'error')
 
-    items = Item.query.all()
-    low_stock_items = get_low_stock_items()
-    overstock_items = get_overstock_items()
-    active_alerts = get_active_stock_alerts()
-    
-    return render_template('inventory.html', items=items, low_stock_items=low_stock_items, 
-                         overstock_items=overstock_items, active_alerts=active_alerts)
+    page = _keyset_page(Item.query, Item.id, Item.id, descending=False)
+    if wants_json():
+        return _keyset_json(page, '_item_rows.html', _item_json)
+
+    kpis = get_dashboard_kpis()
+    return render_template('inventory.html', items=page, json_url=url_for('inventory', format='json'),
+                           total_items=kpis['total_items'], total_stock_value=kpis['total_stock_value'],
+                           **_stock_status_context())
+
+def _stock_status_context():
+    """Counts plus the first few low-stock/overstock items and open alerts"""
+    return dict(
+        low_stock_items=get_low_stock_items(STOCK_STATUS_PREVIEW), low_stock_count=count_low_stock_items(),
+        overstock_items=get_overstock_items(STOCK_STATUS_PREVIEW), overstock_count=count_overstock_items(),
+        active_alerts=get_active_stock_alerts(STOCK_STATUS_PREVIEW), active_alert_count=count_active_stock_alerts(),
+    )
+
+def _item_json(item):
+    return {
+        'id': item.id,
+        'name': item.name,
+        'quantity': item.quantity,
+        'reorder_point': item.reorder_point,
+        'max_stock': item.max_stock,
+        'price': float(item.price or 0),
+    }
+
+# ---------------- Stock Status API ----------------
+@routes.route('/api/stock/low')
+@login_required
+@roles_required('Admin', 'Manager')
+def api_low_stock():
+    """Low-stock items, most severe shortage first, keyset-paginated"""
+    page = _keyset_page(low_stock_query(), Item.reorder_gap, Item.id, descending=False)
+    return _keyset_json(page, '_low_stock_rows.html', _item_json)
+
+@routes.route('/api/stock/overstock')
+@login_required
+@roles_required('Admin', 'Manager')
+def api_overstock():
+    """Overstocked items, largest excess first, keyset-paginated"""
+    page = _keyset_page(overstock_query(), Item.overstock_gap, Item.id)
+    return _keyset_json(page, '_overstock_rows.html', _item_json)
+
+@routes.route('/api/stock/alerts')
+@login_required
+@roles_required('Admin', 'Manager')
+def api_stock_alerts():
+    """Unresolved stock alerts, newest first, keyset-paginated"""
+    page = _keyset_page(active_stock_alerts_query(), StockAlert.created_at, StockAlert.id)
+    return _keyset_json(page, '_stock_alert_rows.html', _alert_json)
+
+def _alert_json(alert):
+    return {
+        'id': alert.id,
+        'item_id': alert.item_id,
+        'item_name': alert.item.name if alert.item else None,
+        'alert_type': alert.alert_type,
+        'message': alert.message,
+        'created_at': alert.created_at.isoformat() if alert.created_at else None,
+    }
+
+# ---------------- Typeahead Lookups ----------------
+@routes.route('/api/lookup/<entity>')
+@login_required
+def api_lookup(entity):
+    """Up to ?limit= rows of `entity` whose name starts with ?q=, for the typeahead widget"""
+    if entity not in LOOKUPS:
+        abort(404)
+    if not can_lookup(entity):
+        abort(403)
+    limit = request.args.get('limit', LOOKUP_LIMIT, type=int)
+    return jsonify(results=lookup_search(entity, request.args.get('q', ''), limit))
+
+# ---------------- Global Search ----------------
+@routes.route('/search')
+@login_required
+@read_only
+def global_search():
+    """Ranked full-text matches for ?q= across the records the user may see (optionally one ?kind=)"""
+    filters = _list_filters('q', 'kind')
+    kinds = visible_kinds()
+    if filters.get('kind'):
+        kinds = [kind for kind in kinds if kind == filters['kind']]
+    cursor, limit = page_args()
+    try:
+        results, next_cursor = search_records(filters.get('q'), kinds, cursor=cursor, limit=limit)
+    except ValueError:
+        abort(400)
+
+    page = KeysetPage(results, next_cursor, limit)
+    if wants_json():
+        return _keyset_json(page, '_search_rows.html', dict)
+    return render_template('search.html', results=page, filters=filters,
+                           kinds=[(kind, SEARCH_SOURCES[kind].label) for kind in visible_kinds()],
+                           json_url=url_for('global_search', format='json', **filters))
 
 # ---------------- Edit Inventory Item ----------------
-@app.route('/edit_item/<int:item_id>', methods=['POST'])
+@routes.route('/edit_item/<int:item_id>', methods=['POST'])
 @login_required
 @roles_required('Admin', 'Manager', 'Staff')
 def edit_item(item_id):
@@ -338,35 +523,38 @@ def edit_item(item_id):
         return redirect(url_for('inventory'))
 
     try:
-        item.name = name
-        item.quantity = int(quantity)
-        item.price = float(price)
-        item.description = description
-        item.reorder_point = int(reorder_point or 10)
-        item.max_stock = int(max_stock or 100)
-        item.updated_at = datetime.utcnow()
-        
-        db.session.commit()
-        
+        new_quantity = int(quantity)
+        fields = dict(name=name, price=float(price), description=description,
+                      reorder_point=int(reorder_point or 10), max_stock=int(max_stock or 100),
+                      updated_at=datetime.utcnow())
+    except ValueError:
+        flash('Invalid quantity, price, or stock values format.', 'error')
+        return redirect(url_for('inventory'))
+
+    try:
+        # The stock level is set as a ledgered delta; locked-database errors are retried
+        item = update_item(item.id, new_quantity, **fields)
+
         # Check and update alerts
         check_and_create_stock_alerts(item.id)
-        
+
         flash(f'Item "{item.name}" updated successfully!', 'success')
-    except ValueError:
-        flash('Invalid quantity, price, or stock values format.', 'error')
+    except Exception as e:
+        db.session.rollback()
+        flash(f'Error updating item: {str(e)}', 'error')
 
     return redirect(url_for('inventory'))
 
 
 # ----- Delete inventory Item -----
-@app.route('/inventory/delete/<int:item_id>', methods=['POST'])
+@routes.route('/inventory/delete/<int:item_id>', methods=['POST'])
 @login_required
 @roles_required('Admin', 'Manager')
 def delete_item(item_id):
-    item = Item.query.get_or_404(item_id)
+    Item.query.get_or_404(item_id)
     try:
-        db.session.delete(item)
-        db.session.commit()
+        # Its remaining stock leaves the ledger along with it
+        remove_item(item_id)
         flash('Item deleted successfully!', 'success')
     except Exception as e:
         db.session.rollback()
@@ -374,13 +562,10 @@ def delete_item(item_id):
     return redirect(url_for('inventory'))
 
 # ---------------- Sales ----------------
-@app.route('/sales', methods=['GET', 'POST'])
+@routes.route('/sales', methods=['GET', 'POST'])
 @login_required
 @roles_required('Admin', 'Manager', 'Staff')
 def sales():
-    items = Item.query.all()
-    customers = Customer.query.order_by(Customer.name).all()
-
     if request.method == 'POST':
         item_id = request.form.get('item_id')
         order_quantity = request.form.get('quantity')
@@ -398,57 +583,81 @@ def sales():
                 flash('Quantity must be greater than zero.', 'error')
                 return redirect(url_for('sales'))
 
-            if quantity_int > item.quantity:
-                flash(f'Not enough stock for {item.name}. Only {item.quantity} left.', 'error')
-                return redirect(url_for('sales'))
-
-            # Create order
-            order = Order(item_id=item.id, quantity=quantity_int)
-
             # Assign customer if selected
+            order_customer_id = None
             if customer_id:
                 try:
                     cust = Customer.query.get(int(customer_id))
                     if cust:
-                        order.customer_id = cust.id
+                        order_customer_id = cust.id
                 except Exception:
                     flash('Invalid customer selected.', 'error')
 
-            db.session.add(order)
-            item.quantity -= quantity_int
-            db.session.commit()
-
+            # Stock check and decrement happen in one conditional UPDATE
+            place_order(item.id, quantity_int, order_customer_id)
             flash(f'Order created successfully for {quantity_int} x {item.name}!', 'success')
 
+        except InsufficientStock as e:
+            flash(f'Not enough stock for {item.name}. Only {e.available} left.', 'error')
+            return redirect(url_for('sales'))
         except Exception as e:
             db.session.rollback()
             flash(f'Error creating order: {str(e)}', 'danger')
 
-    orders = Order.query.order_by(Order.order_date.desc()).all()
-    return render_template('sales.html', items=items, customers=customers, orders=orders)
+    filters = _list_filters('item_id', 'customer_id', 'start', 'end', 'invoiced')
+    query = Order.query.options(*load_profile('order_list'))
+    if request.args.get('item_id', type=int):
+        query = query.filter(Order.item_id == request.args.get('item_id', type=int))
+    if request.args.get('customer_id', type=int):
+        query = query.filter(Order.customer_id == request.args.get('customer_id', type=int))
+    if _date_arg('start'):
+        query = query.filter(Order.order_date >= _date_arg('start'))
+    if _date_arg('end'):
+        query = query.filter(Order.order_date <= _date_arg('end', end_of_day=True))
+    if filters.get('invoiced') in ('0', '1'):
+        query = query.filter(Order.invoiced == (filters['invoiced'] == '1'))
+
+    page = _keyset_page(query, Order.order_date, Order.id)
+    if wants_json():
+        return _keyset_json(page, '_order_rows.html', _order_json)
+    kpis = get_dashboard_kpis()
+    return render_template('sales.html', orders=page, total_orders=kpis['total_orders'],
+                           total_items=kpis['total_items'], filters=filters,
+                           json_url=url_for('sales', format='json', **filters))
+
+def _order_json(order):
+    return {
+        'id': order.id,
+        'item_id': order.item_id,
+        'item_name': order.item.name if order.item else None,
+        'quantity': order.quantity,
+        'total': order.total_amount(),
+        'order_date': order.order_date.isoformat() if order.order_date else None,
+        'customer_id': order.customer_id,
+        'customer_name': order.customer.name if order.customer else None,
+        'invoiced': bool(order.invoiced),
+    }
 
 # ---------------- View Order ----------------
-@app.route('/sales/view/<int:order_id>')
+@routes.route('/sales/view/<int:order_id>')
 @login_required
 @roles_required('Admin', 'Manager', 'Staff')
 def view_order(order_id):
-    order = Order.query.get_or_404(order_id)
+    order = Order.query.options(*load_profile('order_list')).get_or_404(order_id)
     return render_template('view_order.html', order=order)
 
 # ---------------- Cancel Order ----------------
-@app.route('/sales/cancel/<int:order_id>', methods=['POST'])
+@routes.route('/sales/cancel/<int:order_id>', methods=['POST'])
 @login_required
 @roles_required('Admin', 'Manager')
 def cancel_order(order_id):
     order = Order.query.get_or_404(order_id)
-    item = Item.query.get(order.item_id)
 
     try:
-        if item:
-            item.quantity += order.quantity
-        db.session.delete(order)
-        db.session.commit()
-        flash(f'Order #{order.id} cancelled successfully. Stock restored.', 'success')
+        if cancel_sales_order(order.id):
+            flash(f'Order #{order_id} cancelled successfully. Stock restored.', 'success')
+        else:
+            flash(f'Order #{order_id} was already cancelled.', 'error')
     except Exception as e:
         db.session.rollback()
         flash(f'Error cancelling order: {str(e)}', 'danger')
@@ -456,13 +665,10 @@ def cancel_order(order_id):
     return redirect(url_for('sales'))
 
 # ---------------- Purchases ----------------
-@app.route('/purchases', methods=['GET', 'POST'])
+@routes.route('/purchases', methods=['GET', 'POST'])
 @login_required
 @roles_required('Admin', 'Manager')
 def purchases():
-    items = Item.query.all()
-    suppliers = Supplier.query.all()  # To select supplier in purchase form
-
     if request.method == 'POST':
         item_id = request.form.get('item_id')
         purchase_quantity = request.form.get('quantity')
@@ -476,17 +682,14 @@ def purchases():
                 if purchase_quantity_int <= 0:
                     flash('Purchase quantity must be positive.', 'error')
                 else:
-                    purchase = Purchase(item_id=item.id, quantity=purchase_quantity_int)
+                    sid = None
                     if supplier_id:
                         try:
                             sid = int(supplier_id)
-                            purchase.supplier_id = sid
                         except ValueError:
                             pass
 
-                    db.session.add(purchase)
-                    item.quantity += purchase_quantity_int
-                    db.session.commit()
+                    purchase = record_purchase(item.id, purchase_quantity_int, sid)
 
                     total = purchase.total_amount()
                     flash(f'Purchase recorded! Bought {purchase_quantity_int} x {item.name} for ₹{total}. Stock updated to {item.quantity}.', 'success')
@@ -495,37 +698,86 @@ def purchases():
         else:
             flash('Please select an item and enter quantity.', 'error')
 
-    purchases_list = Purchase.query.all()
-    return render_template('purchases.html', items=items, purchases=purchases_list, suppliers=suppliers)
+    filters = _list_filters('item_id', 'supplier_id', 'start', 'end')
+    query = Purchase.query.options(*load_profile('purchase_list'))
+    if request.args.get('item_id', type=int):
+        query = query.filter(Purchase.item_id == request.args.get('item_id', type=int))
+    if request.args.get('supplier_id', type=int):
+        query = query.filter(Purchase.supplier_id == request.args.get('supplier_id', type=int))
+    if _date_arg('start'):
+        query = query.filter(Purchase.purchase_date >= _date_arg('start'))
+    if _date_arg('end'):
+        query = query.filter(Purchase.purchase_date <= _date_arg('end', end_of_day=True))
+
+    page = _keyset_page(query, Purchase.purchase_date, Purchase.id)
+    if wants_json():
+        return _keyset_json(page, '_purchase_rows.html', _purchase_json)
+    kpis = get_dashboard_kpis()
+    return render_template('purchases.html', purchases=page, total_purchases=kpis['total_purchases'],
+                           total_items=kpis['total_items'], filters=filters,
+                           json_url=url_for('purchases', format='json', **filters))
+
+def _purchase_json(purchase):
+    return {
+        'id': purchase.id,
+        'item_id': purchase.item_id,
+        'item_name': purchase.item.name if purchase.item else None,
+        'quantity': purchase.quantity,
+        'total': purchase.total_amount(),
+        'supplier_id': purchase.supplier_id,
+        'supplier_name': purchase.supplier.name if purchase.supplier else None,
+        'purchase_date': purchase.purchase_date.isoformat() if purchase.purchase_date else None,
+    }
 
 # ---------------- Reports ----------------
-@app.route('/reports')
+@routes.route('/reports')
 @login_required
 @roles_required('Admin')
+@read_only
 def reports():
-    sales_total = sum(order.total_amount() for order in Order.query.all())
-    sales_count = Order.query.count()
-    purchases_total = sum(purchase.total_amount() for purchase in Purchase.query.all())
-    purchases_count = Purchase.query.count()
-    stock_value = sum(item.total_value() for item in Item.query.all())
-    low_stock_items = [item for item in Item.query.all() if item.quantity < 5]
-    recent_sales = Order.query.order_by(Order.order_date.desc()).limit(5).all()
-    recent_purchases = Purchase.query.order_by(Purchase.purchase_date.desc()).limit(5).all()
+    # Optional date range (YYYY-MM-DD); totals are read from the daily rollup tables
+    start = end = None
+    try:
+        if request.args.get('start'):
+            start = datetime.strptime(request.args['start'], '%Y-%m-%d').date()
+        if request.args.get('end'):
+            end = datetime.strptime(request.args['end'], '%Y-%m-%d').date()
+    except ValueError:
+        flash('Invalid date format. Use YYYY-MM-DD.', 'error')
+        start = end = None
+
+    sales = sales_summary(start, end)
+    purchases = purchases_summary(start, end)
+    stock_value = get_dashboard_kpis()['total_stock_value']
+    low_stock_items = get_low_stock_items(STOCK_STATUS_PREVIEW)
+    recent_sales = Order.query.options(*load_profile('order_list')).order_by(Order.order_date.desc()).limit(5).all()
+    recent_purchases = Purchase.query.options(*load_profile('purchase_list')).order_by(Purchase.purchase_date.desc()).limit(5).all()
 
     return render_template('reports.html',
-                          sales_total=sales_total, sales_count=sales_count,
-                          purchases_total=purchases_total, purchases_count=purchases_count,
+                          sales_total=sales['total'], sales_count=sales['count'],
+                          purchases_total=purchases['total'], purchases_count=purchases['count'],
                           stock_value=stock_value, low_stock_items=low_stock_items,
-                          recent_sales=recent_sales, recent_purchases=recent_purchases)
+                          low_stock_count=count_low_stock_items(),
+                          recent_sales=recent_sales, recent_purchases=recent_purchases,
+                          top_items=top_selling_items(start, end), top_customers=top_customers(start, end),
+                          top_suppliers=top_suppliers(start, end), start=start, end=end)
+
+# ---------------- Query Debug ----------------
+@routes.route('/admin/debug/queries')
+@login_required
+@roles_required('Admin')
+def debug_queries():
+    """Query count, DB time and slowest statements for recent requests, plus the slow-query log"""
+    return jsonify(recent_query_stats())
 
 #---------------- About Page ----------------
-@app.route('/about')
+@routes.route('/about')
 @login_required  # optional
 def about():
     return render_template('about.html')
 
 # ---------------- Temporary Test User ----------------
-@app.route('/register-test-user')
+@routes.route('/register-test-user')
 def register_test_user():
     if User.query.filter_by(username='testuser').first():
         return 'Test user already exists. Username: testuser, Password: testpassword'
@@ -537,12 +789,10 @@ def register_test_user():
     return 'Test user created! Username: testuser, Password: testpassword. Visit /login now.'
 
 # ---------------- Invoice Module ----------------
-@app.route('/invoice', methods=['GET', 'POST'])
+@routes.route('/invoice', methods=['GET', 'POST'])
 @login_required
 @roles_required('Admin', 'Manager')
 def invoice():
-    pending_orders = Order.query.filter_by(invoiced=False).all()
-
     if request.method == "POST":
         po_number = request.form.get("po_number")
         po_date = request.form.get("po_date")
@@ -557,49 +807,150 @@ def invoice():
             flash('Please select at least one order to invoice.', 'error')
             return redirect(url_for('invoice'))
 
-        orders = Order.query.filter(Order.id.in_(selected_order_ids)).all()
-
-        items = []
-        total = 0
-        for order in orders:
-            item_total = order.total_amount()
-            items.append({
-                "name": order.item.name,
-                "qty": order.quantity,
-                "price": order.item.price,
-                "total": item_total
-            })
-            total += item_total
-            order.invoiced = True
+        # Orders invoiced since the form was loaded are left out
+        order_ids = [order_id for (order_id,) in db.session.query(Order.id).filter(
+            Order.id.in_(selected_order_ids), Order.invoiced == False)]
+        if not order_ids:
+            flash('The selected orders have already been invoiced.', 'error')
+            return redirect(url_for('invoice'))
 
-        db.session.commit()
+        job = enqueue('invoice_pdf', {
+            'po_number': po_number,
+            'po_date': po_date,
+            'company_name': company_name,
+            'order_ids': order_ids,
+        }, created_by=current_user.id)
+
+        if wants_json():
+            return jsonify(job_id=job.id, status_url=url_for('job_status', job_id=job.id)), 202
+        flash(f'Invoice {po_number} queued (job #{job.id}); it will be ready to download below shortly.', 'success')
+        return redirect(url_for('invoice'))
+
+    invoice_jobs = (Job.query.filter(Job.kind.in_(('invoice_pdf', 'invoice_run')))
+                    .order_by(Job.id.desc()).limit(INVOICE_JOBS_SHOWN).all())
+    run_orders, run_customers = db.session.query(
+        db.func.count(Order.id), db.func.count(db.func.distinct(db.func.coalesce(Order.customer_id, 0)))
+    ).filter(Order.invoiced == False).one()
+    # Oldest first, one page at a time; run_orders is the total pending
+    pending_orders = _keyset_page(
+        Order.query.options(*load_profile('invoice_orders')).filter(Order.invoiced == False),
+        Order.id, Order.id, descending=False)
+    return render_template('invoice_form.html', pending_orders=pending_orders, current_date=date.today(),
+                           invoice_jobs=invoice_jobs, run_orders=run_orders, run_customers=run_customers)
+
+@routes.route('/invoice/run', methods=['POST'])
+@login_required
+@roles_required('Admin', 'Manager')
+def invoice_run():
+    """Queue one invoice per customer for every uninvoiced order, downloaded as a ZIP"""
+    reference = request.form.get('reference')
+    po_date = request.form.get('po_date')
+    company_name = request.form.get('company_name')
+    if not reference or not po_date or not company_name:
+        flash('Please fill in all fields.', 'error')
+        return redirect(url_for('invoice'))
+
+    cutoff = db.session.query(db.func.max(Order.id)).filter(Order.invoiced == False).scalar()
+    if cutoff is None:
+        flash('There are no uninvoiced orders.', 'info')
+        return redirect(url_for('invoice'))
+
+    job = enqueue('invoice_run', {
+        'reference': reference,
+        'po_date': po_date,
+        'company_name': company_name,
+        'cutoff_order_id': cutoff,
+    }, created_by=current_user.id)
+
+    if wants_json():
+        return jsonify(job_id=job.id, status_url=url_for('job_status', job_id=job.id)), 202
+    flash(f'Invoice run {reference} queued (job #{job.id}).', 'success')
+    return redirect(url_for('invoice'))
+
+# ---------------- Bulk CSV Import ----------------
+@routes.route('/import', methods=['GET', 'POST'])
+@login_required
+@roles_required('Admin', 'Manager')
+def bulk_import():
+    """Upload a CSV of items, customers, suppliers or batches (streamed, see import_utils)"""
+    report = None
+    if request.method == 'POST':
+        upload = request.files.get('file')
+        kind = request.form.get('kind')
+        if not upload or not upload.filename:
+            message = 'Please choose a CSV file.'
+        else:
+            try:
+                stream = io.TextIOWrapper(upload.stream, encoding='utf-8-sig', newline='')
+                report = import_csv(kind, stream)
+                message = None
+            except (ValueError, UnicodeDecodeError) as e:
+                message = f'Import failed: {e}'
+
+        if wants_json():
+            return (jsonify(report), 200) if report else (jsonify(success=False, message=message), 400)
+        if message:
+            flash(message, 'error')
+        else:
+            flash(f"{report['imported']} of {report['rows']} {kind} imported.",
+                  'success' if not report['failed'] else 'warning')
 
-        rendered = render_template(
-            'invoice.html',
-            po_number=po_number,
-            po_date=po_date,
-            company_name=company_name,
-            items=items,
-            total=total
-        )
-
-        pdf = io.BytesIO()
-        pisa_status = pisa.CreatePDF(io.BytesIO(rendered.encode('utf-8')), dest=pdf)
-        pdf.seek(0)
-
-        if pisa_status.err:
-            flash("Error generating PDF. Please check invoice HTML.", "error")
-            return redirect(url_for('invoice'))
+    return render_template('import.html', kinds=IMPORT_KINDS, report=report)
 
-        return send_file(pdf, download_name=f"Invoice_{po_number}.pdf", as_attachment=True)
+# ---------------- Streaming Exports ----------------
+@routes.route('/export/<name>.<fmt>')
+@login_required
+@roles_required('Admin', 'Manager')
+def export(name, fmt):
+    """Download orders, purchases, expenses, billing or payroll as CSV/XLSX, optionally ?start=&end= (YYYY-MM-DD)"""
+    if name not in EXPORTS or fmt not in FORMATS:
+        abort(404)
+    start, end = _date_arg('start'), _date_arg('end')
+    stream = stream_export(name, fmt, start.date() if start else None, end.date() if end else None)
+    period = '_'.join(request.args[arg] for arg in ('start', 'end') if request.args.get(arg))
+    filename = f"{name}{'_' + period if period else ''}.{fmt}"
+    return current_app.response_class(stream_with_context(stream), mimetype=FORMATS[fmt],
+                                      headers={'Content-Disposition': f'attachment; filename="{filename}"'})
+
+# ---------------- Background Jobs ----------------
+@routes.route('/jobs/<int:job_id>')
+@login_required
+@roles_required('Admin', 'Manager')
+def job_status(job_id):
+    job = Job.query.get_or_404(job_id)
+    return jsonify(_job_json(job))
 
-    return render_template('invoice_form.html', pending_orders=pending_orders, current_date=date.today())
+@routes.route('/jobs/<int:job_id>/download')
+@login_required
+@roles_required('Admin', 'Manager')
+def job_download(job_id):
+    job = Job.query.get_or_404(job_id)
+    if job.status != 'done' or not job.result:
+        return jsonify(_job_json(job)), 409
+    if job.kind == 'invoice_run':
+        name = f"Invoices_{job.payload.get('reference', job.id)}.zip"
+        return current_app.response_class(stream_zip(job.result), mimetype='application/zip',
+                                          headers={'Content-Disposition': f'attachment; filename="{name}"'})
+    name = f"Invoice_{job.payload.get('po_number', job.id)}.pdf"
+    return send_file(job.result, download_name=name, as_attachment=True)
+
+def _job_json(job):
+    return {
+        'id': job.id,
+        'kind': job.kind,
+        'status': job.status,
+        'attempts': job.attempts,
+        'error': job.error,
+        'created_at': job.created_at.isoformat() if job.created_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+        'download_url': url_for('job_download', job_id=job.id) if job.status == 'done' else None,
+    }
 
 
 # ==================== ADVANCED INVENTORY MANAGEMENT ROUTES ====================
 
 # --------- Warehouse Management ---------
-@app.route('/warehouses', methods=['GET', 'POST'])
+@routes.route('/warehouses', methods=['GET', 'POST'])
 @login_required
 @roles_required('Admin', 'Manager')
 def warehouses():
@@ -626,7 +977,7 @@ def warehouses():
     warehouses_list = Warehouse.query.all()
     return render_template('warehouses.html', form=form, warehouses=warehouses_list)
 
-@app.route('/warehouse/<int:warehouse_id>/edit', methods=['GET', 'POST'])
+@routes.route('/warehouse/<int:warehouse_id>/edit', methods=['GET', 'POST'])
 @login_required
 @roles_required('Admin', 'Manager')
 def edit_warehouse(warehouse_id):
@@ -656,7 +1007,7 @@ def edit_warehouse(warehouse_id):
     
     return render_template('edit_warehouse.html', form=form, warehouse=warehouse)
 
-@app.route('/warehouse/<int:warehouse_id>/delete', methods=['POST'])
+@routes.route('/warehouse/<int:warehouse_id>/delete', methods=['POST'])
 @login_required
 @roles_required('Admin')
 def delete_warehouse(warehouse_id):
@@ -679,86 +1030,138 @@ def delete_warehouse(warehouse_id):
     
     return redirect(url_for('warehouses'))
 
-@app.route('/warehouse/<int:warehouse_id>/stock', methods=['GET'])
+@routes.route('/warehouse/<int:warehouse_id>/stock', methods=['GET'])
 @login_required
 @roles_required('Admin', 'Manager', 'Staff')
+@read_only
 def warehouse_stock(warehouse_id):
-    """View stock in a specific warehouse"""
+    """View stock in a specific warehouse (from the maintained warehouse_stock balances)"""
     warehouse = Warehouse.query.get_or_404(warehouse_id)
-    batches = InventoryBatch.query.filter_by(warehouse_id=warehouse_id).all()
-    
-    # Group by item
-    items_stock = {}
-    for batch in batches:
-        if batch.item_id not in items_stock:
-            items_stock[batch.item_id] = {
-                'item': batch.item,
-                'active_qty': 0,
-                'expired_qty': 0,
-                'batches': []
-            }
-        
-        if batch.is_expired():
-            items_stock[batch.item_id]['expired_qty'] += batch.quantity
-        else:
-            items_stock[batch.item_id]['active_qty'] += batch.quantity
-        
-        items_stock[batch.item_id]['batches'].append(batch)
-    
-    return render_template('warehouse_stock.html', warehouse=warehouse, items_stock=items_stock)
+    page = _keyset_page(warehouse_stock_query(warehouse_id), WarehouseStock.item_id, WarehouseStock.item_id,
+                        descending=False)
+    if wants_json():
+        return _keyset_json(page, '_warehouse_stock_rows.html', _warehouse_stock_json)
+
+    totals = get_warehouse_stock(warehouse_id)
+    return render_template('warehouse_stock.html', warehouse=warehouse, items_stock=page, totals=totals,
+                           json_url=url_for('warehouse_stock', warehouse_id=warehouse_id, format='json'))
+
+def _warehouse_stock_json(row):
+    return {
+        'item_id': row.item_id,
+        'item_name': row.item.name if row.item else None,
+        'active_qty': row.active_quantity,
+        'expired_qty': row.expired_quantity,
+        'batch_count': row.batch_count,
+    }
+
+@routes.route('/api/stock/matrix')
+@login_required
+@roles_required('Admin', 'Manager')
+def api_stock_matrix():
+    """
+    Item x warehouse stock matrix, items keyset-paginated by id:
+    {"warehouses": [{id, name}], "items": [{id, name, stock: {warehouse_id: active}, expired: {...}}]}
+    """
+    page = _keyset_page(stocked_items_query(), Item.id, Item.id, descending=False)
+    matrix = stock_matrix([item.id for item in page])
+    warehouses = Warehouse.query.order_by(Warehouse.id).all()
+
+    items = []
+    for item in page:
+        cells = matrix[item.id]
+        items.append({
+            'id': item.id,
+            'name': item.name,
+            'stock': {str(wh): active for wh, (active, _) in cells.items()},
+            'expired': {str(wh): expired for wh, (_, expired) in cells.items() if expired},
+            'total': sum(active for active, _ in cells.values()),
+        })
+    return jsonify(warehouses=[{'id': w.id, 'name': w.name} for w in warehouses],
+                   items=items, next_cursor=page.next_cursor)
 
 # --------- Inventory Batch Management ---------
-@app.route('/batches', methods=['GET', 'POST'])
+@routes.route('/batches', methods=['GET', 'POST'])
 @login_required
 @roles_required('Admin', 'Manager')
 def batches():
     """List and add inventory batches"""
     form = InventoryBatchForm()
-    form.item_id.choices = [(item.id, item.name) for item in Item.query.all()]
     form.warehouse_id.choices = [(w.id, w.name) for w in Warehouse.query.filter_by(is_active=True).all()]
-    form.supplier_id.choices = [(0, 'None')] + [(s.id, s.name) for s in Supplier.query.all()]
     
     if request.method == 'POST' and form.validate_on_submit():
+        expiry_date = None
+        if form.expiry_date.data:
+            try:
+                expiry_date = datetime.strptime(form.expiry_date.data, '%Y-%m-%d')
+            except ValueError:
+                flash('Invalid expiry date format. Use YYYY-MM-DD.', 'error')
+                return render_template('batches.html', form=form)
+
         try:
-            batch = InventoryBatch(
+            # Batch row, item stock and ledger in one retried transaction
+            batch = receive_batch(
                 item_id=form.item_id.data,
                 warehouse_id=form.warehouse_id.data,
                 batch_number=form.batch_number.data,
                 serial_number=form.serial_number.data or None,
                 quantity=form.quantity.data,
-                supplier_id=form.supplier_id.data if form.supplier_id.data != 0 else None,
-                notes=form.notes.data or None
+                supplier_id=form.supplier_id.data,
+                notes=form.notes.data or None,
+                expiry_date=expiry_date,
             )
-            
-            if form.expiry_date.data:
-                try:
-                    batch.expiry_date = datetime.strptime(form.expiry_date.data, '%Y-%m-%d')
-                except ValueError:
-                    flash('Invalid expiry date format. Use YYYY-MM-DD.', 'error')
-                    form.supplier_id.choices = [(0, 'None')] + [(s.id, s.name) for s in Supplier.query.all()]
-                    return render_template('batches.html', form=form)
-            
-            db.session.add(batch)
-            
-            # Update item quantity
-            item = Item.query.get(form.item_id.data)
-            item.quantity += form.quantity.data
-            
-            db.session.commit()
-            
+
             # Check and create alerts
-            check_and_create_stock_alerts(item.id)
-            
+            check_and_create_stock_alerts(batch.item_id)
+
             flash(f'Batch "{batch.batch_number}" added successfully! Item stock updated.', 'success')
             return redirect(url_for('batches'))
         except Exception as e:
             db.session.rollback()
             flash(f'Error adding batch: {str(e)}', 'error')
-    
-    batches_list = InventoryBatch.query.order_by(InventoryBatch.received_date.desc()).all()
-    return render_template('batches.html', form=form, batches=batches_list)
 
-@app.route('/batch/<int:batch_id>/edit', methods=['GET', 'POST'])
+    filters = _list_filters('item_id', 'warehouse_id', 'status')
+    query = InventoryBatch.query.options(*load_profile('batch_list'))
+    if request.args.get('item_id', type=int):
+        query = query.filter(InventoryBatch.item_id == request.args.get('item_id', type=int))
+    if request.args.get('warehouse_id', type=int):
+        query = query.filter(InventoryBatch.warehouse_id == request.args.get('warehouse_id', type=int))
+    if filters.get('status') in ('active', 'inactive'):
+        query = query.filter(InventoryBatch.is_active == (filters['status'] == 'active'))
+
+    page = _keyset_page(query, InventoryBatch.received_date, InventoryBatch.id)
+    if wants_json():
+        return _keyset_json(page, '_batch_rows.html', _batch_json)
+    return render_template('batches.html', form=form, batches=page, filters=filters,
+                           json_url=url_for('batches', format='json', **filters))
+
+@routes.route('/api/batches/expiring')
+@login_required
+@roles_required('Admin', 'Manager')
+def api_expiring_batches():
+    """Active batches expiring in the next ?days= days (default EXPIRY_WARNING_DAYS), soonest first"""
+    days = request.args.get('days', current_app.config['EXPIRY_WARNING_DAYS'], type=int)
+    query = expiring_batches_query(days, warehouse_id=request.args.get('warehouse_id', type=int))
+    page = _keyset_page(query, InventoryBatch.expiry_date, InventoryBatch.id, descending=False)
+    return _keyset_json(page, '_batch_rows.html', _batch_json)
+
+def _batch_json(batch):
+    return {
+        'id': batch.id,
+        'item_id': batch.item_id,
+        'item_name': batch.item.name if batch.item else None,
+        'warehouse_id': batch.warehouse_id,
+        'warehouse_name': batch.warehouse.name if batch.warehouse else None,
+        'batch_number': batch.batch_number,
+        'serial_number': batch.serial_number,
+        'quantity': batch.quantity,
+        'received_date': batch.received_date.isoformat() if batch.received_date else None,
+        'expiry_date': batch.expiry_date.isoformat() if batch.expiry_date else None,
+        'is_active': bool(batch.is_active),
+        'is_expired': batch.is_expired(),
+    }
+
+@routes.route('/batch/<int:batch_id>/edit', methods=['GET', 'POST'])
 @login_required
 @roles_required('Admin', 'Manager')
 def edit_batch(batch_id):
@@ -768,36 +1171,24 @@ def edit_batch(batch_id):
     if request.method == 'POST':
         form = EditBatchForm()
         if form.validate_on_submit():
+            fields = dict(batch_number=form.batch_number.data, serial_number=form.serial_number.data or None,
+                          notes=form.notes.data or None)
+            if form.expiry_date.data:
+                try:
+                    fields['expiry_date'] = datetime.strptime(form.expiry_date.data, '%Y-%m-%d')
+                except ValueError:
+                    flash('Invalid expiry date format. Use YYYY-MM-DD.', 'error')
+                    return redirect(url_for('edit_batch', batch_id=batch_id))
+
             try:
-                # Calculate quantity difference
-                old_qty = batch.quantity
-                new_qty = form.quantity.data
-                qty_diff = new_qty - old_qty
-                
-                batch.batch_number = form.batch_number.data
-                batch.serial_number = form.serial_number.data or None
-                batch.quantity = new_qty
-                batch.notes = form.notes.data or None
-                
-                if form.expiry_date.data:
-                    try:
-                        batch.expiry_date = datetime.strptime(form.expiry_date.data, '%Y-%m-%d')
-                    except ValueError:
-                        flash('Invalid expiry date format. Use YYYY-MM-DD.', 'error')
-                        return redirect(url_for('edit_batch', batch_id=batch_id))
-                
-                # Update item quantity
-                batch.item.quantity += qty_diff
-                
-                db.session.commit()
-                
+                # Item stock moves by the quantity difference, in one retried transaction
+                batch = update_batch(batch_id, form.quantity.data, **fields)
+
                 # Check and update alerts
                 check_and_create_stock_alerts(batch.item_id)
-                
+
                 flash(f'Batch "{batch.batch_number}" updated successfully!', 'success')
                 return redirect(url_for('batches'))
-            except ValueError as e:
-                flash(f'Invalid input: {str(e)}', 'error')
             except Exception as e:
                 db.session.rollback()
                 flash(f'Error updating batch: {str(e)}', 'error')
@@ -812,41 +1203,35 @@ def edit_batch(batch_id):
     
     return render_template('edit_batch.html', form=form, batch=batch)
 
-@app.route('/batch/<int:batch_id>/delete', methods=['POST'])
+@routes.route('/batch/<int:batch_id>/delete', methods=['POST'])
 @login_required
 @roles_required('Admin', 'Manager')
 def delete_batch(batch_id):
     """Delete a batch and adjust item quantity"""
     batch = InventoryBatch.query.get_or_404(batch_id)
-    item = batch.item
-    
+    item_id, batch_number = batch.item_id, batch.batch_number
+
     try:
-        # Reduce item quantity
-        item.quantity -= batch.quantity
-        if item.quantity < 0:
-            item.quantity = 0
-        
-        db.session.delete(batch)
-        db.session.commit()
-        
+        # Reduce item quantity (never below zero); the ledger gets the change actually applied
+        remove_batch(batch_id)
+
         # Check and update alerts
-        check_and_create_stock_alerts(item.id)
-        
-        flash(f'Batch "{batch.batch_number}" deleted successfully!', 'success')
+        check_and_create_stock_alerts(item_id)
+
+        flash(f'Batch "{batch_number}" deleted successfully!', 'success')
     except Exception as e:
         db.session.rollback()
         flash(f'Error deleting batch: {str(e)}', 'error')
-    
+
     return redirect(url_for('batches'))
 
 # --------- Stock Transfer Between Warehouses ---------
-@app.route('/stock/transfer', methods=['GET', 'POST'])
+@routes.route('/stock/transfer', methods=['GET', 'POST'])
 @login_required
 @roles_required('Admin', 'Manager')
 def transfer_stock_between_warehouses():
     """Transfer stock from one warehouse to another"""
     form = StockTransferForm()
-    form.item_id.choices = [(item.id, item.name) for item in Item.query.all()]
     form.from_warehouse.choices = [(w.id, w.name) for w in Warehouse.query.filter_by(is_active=True).all()]
     form.to_warehouse.choices = [(w.id, w.name) for w in Warehouse.query.filter_by(is_active=True).all()]
     
@@ -871,20 +1256,59 @@ def transfer_stock_between_warehouses():
     transfers = []
     return render_template('stock_transfer.html', form=form, transfers=transfers)
 
+@routes.route('/api/stock/transfers', methods=['POST'])
+@login_required
+@roles_required('Admin', 'Manager')
+def api_transfer_stock():
+    """
+    Multi-line transfer document:
+    {"from_warehouse_id": 1, "to_warehouse_id": 2,
+     "lines": [{"item_id": 5, "quantity": 10, "batch_number": "optional"}, ...]}
+    All lines are transferred in one transaction or none are.
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        from_id = int(data['from_warehouse_id'])
+        to_id = int(data['to_warehouse_id'])
+        lines = list(data['lines'])
+        result = transfer_stock_lines(from_id, to_id, lines)
+    except (KeyError, TypeError, ValueError):
+        return jsonify(success=False, message='Expected from_warehouse_id, to_warehouse_id and lines '
+                                              '[{item_id, quantity, batch_number?}]'), 400
+
+    return jsonify(result), (200 if result['success'] else 409)
+
+@routes.route('/api/stock/at')
+@login_required
+@roles_required('Admin', 'Manager')
+def api_stock_at():
+    """Stock on hand at ?at=ISO datetime, optionally for one ?item_id= and/or ?warehouse_id= (0 = unassigned)"""
+    try:
+        at = datetime.fromisoformat(request.args['at'])
+    except (KeyError, ValueError):
+        return jsonify(success=False, message='Expected ?at=YYYY-MM-DD[THH:MM:SS]'), 400
+
+    balances = stock_at(at, item_id=request.args.get('item_id', type=int),
+                        warehouse_id=request.args.get('warehouse_id', type=int))
+    rows = [{'item_id': item_id, 'warehouse_id': warehouse_id, 'quantity': qty}
+            for (item_id, warehouse_id), qty in sorted(balances.items()) if qty]
+    return jsonify(at=at.isoformat(), stock=rows)
+
 # --------- Stock Alerts ---------
-@app.route('/stock/alerts', methods=['GET'])
+@routes.route('/stock/alerts', methods=['GET'])
 @login_required
 @roles_required('Admin', 'Manager')
 def stock_alerts():
     """View all active stock alerts"""
-    alerts = get_active_stock_alerts()
-    low_stock_items = get_low_stock_items()
-    overstock_items = get_overstock_items()
-    
-    return render_template('stock_alerts.html', alerts=alerts, low_stock_items=low_stock_items, 
-                          overstock_items=overstock_items)
+    low_stock = _keyset_page(low_stock_query(), Item.reorder_gap, Item.id, descending=False)
+    overstock = _keyset_page(overstock_query(), Item.overstock_gap, Item.id)
+    alerts = _keyset_page(active_stock_alerts_query(), StockAlert.created_at, StockAlert.id)
+
+    return render_template('stock_alerts.html', alerts=alerts, alert_count=count_active_stock_alerts(),
+                           low_stock_items=low_stock, low_stock_count=count_low_stock_items(),
+                           overstock_items=overstock, overstock_count=count_overstock_items())
 
-@app.route('/stock/alert/<int:alert_id>/resolve', methods=['POST'])
+@routes.route('/stock/alert/<int:alert_id>/resolve', methods=['POST'])
 @login_required
 @roles_required('Admin', 'Manager')
 def resolve_alert(alert_id):
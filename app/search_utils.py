@@ -0,0 +1,228 @@
+"""
+Global Search
+One SQLite FTS5 table, search_index, holds the searchable text of customers,
+suppliers, items, leads, tickets, notes and employees. Each document's rowid
+is the source row's id * 16 + its source code, so it can be replaced or
+removed without a scan.
+
+The index is kept in sync by triggers on the source tables, so Core and bulk
+writes (imports, the synthetic seed) are indexed like ORM ones. An UPDATE
+fires them only when an indexed column is in its SET list, so stock
+movements on items do not touch the index. `flask search-rebuild` refills it
+from the tables.
+
+Every word of a query is matched as a prefix; prefix indexes up to 8
+characters let FTS5 walk those like whole terms instead of merging every
+term that starts with them. Results are ranked by how many of the matches
+fall in the title, then by the shortest title (the closest match), newest
+first, and paged with a (score, rowid) cursor. Only the newest
+SEARCH_RANK_LIMIT matches of a broad query ("item") are ranked; finding that
+window walks rowids, so a search stays in milliseconds however many rows
+match. (FTS5's bm25 is not used: it counts every row matching each term,
+whatever the window.)
+"""
+from dataclasses import dataclass
+from typing import Callable
+
+from flask import current_app, url_for
+from flask_login import current_user
+from markupsafe import Markup, escape
+from sqlalchemy import event, text
+
+from app import db
+from app.pagination import decode_cursor, encode_cursor
+
+TABLE = 'search_index'
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+# Score of one title match, in characters of title length
+_TITLE_HIT = 1000000
+# Newest exact-word matches ranked alongside the window of a broad query
+_EXACT_CANDIDATES = 50
+# Marks matched terms in snippets until they are escaped and turned into <mark>
+_MARK_START, _MARK_END = '\x02', '\x03'
+
+
+@dataclass(frozen=True)
+class SearchSource:
+    code: int                  # low bits of the rowid; changing one needs a rebuild
+    table: str
+    title: tuple               # columns joined into the title
+    body: tuple                # columns joined into the body
+    url: Callable              # (id, title) -> link to the record
+    label: str
+    roles: tuple = ()          # roles allowed to see results; empty for any signed-in user
+
+
+SOURCES = {
+    'customers': SearchSource(1, 'customer', ('name',), ('phone', 'email', 'gst_number', 'address'),
+                              lambda row_id, title: url_for('customers', q=title), 'Customer'),
+    'suppliers': SearchSource(2, 'supplier', ('name',), ('phone', 'email', 'gst_number', 'address'),
+                              lambda row_id, title: url_for('edit_supplier', supplier_id=row_id), 'Supplier',
+                              roles=('Admin', 'Manager')),
+    'items': SearchSource(3, 'item', ('name',), ('description',),
+                          lambda row_id, title: url_for('sales', item_id=row_id), 'Item'),
+    'leads': SearchSource(4, 'leads', ('lead_id', 'name'), ('email', 'phone', 'source'),
+                          lambda row_id, title: url_for('crm.leads'), 'Lead'),
+    'tickets': SearchSource(5, 'tickets', ('ticket_id', 'subject'), ('description',),
+                            lambda row_id, title: url_for('crm.tickets'), 'Ticket'),
+    'notes': SearchSource(6, 'notes', (), ('content',),
+                          lambda row_id, title: url_for('crm.notes'), 'Note'),
+    'employees': SearchSource(7, 'employees', ('name',), ('email', 'position', 'department'),
+                              lambda row_id, title: url_for('hrm.employees'), 'Employee'),
+}
+_BY_CODE = {source.code: kind for kind, source in SOURCES.items()}
+
+
+# ---------------- Schema: FTS table and sync triggers ----------------
+def _text(columns, row):
+    if not columns:
+        return "''"
+    return " || ' ' || ".join(f"coalesce({row}.\"{column}\", '')" for column in columns)
+
+
+def _document(kind, source, row):
+    return (f"{row}.id * 16 + {source.code}, '{kind}', "
+            f"{_text(source.title, row)}, {_text(source.body, row)}")
+
+
+def _schema_ddl():
+    yield (f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING fts5("
+           f"kind UNINDEXED, title, body, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3 4 5 6 7 8')")
+    for kind, source in SOURCES.items():
+        insert = f"INSERT INTO {TABLE} (rowid, kind, title, body) VALUES ({_document(kind, source, 'new')});"
+        delete = f"DELETE FROM {TABLE} WHERE rowid = old.id * 16 + {source.code};"
+        watched = ', '.join(f'"{column}"' for column in ('id',) + source.title + source.body)
+        yield (f'CREATE TRIGGER IF NOT EXISTS {TABLE}_{source.table}_insert '
+               f'AFTER INSERT ON "{source.table}" BEGIN {insert} END')
+        yield (f'CREATE TRIGGER IF NOT EXISTS {TABLE}_{source.table}_update '
+               f'AFTER UPDATE OF {watched} ON "{source.table}" BEGIN {delete} {insert} END')
+        yield (f'CREATE TRIGGER IF NOT EXISTS {TABLE}_{source.table}_delete '
+               f'AFTER DELETE ON "{source.table}" BEGIN {delete} END')
+
+
+def create_search_schema(conn):
+    """Create the FTS table and its triggers, skipping what exists (SQLite only)"""
+    if conn.dialect.name != 'sqlite':
+        return
+    for statement in _schema_ddl():
+        conn.exec_driver_sql(statement)
+
+
+def rebuild_search_index(conn=None):
+    """Refill the index from the source tables. Returns {kind: documents}."""
+    if conn is None:
+        with db.engine.begin() as conn:
+            return rebuild_search_index(conn)
+    create_search_schema(conn)
+    conn.exec_driver_sql(f'DELETE FROM {TABLE}')
+    counts = {}
+    for kind, source in SOURCES.items():
+        result = conn.exec_driver_sql(
+            f'INSERT INTO {TABLE} (rowid, kind, title, body) SELECT {_document(kind, source, "src")} '
+            f'FROM "{source.table}" AS src')
+        counts[kind] = result.rowcount
+    # Merge the index segments written by the bulk insert
+    conn.exec_driver_sql(f"INSERT INTO {TABLE} ({TABLE}) VALUES ('optimize')")
+    return counts
+
+
+@event.listens_for(db.metadata, 'after_create')
+def _create_with_tables(metadata, conn, **kw):
+    create_search_schema(conn)
+
+
+@event.listens_for(db.metadata, 'before_drop')
+def _drop_with_tables(metadata, conn, **kw):
+    if conn.dialect.name == 'sqlite':
+        conn.exec_driver_sql(f'DROP TABLE IF EXISTS {TABLE}')
+
+
+# ---------------- Queries ----------------
+def match_expression(query, prefix=True):
+    """
+    An FTS5 MATCH expression for free text: every word must match (as a
+    prefix, unless prefix is False). Words are quoted, so FTS5 syntax in the
+    input is taken literally.
+    """
+    words = [word.replace('"', '') for word in (query or '').split()]
+    return ' '.join(f'"{word}"' + ('*' if prefix else '') for word in words if word.strip(' *'))
+
+
+def visible_kinds():
+    role = getattr(current_user, 'role', None)
+    return [kind for kind, source in SOURCES.items() if not source.roles or role in source.roles]
+
+
+def _snippet(value):
+    html = escape(value or '')
+    return Markup(str(html).replace(_MARK_START, '<mark>').replace(_MARK_END, '</mark>'))
+
+
+def search(query, kinds=None, cursor=None, limit=DEFAULT_LIMIT):
+    """
+    Ranked matches for `query` in `kinds` (default: every source), best
+    first, as ([result], next_cursor). Each result has kind, id, label,
+    title, snippet (HTML) and url. Raises ValueError for a malformed cursor.
+    """
+    expression = match_expression(query)
+    codes = [SOURCES[kind].code for kind in (SOURCES if kinds is None else kinds) if kind in SOURCES]
+    if not expression or not codes:
+        return [], None
+    limit = max(1, min(limit, MAX_LIMIT))
+
+    params = {'match': expression, 'exact': match_expression(query, prefix=False), 'limit': limit + 1,
+              'exact_limit': _EXACT_CANDIDATES}
+    params.update({f'code{n}': code for n, code in enumerate(codes)})
+    # The source code is in the rowid: filtering on it reads no document
+    where = f"{TABLE} MATCH :match AND rowid % 16 IN ({', '.join(f':code{n}' for n in range(len(codes)))})"
+    after = ''
+    if cursor:
+        try:
+            (params['score'], params['floor']), params['rowid'] = decode_cursor(cursor)
+        except TypeError as e:
+            raise ValueError(f'Invalid cursor: {cursor!r}') from e
+        after = 'AND (score > :score OR (score = :score AND rowid < :rowid))'
+    else:
+        # Lowest rowid of the newest SEARCH_RANK_LIMIT matches (all of them when fewer)
+        params['floor'] = db.session.execute(text(
+            f"SELECT rowid FROM {TABLE} WHERE {where} ORDER BY rowid DESC LIMIT 1 OFFSET :offset"
+        ), dict(params, offset=current_app.config['SEARCH_RANK_LIMIT'] - 1)).scalar() or 0
+
+    def ranked(candidates):
+        # highlight() adds one marker per match in the title: more is a lower (better) score
+        return db.session.execute(text(
+            f"SELECT rowid, length(title) - {_TITLE_HIT} * "
+            f"(length(highlight({TABLE}, 1, char(2), '')) - length(title)) AS score "
+            f"FROM {TABLE} WHERE {where} AND {candidates} {after} ORDER BY score, rowid DESC LIMIT :limit"
+        ), params).all()
+
+    rows = {row.rowid: row for row in ranked('rowid >= :floor')}
+    if params['floor']:
+        # Older rows matching the words exactly compete too ("customer 19" among "customer 19xxx")
+        rows.update((row.rowid, row) for row in ranked(
+            f"rowid IN (SELECT rowid FROM {TABLE} WHERE {TABLE} MATCH :exact ORDER BY rowid DESC LIMIT :exact_limit)"))
+    rows = sorted(rows.values(), key=lambda row: (row.score, -row.rowid))
+    last = rows[limit - 1] if len(rows) > limit else None
+    next_cursor = encode_cursor([last.score, params['floor']], last.rowid) if last else None
+    rows = rows[:limit]
+
+    # Titles and snippets for this page only
+    page = {row.rowid: row for row in db.session.execute(text(
+        f"SELECT rowid, title, snippet({TABLE}, 2, char(2), char(3), '…', 12) AS snippet "
+        f"FROM {TABLE} WHERE {TABLE} MATCH :match AND rowid IN ({', '.join(str(row.rowid) for row in rows)})"
+    ), params)} if rows else {}
+    results = []
+    for row in rows:
+        row = page[row.rowid]
+        kind = _BY_CODE[row.rowid % 16]
+        source, row_id = SOURCES[kind], row.rowid // 16
+        results.append({
+            'kind': kind,
+            'id': row_id,
+            'label': source.label,
+            'title': row.title.strip() or f'{source.label} #{row_id}',
+            'snippet': _snippet(row.snippet),
+            'url': source.url(row_id, row.title.strip()),
+        })
+    return results, next_cursor
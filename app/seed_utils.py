@@ -0,0 +1,192 @@
+"""
+Synthetic Data
+Fills an empty database with a realistic, reproducible large dataset for
+benchmarking (flask seed-data, scripts/bench_routes.py).
+
+At scale 1.0: 2M orders, 200k items, 300k batches and purchases, 50k
+customers, 20k employees and leads, plus warehouses, suppliers and HR and
+finance history. Rows are written with chunked executemany inserts; the
+derived tables (rollups, warehouse balances, ledger opening balances, stock
+alerts) are then rebuilt the same way the maintenance commands do.
+"""
+import random
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select, update
+
+from app import db
+from app.alert_utils import evaluate_stock_alerts
+from app.balance_utils import rebuild_warehouse_stock
+from app.crm.crm_models import Lead
+from app.finance.models import Billing, Expense, Tax
+from app.hrm.models import Attendance, Employee, Leave, Payroll
+from app.ledger_utils import record_opening_balances
+from app.models import Customer, InventoryBatch, Item, Order, Purchase, Supplier, Warehouse
+from app.report_utils import rebuild_rollups
+
+# Rows at scale 1.0
+VOLUMES = {
+    'warehouses': 50,
+    'suppliers': 5000,
+    'customers': 50000,
+    'items': 200000,
+    'batches': 300000,
+    'orders': 2000000,
+    'purchases': 300000,
+    'employees': 20000,
+    'attendances': 400000,
+    'payrolls': 100000,
+    'leaves': 20000,
+    'leads': 20000,
+    'billings': 100000,
+    'expenses': 50000,
+}
+
+# History covered by dated rows, ending now
+HISTORY_DAYS = 730
+# Orders from the last day are left uninvoiced
+UNINVOICED_DAYS = 1
+CHUNK_SIZE = 10000
+
+_CATEGORIES = ('Rent', 'Utilities', 'Travel', 'Supplies', 'Salaries', 'Marketing')
+_DEPARTMENTS = ('Sales', 'Warehouse', 'Finance', 'HR', 'Operations')
+
+
+def _insert(model, rows):
+    """Insert an iterable of row dicts in chunks on the Core table (no ORM events)"""
+    table, chunk, count = model.__table__, [], 0
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= CHUNK_SIZE:
+            db.session.execute(table.insert(), chunk)
+            count += len(chunk)
+            chunk = []
+    if chunk:
+        db.session.execute(table.insert(), chunk)
+        count += len(chunk)
+    db.session.commit()
+    return count
+
+
+def _timeline(count, now):
+    """count timestamps spread evenly over the history, oldest first (ids follow time)"""
+    start = now - timedelta(days=HISTORY_DAYS)
+    step = HISTORY_DAYS * 86400 / max(count, 1)
+    for n in range(count):
+        yield start + timedelta(seconds=n * step)
+
+
+def generate_dataset(scale=1.0, seed=42, progress=None):
+    """
+    Seed an empty database. Returns {table: rows written}.
+    `progress(name, rows, seconds)` is called after each table.
+    """
+    if db.session.query(func.count(Item.id)).scalar():
+        raise ValueError('The database already has items; seed an empty database.')
+
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    today = now.date()
+    n = {name: max(1, int(volume * scale)) for name, volume in VOLUMES.items()}
+    # Stock transfers need a second warehouse at any scale
+    n['warehouses'] = max(2, n['warehouses'])
+    written = {}
+
+    def day(days=HISTORY_DAYS):
+        return today - timedelta(days=rng.randrange(days))
+
+    def moment(days=HISTORY_DAYS):
+        return now - timedelta(seconds=rng.randrange(days * 86400))
+
+    def step(name, model, rows):
+        started = time.perf_counter()
+        written[name] = _insert(model, rows)
+        if progress:
+            progress(name, written[name], time.perf_counter() - started)
+
+    step('warehouses', Warehouse, ({'id': i, 'name': f'Warehouse {i}', 'location': f'Site {i}',
+                                    'manager_name': f'Manager {i}', 'is_active': True, 'created_at': moment()}
+                                   for i in range(1, n['warehouses'] + 1)))
+    step('suppliers', Supplier, ({'id': i, 'name': f'Supplier {i}', 'phone': f'555{i:07d}',
+                                  'email': f'supplier{i}@example.com', 'created_at': moment()}
+                                 for i in range(1, n['suppliers'] + 1)))
+    step('customers', Customer, ({'id': i, 'name': f'Customer {i}', 'phone': f'777{i:07d}',
+                                  'email': f'customer{i}@example.com', 'created_at': moment()}
+                                 for i in range(1, n['customers'] + 1)))
+    step('items', Item, ({'id': i, 'name': f'Item {i}', 'quantity': rng.randint(0, 400),
+                          'price': round(rng.uniform(1, 500), 2), 'reorder_point': 10, 'max_stock': 300,
+                          'description': f'Synthetic item {i}', 'created_at': moment()}
+                         for i in range(1, n['items'] + 1)))
+
+    def batches():
+        for i in range(1, n['batches'] + 1):
+            received = moment()
+            yield {'item_id': rng.randint(1, n['items']), 'warehouse_id': rng.randint(1, n['warehouses']),
+                   'batch_number': f'B{i:08d}', 'quantity': rng.randint(1, 100), 'received_date': received,
+                   'expiry_date': received + timedelta(days=rng.randint(30, 900)) if rng.random() < 0.3 else None,
+                   'supplier_id': rng.randint(1, n['suppliers']), 'is_active': rng.random() < 0.8}
+    step('batches', InventoryBatch, batches())
+    # On-hand stock covers what sits in active batches, plus some unassigned
+    in_batches = (
+        select(func.coalesce(func.sum(InventoryBatch.quantity), 0))
+        .where(InventoryBatch.item_id == Item.id, InventoryBatch.is_active == True)
+        .scalar_subquery()
+    )
+    db.session.execute(update(Item.__table__).values(quantity=Item.quantity + in_batches))
+    db.session.commit()
+
+    uninvoiced_from = now - timedelta(days=UNINVOICED_DAYS)
+    step('orders', Order, ({'item_id': rng.randint(1, n['items']), 'quantity': rng.randint(1, 10),
+                            'customer_id': rng.randint(1, n['customers']) if rng.random() < 0.9 else None,
+                            'order_date': when, 'invoiced': when < uninvoiced_from}
+                           for when in _timeline(n['orders'], now)))
+    step('purchases', Purchase, ({'item_id': rng.randint(1, n['items']), 'quantity': rng.randint(10, 200),
+                                  'supplier_id': rng.randint(1, n['suppliers']), 'purchase_date': when}
+                                 for when in _timeline(n['purchases'], now)))
+
+    step('employees', Employee, ({'id': i, 'name': f'Employee {i}', 'email': f'employee{i}@example.com',
+                                  'position': 'Associate', 'department': rng.choice(_DEPARTMENTS),
+                                  'date_hired': day(3650), 'salary': rng.randint(20000, 120000)}
+                                 for i in range(1, n['employees'] + 1)))
+    step('attendances', Attendance, ({'employee_id': rng.randint(1, n['employees']), 'date': day(365),
+                                      'status': 'present' if rng.random() < 0.92 else 'absent'}
+                                     for _ in range(n['attendances'])))
+
+    def payrolls():
+        for _ in range(n['payrolls']):
+            start = day().replace(day=1)
+            gross = rng.randint(2000, 10000)
+            yield {'employee_id': rng.randint(1, n['employees']), 'period_start': start,
+                   'period_end': start + timedelta(days=27), 'gross_pay': gross,
+                   'taxes': gross // 5, 'net_pay': gross - gross // 5}
+    step('payrolls', Payroll, payrolls())
+
+    def leaves():
+        for _ in range(n['leaves']):
+            start = day()
+            yield {'employee_id': rng.randint(1, n['employees']), 'start_date': start,
+                   'end_date': start + timedelta(days=rng.randint(0, 10)), 'leave_type': 'annual',
+                   'status': rng.choice(('pending', 'approved', 'rejected'))}
+    step('leaves', Leave, leaves())
+
+    step('leads', Lead, ({'lead_id': f'L{i:07d}', 'name': f'Lead {i}', 'email': f'lead{i}@example.com',
+                          'source': 'web', 'status': rng.choice(('new', 'contacted', 'qualified')),
+                          'created_at': moment()}
+                         for i in range(1, n['leads'] + 1)))
+    step('taxes', Tax, ({'id': i, 'name': f'GST {rate}%', 'rate': rate} for i, rate in enumerate((5, 12, 18, 28), 1)))
+    step('billings', Billing, ({'reference': f'INV{i:08d}', 'customer': f'Customer {rng.randint(1, n["customers"])}',
+                                'amount': round(rng.uniform(10, 5000), 2), 'tax_id': rng.randint(1, 4),
+                                'date_issued': day(), 'paid': rng.random() < 0.8}
+                               for i in range(1, n['billings'] + 1)))
+    step('expenses', Expense, ({'description': 'Synthetic expense', 'amount': round(rng.uniform(5, 2000), 2),
+                                'date': day(), 'category': rng.choice(_CATEGORIES)}
+                               for _ in range(n['expenses'])))
+
+    for name, rebuild in (('rollups', rebuild_rollups), ('warehouse_stock', rebuild_warehouse_stock),
+                          ('opening_balances', record_opening_balances), ('alerts', evaluate_stock_alerts)):
+        started = time.perf_counter()
+        rebuild()
+        if progress:
+            progress(name, None, time.perf_counter() - started)
+    return written
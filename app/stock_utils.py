@@ -0,0 +1,228 @@
+"""
+Stock Mutations
+Item stock is changed only through single conditional UPDATE statements, so
+concurrent workers can never both sell the last unit:
+
+    UPDATE item SET quantity = quantity - :n WHERE id = :id AND quantity >= :n
+
+A rowcount of 0 means the stock was not there. Writes that hit SQLite's
+"database is locked" are rolled back and retried with exponential backoff.
+Each mutation also appends its StockMovement in the same transaction.
+"""
+import random
+import time
+from datetime import datetime
+from functools import wraps
+
+from flask import current_app, has_app_context
+from sqlalchemy import select, update
+from sqlalchemy.exc import OperationalError
+
+from app import db
+from app.db_profile import write_intent
+from app.ledger_utils import record_movement, record_movements, stock_at
+from app.models import InventoryBatch, Item, Order, Purchase
+
+
+class InsufficientStock(Exception):
+    """Raised when a conditional decrement finds less stock than requested"""
+
+    def __init__(self, item_id, requested, available):
+        self.item_id = item_id
+        self.requested = requested
+        self.available = available
+        super().__init__(f'Insufficient stock for item {item_id}: requested {requested}, available {available}')
+
+
+def is_locked_error(exc):
+    return isinstance(exc, OperationalError) and 'database is locked' in str(exc.orig)
+
+
+def retry_on_locked(fn):
+    """
+    Run a unit of work that ends in a commit, rolling back on any error and
+    retrying when SQLite reports the database as locked. Attempts and base
+    delay come from DB_LOCK_RETRIES / DB_LOCK_BACKOFF. Transactions begun
+    inside take the write lock up front (see db_profile).
+    """
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        config = current_app.config if has_app_context() else {}
+        attempts = config.get('DB_LOCK_RETRIES', 5)
+        delay = config.get('DB_LOCK_BACKOFF', 0.05)
+        for attempt in range(attempts + 1):
+            try:
+                with write_intent():
+                    return fn(*args, **kwargs)
+            except OperationalError as e:
+                db.session.rollback()
+                if not is_locked_error(e) or attempt == attempts:
+                    raise
+                # Full jitter keeps retrying workers from colliding again in lockstep
+                time.sleep(random.uniform(0, delay * (2 ** attempt)))
+            except Exception:
+                db.session.rollback()
+                raise
+    return wrapper
+
+
+def decrement_stock(item_id, quantity):
+    """
+    Take `quantity` units of an item in one conditional UPDATE (no commit).
+    Returns the new stock level; raises InsufficientStock or LookupError.
+    """
+    new_quantity = db.session.execute(
+        update(Item)
+        .where(Item.id == item_id, Item.quantity >= quantity)
+        .values(quantity=Item.quantity - quantity)
+        .returning(Item.quantity)
+        .execution_options(synchronize_session='fetch')
+    ).scalar()
+    if new_quantity is None:
+        available = db.session.query(Item.quantity).filter(Item.id == item_id).scalar()
+        if available is None:
+            raise LookupError(f'Item {item_id} not found')
+        raise InsufficientStock(item_id, quantity, available)
+    return new_quantity
+
+
+def increment_stock(item_id, quantity):
+    """
+    Add `quantity` (may be negative) units to an item in one UPDATE (no commit).
+    Returns the new stock level.
+    """
+    new_quantity = db.session.execute(
+        update(Item)
+        .where(Item.id == item_id)
+        .values(quantity=Item.quantity + quantity)
+        .returning(Item.quantity)
+        .execution_options(synchronize_session='fetch')
+    ).scalar()
+    if new_quantity is None:
+        raise LookupError(f'Item {item_id} not found')
+    return new_quantity
+
+
+def remove_stock(item_id, quantity):
+    """
+    Take up to `quantity` units of an item, stopping at zero (no commit).
+    Returns the change applied: -quantity, or less when the stock ran short.
+    """
+    # The unclamped level says how far below zero the UPDATE went. That UPDATE
+    # holds the write lock, so the clamp only undoes this transaction's overshoot.
+    unclamped = increment_stock(item_id, -quantity)
+    if unclamped >= 0:
+        return -quantity
+    increment_stock(item_id, -unclamped)
+    return -quantity - unclamped
+
+
+@retry_on_locked
+def place_order(item_id, quantity, customer_id=None):
+    """Decrement stock and record the order in one transaction. Returns the Order."""
+    decrement_stock(item_id, quantity)
+    order = Order(item_id=item_id, quantity=quantity, customer_id=customer_id)
+    db.session.add(order)
+    db.session.flush()
+    record_movement(item_id, -quantity, 'sale', reference=f'order:{order.id}')
+    db.session.commit()
+    return order
+
+
+@retry_on_locked
+def cancel_sales_order(order_id):
+    """Delete an order and put its quantity back on the shelf. Returns False if it was already gone."""
+    order = db.session.get(Order, order_id)
+    if order is None:
+        return False
+    increment_stock(order.item_id, order.quantity)
+    record_movement(order.item_id, order.quantity, 'sale_cancel', reference=f'order:{order.id}')
+    db.session.delete(order)
+    db.session.commit()
+    return True
+
+
+@retry_on_locked
+def record_purchase(item_id, quantity, supplier_id=None):
+    """Increment stock and record the purchase in one transaction. Returns the Purchase."""
+    increment_stock(item_id, quantity)
+    purchase = Purchase(item_id=item_id, quantity=quantity, supplier_id=supplier_id)
+    db.session.add(purchase)
+    db.session.flush()
+    record_movement(item_id, quantity, 'purchase', reference=f'purchase:{purchase.id}')
+    db.session.commit()
+    return purchase
+
+
+@retry_on_locked
+def update_item(item_id, quantity, **fields):
+    """Set an item's fields and its stock level, ledgering the difference, in one transaction. Returns the Item."""
+    current = db.session.execute(select(Item.quantity).where(Item.id == item_id)).scalar()
+    if current is None:
+        raise LookupError(f'Item {item_id} not found')
+    # Applied as a delta, so the ledger records exactly the change made
+    if quantity != current:
+        increment_stock(item_id, quantity - current)
+        record_movement(item_id, quantity - current, 'adjustment')
+    item = db.session.get(Item, item_id)
+    for name, value in fields.items():
+        setattr(item, name, value)
+    db.session.commit()
+    return item
+
+
+@retry_on_locked
+def receive_batch(**fields):
+    """Add an inventory batch and put its units on the item's stock in one transaction. Returns the batch."""
+    batch = InventoryBatch(**fields)
+    db.session.add(batch)
+    db.session.flush()
+    increment_stock(batch.item_id, batch.quantity)
+    record_movement(batch.item_id, batch.quantity, 'batch_receipt', warehouse_id=batch.warehouse_id, batch_id=batch.id)
+    db.session.commit()
+    return batch
+
+
+@retry_on_locked
+def update_batch(batch_id, quantity, **fields):
+    """Set a batch's fields and quantity, moving the item's stock by the difference. Returns the batch."""
+    batch = db.session.get(InventoryBatch, batch_id, populate_existing=True)
+    if batch is None:
+        raise LookupError(f'Batch {batch_id} not found')
+    change = quantity - batch.quantity
+    for name, value in dict(fields, quantity=quantity).items():
+        setattr(batch, name, value)
+    if change:
+        increment_stock(batch.item_id, change)
+        record_movement(batch.item_id, change, 'batch_adjust', warehouse_id=batch.warehouse_id, batch_id=batch.id)
+    db.session.commit()
+    return batch
+
+
+@retry_on_locked
+def remove_batch(batch_id):
+    """Delete a batch and take its units off the item's stock (never below zero). Returns False if it was already gone."""
+    batch = db.session.get(InventoryBatch, batch_id, populate_existing=True)
+    if batch is None:
+        return False
+    change = remove_stock(batch.item_id, batch.quantity)
+    record_movement(batch.item_id, change, 'batch_delete', warehouse_id=batch.warehouse_id, batch_id=batch.id)
+    db.session.delete(batch)
+    db.session.commit()
+    return True
+
+
+@retry_on_locked
+def remove_item(item_id):
+    """Delete an item with its batches, taking its stock out of the ledger. Returns False if it was already gone."""
+    item = db.session.get(Item, item_id, populate_existing=True)
+    if item is None:
+        return False
+    # Close every balance the ledger still holds for the item, batches and unassigned stock alike
+    record_movements([
+        {'item_id': item_id, 'warehouse_id': warehouse_id, 'quantity': -quantity, 'reason': 'item_delete'}
+        for (_, warehouse_id), quantity in stock_at(datetime.utcnow(), item_id=item_id).items()
+    ])
+    db.session.delete(item)
+    db.session.commit()
+    return True
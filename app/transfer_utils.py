@@ -0,0 +1,217 @@
+"""
+Stock Transfer Documents
+Moves many (item, quantity, optional batch) lines between two warehouses in a
+single transaction.
+
+Source batches for every line are read in one query and allocated FIFO in
+memory. They are then drawn down with one conditional UPDATE
+(quantity >= :n) per batch, executed as a batch. If any of those updates
+matches no row, another transfer took the stock first: the transaction is
+rolled back and the allocation retried against fresh quantities, so
+concurrent transfers can never oversell a batch.
+"""
+from collections import defaultdict
+from datetime import datetime
+
+from sqlalchemy import bindparam, insert, update
+
+from app import db
+from app.balance_utils import refresh_warehouse_stock
+from app.ledger_utils import record_movements
+from app.models import InventoryBatch, Warehouse
+
+MAX_ATTEMPTS = 3
+
+
+class TransferConflict(Exception):
+    """A conditional batch update lost a race with a concurrent transfer"""
+
+
+def _normalise_lines(lines):
+    normalised = []
+    for line in lines:
+        normalised.append({
+            'item_id': int(line['item_id']),
+            'quantity': int(line['quantity']),
+            'batch_number': line.get('batch_number') or None,
+        })
+    return normalised
+
+
+def _source_batches(from_warehouse_id, item_ids):
+    """Active source batches for all items, oldest first, in one query"""
+    # populate_existing: allocate from current quantities, not ones cached in the session
+    batches = InventoryBatch.query.populate_existing().filter(
+        InventoryBatch.warehouse_id == from_warehouse_id,
+        InventoryBatch.item_id.in_(item_ids),
+        InventoryBatch.is_active == True,
+        InventoryBatch.quantity > 0,
+    ).order_by(InventoryBatch.item_id, InventoryBatch.received_date, InventoryBatch.id).all()
+
+    by_item = defaultdict(list)
+    for batch in batches:
+        by_item[batch.item_id].append(batch)
+    return by_item
+
+
+def _allocate(lines, by_item, now):
+    """
+    FIFO-allocate every line against the loaded batches.
+    Returns (per-line results, {batch_id: units drawn}).
+    """
+    available = {batch.id: batch.quantity for batches in by_item.values() for batch in batches}
+    drawn = defaultdict(int)
+    results = []
+
+    for index, line in enumerate(lines):
+        result = dict(line, line=index, transferred=0, allocations=[], status='ok', message='')
+        results.append(result)
+
+        if line['quantity'] <= 0:
+            result.update(status='invalid', message='Quantity must be positive')
+            continue
+
+        candidates = by_item.get(line['item_id'], [])
+        if line['batch_number']:
+            candidates = [b for b in candidates if b.batch_number == line['batch_number']]
+            if not candidates:
+                result.update(status='batch_not_found', message='Batch not found or inactive')
+                continue
+        else:
+            # Expired stock is never shipped on an unpinned line
+            candidates = [b for b in candidates if not b.expiry_date or b.expiry_date >= now]
+
+        remaining = line['quantity']
+        for batch in candidates:
+            take = min(available[batch.id], remaining)
+            if take <= 0:
+                continue
+            available[batch.id] -= take
+            drawn[batch.id] += take
+            result['allocations'].append((batch, take))
+            remaining -= take
+            if remaining == 0:
+                break
+
+        result['transferred'] = line['quantity'] - remaining
+        if remaining:
+            result.update(status='insufficient',
+                          message=f"Insufficient stock (Needed: {line['quantity']}, Available: {result['transferred']})")
+
+    return results, drawn
+
+
+def _apply(results, drawn, from_warehouse_id, to_warehouse_id, now):
+    """Draw down source batches conditionally and create the destination batches"""
+    table = InventoryBatch.__table__
+    draw_down = (
+        update(table)
+        .where(table.c.id == bindparam('b_id'), table.c.is_active == True,
+               table.c.quantity >= bindparam('b_qty'))
+        .values(quantity=table.c.quantity - bindparam('b_qty'))
+    )
+    params = [{'b_id': batch_id, 'b_qty': qty} for batch_id, qty in drawn.items()]
+    updated = db.session.execute(draw_down, params).rowcount
+    if updated != len(params):
+        raise TransferConflict()
+
+    db.session.execute(
+        update(table)
+        .where(table.c.id.in_(list(drawn)), table.c.quantity == 0)
+        .values(is_active=False)
+    )
+
+    new_batches = [
+        {
+            'item_id': batch.item_id,
+            'warehouse_id': to_warehouse_id,
+            'batch_number': batch.batch_number,
+            'serial_number': batch.serial_number,
+            'quantity': qty,
+            'received_date': now,
+            'expiry_date': batch.expiry_date,
+            'supplier_id': batch.supplier_id,
+            'notes': f'Transferred from Warehouse {from_warehouse_id}',
+            'is_active': True,
+        }
+        for result in results
+        for batch, qty in result['allocations']
+    ]
+    db.session.execute(insert(table), new_batches)
+
+    refresh_warehouse_stock(
+        (warehouse_id, batch.item_id)
+        for result in results
+        for batch, _ in result['allocations']
+        for warehouse_id in (from_warehouse_id, to_warehouse_id)
+    )
+
+    reference = f'transfer:{from_warehouse_id}->{to_warehouse_id}'
+    record_movements(
+        movement
+        for result in results
+        for batch, qty in result['allocations']
+        for movement in (
+            {'item_id': batch.item_id, 'warehouse_id': from_warehouse_id, 'batch_id': batch.id,
+             'quantity': -qty, 'reason': 'transfer_out', 'reference': reference},
+            {'item_id': batch.item_id, 'warehouse_id': to_warehouse_id,
+             'quantity': qty, 'reason': 'transfer_in', 'reference': reference},
+        )
+    )
+
+
+def _report(results, success, message):
+    lines = []
+    for result in results:
+        lines.append({
+            'line': result['line'],
+            'item_id': result['item_id'],
+            'batch_number': result['batch_number'],
+            'requested': result['quantity'],
+            'transferred': result['transferred'] if success else 0,
+            'status': result['status'],
+            'message': result['message'],
+            'batches': [{'batch_number': b.batch_number, 'quantity': q} for b, q in result['allocations']] if success else [],
+        })
+    return {'success': success, 'message': message, 'lines': lines}
+
+
+def transfer_stock_lines(from_warehouse_id, to_warehouse_id, lines):
+    """
+    Transfer many lines between two warehouses atomically.
+
+    lines: iterable of {'item_id', 'quantity', 'batch_number' (optional)}.
+    Either every line is transferred in full and committed together, or
+    nothing is; the result always carries per-line status and allocations.
+    """
+    lines = _normalise_lines(lines)
+    if not lines:
+        return {'success': False, 'message': 'No transfer lines given', 'lines': []}
+    if from_warehouse_id == to_warehouse_id:
+        return {'success': False, 'message': 'Source and destination warehouses must be different', 'lines': []}
+    if db.session.get(Warehouse, from_warehouse_id) is None or db.session.get(Warehouse, to_warehouse_id) is None:
+        return {'success': False, 'message': 'Unknown warehouse', 'lines': []}
+
+    for attempt in range(MAX_ATTEMPTS):
+        now = datetime.utcnow()
+        by_item = _source_batches(from_warehouse_id, {line['item_id'] for line in lines})
+        results, drawn = _allocate(lines, by_item, now)
+
+        failed = [r for r in results if r['status'] != 'ok']
+        if failed:
+            return _report(results, False, f'{len(failed)} of {len(results)} line(s) cannot be fulfilled')
+
+        try:
+            _apply(results, drawn, from_warehouse_id, to_warehouse_id, now)
+            db.session.commit()
+        except TransferConflict:
+            db.session.rollback()
+            continue
+        except Exception as e:
+            db.session.rollback()
+            return _report(results, False, f'Transfer failed: {str(e)}')
+
+        units = sum(r['transferred'] for r in results)
+        return _report(results, True, f'Successfully transferred {units} units in {len(results)} line(s)')
+
+    return _report(results, False, 'Stock changed concurrently; please retry the transfer')
@@ -15,3 +15,17 @@ def login_required(f):
 def calculate_order_total(order_items):
     # order_items: list of dicts with 'quantity' and 'price'
     return sum(int(item.get("quantity", 0)) * float(item.get("price", 0)) for item in order_items)
+
+
+def dialect_insert(bind):
+    """
+    The INSERT construct for bind's dialect (a connection, engine or session),
+    which has on_conflict_do_update() for upserts
+    """
+    if hasattr(bind, 'get_bind'):
+        bind = bind.get_bind()
+    if bind.dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert
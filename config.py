@@ -5,5 +5,68 @@ class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or b'your-secret-key-here-change-this'  # Change to a random string
 
     # Database configuration (SQLite for local dev, full URL for root location)
-    SQLALCHEMY_DATABASE_URI = f'sqlite:///{os.path.join(os.path.dirname(__file__), "erp.db")}'
-    SQLALCHEMY_TRACK_MODIFICATIONS = False  # Avoids performance overhead
\ No newline at end of file
+    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or \
+        f'sqlite:///{os.path.join(os.path.dirname(__file__), "erp.db")}'
+    SQLALCHEMY_TRACK_MODIFICATIONS = False  # Avoids performance overhead
+
+    # Seconds a worker may serve cached dashboard KPIs written by other workers
+    KPI_CACHE_TTL = int(os.environ.get('KPI_CACHE_TTL', 60))
+
+    # Signed-in user principals cached per worker (app/auth_cache.py): seconds a worker
+    # may serve a principal changed by another worker (0 disables), and max entries
+    AUTH_CACHE_TTL = int(os.environ.get('AUTH_CACHE_TTL', 300))
+    AUTH_CACHE_SIZE = int(os.environ.get('AUTH_CACHE_SIZE', 1024))
+
+    # Retries (with exponential backoff from DB_LOCK_BACKOFF seconds) for stock writes
+    # that hit SQLite's "database is locked"
+    DB_LOCK_RETRIES = int(os.environ.get('DB_LOCK_RETRIES', 5))
+    DB_LOCK_BACKOFF = float(os.environ.get('DB_LOCK_BACKOFF', 0.05))
+
+    # SQLite engine profile (app/db_profile.py): WAL plus these pragmas on every
+    # connection, a per-worker pool, and BEGIN IMMEDIATE for write requests.
+    # SQLITE_TUNING=0 falls back to the driver defaults (e.g. for benchmarking)
+    SQLITE_TUNING = os.environ.get('SQLITE_TUNING', '1') != '0'
+    SQLITE_SYNCHRONOUS = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')    # safe with WAL; FULL to fsync every commit
+    SQLITE_BUSY_TIMEOUT = int(os.environ.get('SQLITE_BUSY_TIMEOUT', 5000))  # ms to wait for a lock
+    SQLITE_CACHE_SIZE = int(os.environ.get('SQLITE_CACHE_SIZE', -65536))    # negative = KiB (64 MiB)
+    SQLITE_MMAP_SIZE = int(os.environ.get('SQLITE_MMAP_SIZE', 268435456))   # bytes (256 MiB)
+    SQLITE_POOL_SIZE = int(os.environ.get('SQLITE_POOL_SIZE', 5))
+    SQLITE_MAX_OVERFLOW = int(os.environ.get('SQLITE_MAX_OVERFLOW', 10))
+
+    # Read-only engine for reports/dashboard views (app/db_routing.py): a replica URL,
+    # or by default the SQLite file above opened read-only. READ_ROUTING=0 disables it
+    READ_ROUTING = os.environ.get('READ_ROUTING', '1') != '0'
+    READ_DATABASE_URL = os.environ.get('READ_DATABASE_URL')
+
+    # Items with batches expiring within this many days get an 'expiring_soon' alert
+    EXPIRY_WARNING_DAYS = int(os.environ.get('EXPIRY_WARNING_DAYS', 7))
+
+    # Per-request SQL timing (Server-Timing header, /admin/debug/queries) and the
+    # slow-query log: statements slower than SLOW_QUERY_MS are logged with their query plan
+    QUERY_STATS = os.environ.get('QUERY_STATS', '1') != '0'
+    SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', 100))
+    SLOW_QUERY_LOG = os.environ.get('SLOW_QUERY_LOG')  # file path; defaults to the app log only
+
+    # N+1 detection: 'warn' logs, 'raise' fails the request (tests/CI); unset disables
+    QUERY_AUDIT = os.environ.get('QUERY_AUDIT') or None
+    QUERY_AUDIT_REPEAT_LIMIT = int(os.environ.get('QUERY_AUDIT_REPEAT_LIMIT', 5))
+
+    # Background jobs (flask run-jobs): pool size (default: CPU count), queue poll
+    # interval, seconds before a 'running' job is presumed dead, and attempts per job
+    JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 0)) or None
+    JOB_POLL_INTERVAL = float(os.environ.get('JOB_POLL_INTERVAL', 1.0))
+    JOB_TIMEOUT = int(os.environ.get('JOB_TIMEOUT', 600))
+    JOB_MAX_ATTEMPTS = int(os.environ.get('JOB_MAX_ATTEMPTS', 3))
+    # Where rendered invoice PDFs are kept
+    INVOICE_DIR = os.environ.get('INVOICE_DIR') or os.path.join(os.path.dirname(__file__), 'instance', 'invoices')
+
+    # CSV import: rows per executemany/commit, and per-row errors kept in the report
+    IMPORT_CHUNK_SIZE = int(os.environ.get('IMPORT_CHUNK_SIZE', 1000))
+    IMPORT_MAX_ERRORS = int(os.environ.get('IMPORT_MAX_ERRORS', 1000))
+
+    # Exports (/export/<name>.<fmt>): rows fetched and written per batch
+    EXPORT_BATCH_SIZE = int(os.environ.get('EXPORT_BATCH_SIZE', 5000))
+
+    # Global search (app/search_utils.py): a broad query is ranked over its newest
+    # SEARCH_RANK_LIMIT matches only, so its cost does not grow with the tables
+    SEARCH_RANK_LIMIT = int(os.environ.get('SEARCH_RANK_LIMIT', 1000))
@@ -0,0 +1,159 @@
+"""
+Index benchmark
+
+Seeds a large throwaway SQLite database without the performance indexes from
+migration m0003, then for each index runs the query it exists for, prints
+the query plan and median latency, creates the index and measures again.
+
+Usage: python scripts/bench_indexes.py [--scale 1.0] [--repeat 20]
+(--scale 1 is 500k orders, 200k purchases and batches, 100k of each
+finance/HR table.) Your erp.db is not touched.
+"""
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+# Ensure project root is importable when the script is executed from scripts/
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+KEYSET = 'ORDER BY {0} DESC, id DESC LIMIT 50'
+
+# index -> (query it serves, parameters)
+BENCHMARKS = {
+    'ix_order_date': ('SELECT * FROM "order" ' + KEYSET.format('order_date'), ()),
+    'ix_order_item_date': ('SELECT * FROM "order" WHERE item_id = ? ' + KEYSET.format('order_date'), (7,)),
+    'ix_order_customer_date': ('SELECT * FROM "order" WHERE customer_id = ? ' + KEYSET.format('order_date'), (7,)),
+    'ix_order_invoiced_customer': ('SELECT id, customer_id FROM "order" WHERE invoiced = 0 '
+                                   'ORDER BY customer_id, id', ()),
+    'ix_purchase_date': ('SELECT * FROM purchase ' + KEYSET.format('purchase_date'), ()),
+    'ix_purchase_item_date': ('SELECT * FROM purchase WHERE item_id = ? ' + KEYSET.format('purchase_date'), (7,)),
+    'ix_purchase_supplier_date': ('SELECT * FROM purchase WHERE supplier_id = ? '
+                                  + KEYSET.format('purchase_date'), (7,)),
+    'ix_batch_warehouse_item_active': ('SELECT count(*) FROM inventory_batches '
+                                       'WHERE warehouse_id = ? AND is_active = 1', (3,)),
+    'ix_batch_received': ('SELECT * FROM inventory_batches ' + KEYSET.format('received_date'), ()),
+    'ix_batch_item_received': ('SELECT * FROM inventory_batches WHERE item_id = ? '
+                               + KEYSET.format('received_date'), (7,)),
+    'ix_customer_created': ('SELECT * FROM customer ' + KEYSET.format('created_at'), ()),
+    'ix_attendance_date': ('SELECT * FROM attendances ORDER BY date DESC LIMIT 100', ()),
+    'ix_payroll_period_start': ('SELECT * FROM payrolls ORDER BY period_start DESC LIMIT 100', ()),
+    'ix_leave_start_date': ('SELECT * FROM leaves ORDER BY start_date DESC LIMIT 100', ()),
+    'ix_billing_date_amount': ('SELECT coalesce(sum(amount), 0) FROM billings '
+                               'WHERE date_issued >= ? AND date_issued <= ?', ('2024-03-01', '2024-03-31')),
+    'ix_expense_date_amount': ('SELECT coalesce(sum(amount), 0) FROM expenses '
+                               'WHERE date >= ? AND date <= ?', ('2024-03-01', '2024-03-31')),
+}
+
+
+def _stamp(rng, days=730):
+    return str(datetime(2023, 1, 1) + timedelta(seconds=rng.randrange(days * 86400)))
+
+
+def _day(rng, days=730):
+    return str(date(2023, 1, 1) + timedelta(days=rng.randrange(days)))
+
+
+def seed(conn, scale, rng):
+    n = lambda count: max(1, int(count * scale))
+    items, customers, suppliers, warehouses, employees = n(5000), n(20000), n(2000), 20, n(1000)
+    rows = lambda sql, gen: conn.executemany(sql, gen)
+    rows('INSERT INTO item (id, name, quantity, price, reorder_point, max_stock) VALUES (?, ?, 100, 1, 10, 100)',
+         ((i, f'Item {i}') for i in range(1, items + 1)))
+    rows('INSERT INTO customer (id, name, created_at) VALUES (?, ?, ?)',
+         ((i, f'Customer {i}', _stamp(rng)) for i in range(1, customers + 1)))
+    rows('INSERT INTO supplier (id, name, created_at) VALUES (?, ?, ?)',
+         ((i, f'Supplier {i}', _stamp(rng)) for i in range(1, suppliers + 1)))
+    rows('INSERT INTO warehouse (id, name, location, is_active) VALUES (?, ?, ?, 1)',
+         ((i, f'Warehouse {i}', 'Site') for i in range(1, warehouses + 1)))
+    rows('INSERT INTO employees (id, name, email) VALUES (?, ?, ?)',
+         ((i, f'Employee {i}', f'e{i}@example.com') for i in range(1, employees + 1)))
+    rows('INSERT INTO "order" (item_id, quantity, customer_id, order_date, invoiced) VALUES (?, 1, ?, ?, ?)',
+         ((rng.randint(1, items), rng.randint(1, customers), _stamp(rng), rng.random() < 0.95)
+          for _ in range(n(500000))))
+    rows('INSERT INTO purchase (item_id, supplier_id, quantity, purchase_date) VALUES (?, ?, 10, ?)',
+         ((rng.randint(1, items), rng.randint(1, suppliers), _stamp(rng)) for _ in range(n(200000))))
+    rows('INSERT INTO inventory_batches (item_id, warehouse_id, batch_number, quantity, received_date, is_active) '
+         'VALUES (?, ?, ?, 5, ?, ?)',
+         ((rng.randint(1, items), rng.randint(1, warehouses), f'B{i}', _stamp(rng), rng.random() < 0.7)
+          for i in range(n(200000))))
+    rows('INSERT INTO billings (reference, customer, amount, date_issued) VALUES (?, ?, ?, ?)',
+         ((f'INV{i}', 'Customer', rng.randint(1, 10000), _day(rng)) for i in range(n(100000))))
+    rows('INSERT INTO expenses (description, amount, date, category) VALUES (?, ?, ?, ?)',
+         (('Expense', rng.randint(1, 1000), _day(rng), 'General') for _ in range(n(100000))))
+    rows('INSERT INTO attendances (employee_id, date, status) VALUES (?, ?, ?)',
+         ((rng.randint(1, employees), _day(rng), 'present') for _ in range(n(100000))))
+    rows('INSERT INTO payrolls (employee_id, period_start, period_end, gross_pay, taxes, net_pay) '
+         'VALUES (?, ?, ?, 1000, 100, 900)',
+         ((rng.randint(1, employees), _day(rng), _day(rng)) for _ in range(n(100000))))
+    rows('INSERT INTO leaves (employee_id, start_date, end_date, leave_type) VALUES (?, ?, ?, ?)',
+         ((rng.randint(1, employees), _day(rng), _day(rng), 'annual') for _ in range(n(100000))))
+    rows('INSERT INTO leads (lead_id, name, created_at) VALUES (?, ?, ?)',
+         ((f'L{i}', f'Lead {i}', _stamp(rng)) for i in range(n(100000))))
+    conn.commit()
+
+
+def plan(conn, sql, params):
+    return '; '.join(row[-1] for row in conn.execute('EXPLAIN QUERY PLAN ' + sql, params))
+
+
+def latency(conn, sql, params, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        conn.execute(sql, params).fetchall()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scale', type=float, default=1.0)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    os.environ['DATABASE_URL'] = 'sqlite:///' + path
+    from sqlalchemy import create_engine
+    from sqlalchemy.dialects import sqlite
+    from sqlalchemy.schema import CreateIndex
+    from app.migrations import m0001_baseline, model_index
+    from app.migrations.m0003_performance_indexes import INDEXES
+
+    # The baseline migration imports every model module, so the metadata is complete
+    engine = create_engine('sqlite:///' + path)
+    with engine.begin() as conn:
+        m0001_baseline.upgrade(conn)
+    engine.dispose()
+
+    conn = sqlite3.connect(path)
+    # The schema as it was before m0003
+    for name in INDEXES:
+        conn.execute(f'DROP INDEX {name}')
+    conn.execute('CREATE INDEX ix_batch_warehouse_item ON inventory_batches (warehouse_id, item_id)')
+    started = time.perf_counter()
+    seed(conn, args.scale, random.Random(42))
+    print(f'seeded in {time.perf_counter() - started:.1f}s\n')
+
+    for name in INDEXES:
+        sql, params = BENCHMARKS[name]
+        before_plan, before = plan(conn, sql, params), latency(conn, sql, params, args.repeat)
+        conn.execute(str(CreateIndex(model_index(name)).compile(dialect=sqlite.dialect())))
+        if name == 'ix_batch_warehouse_item_active':
+            conn.execute('DROP INDEX ix_batch_warehouse_item')
+        after_plan, after = plan(conn, sql, params), latency(conn, sql, params, args.repeat)
+        print(f'{name}: {before:.2f} ms -> {after:.2f} ms (x{before / max(after, 1e-6):.0f})')
+        print(f'    before: {before_plan}')
+        print(f'    after:  {after_plan}')
+    conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""
+Oversell stress benchmark
+
+Fires thousands of concurrent single-unit orders at one hot SKU from several
+worker processes (like gunicorn workers) and checks that the final stock,
+the number of successful orders and the starting stock agree.
+
+Usage: python scripts/bench_oversell.py [--orders 2000] [--workers 8] [--stock 1500]
+Runs against a throwaway SQLite file; your erp.db is not touched.
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+# Ensure project root is importable when the script is executed from scripts/
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+def _worker(args):
+    item_id, orders = args
+    from app import create_app, db
+    from app.stock_utils import place_order, InsufficientStock
+    app = create_app()
+
+    placed = refused = errors = 0
+    with app.app_context():
+        for _ in range(orders):
+            try:
+                place_order(item_id, 1)
+                placed += 1
+            except InsufficientStock:
+                refused += 1
+            except Exception as e:
+                errors += 1
+                print(f'worker {os.getpid()}: {e}', file=sys.stderr)
+        db.session.remove()
+    return placed, refused, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--orders', type=int, default=2000)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--stock', type=int, default=1500)
+    args = parser.parse_args()
+
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db')
+    from app import create_app, db
+    from app.models import Item, Order
+    app = create_app()
+
+    with app.app_context():
+        db.create_all()
+        item = Item(name='Hot SKU', quantity=args.stock, price=1)
+        db.session.add(item)
+        db.session.commit()
+        item_id = item.id
+        db.session.remove()
+        db.engine.dispose()
+
+    per_worker = [args.orders // args.workers] * args.workers
+    per_worker[0] += args.orders - sum(per_worker)
+
+    started = time.perf_counter()
+    with multiprocessing.get_context('spawn').Pool(args.workers) as pool:
+        results = pool.map(_worker, [(item_id, n) for n in per_worker])
+    elapsed = time.perf_counter() - started
+
+    placed, refused, errors = (sum(r[i] for r in results) for i in range(3))
+    with app.app_context():
+        final_stock = db.session.get(Item, item_id).quantity
+        order_units = db.session.query(db.func.coalesce(db.func.sum(Order.quantity), 0)).scalar()
+
+    print(f'{args.orders} orders from {args.workers} workers in {elapsed:.2f}s '
+          f'({args.orders / elapsed:.0f} orders/s)')
+    print(f'placed={placed} refused={refused} errors={errors} final_stock={final_stock}')
+
+    assert final_stock >= 0, 'stock went negative'
+    assert order_units == placed, 'orders recorded do not match successful placements'
+    assert final_stock == args.stock - placed, 'final stock does not match orders placed'
+    assert placed == min(args.stock, args.orders - errors), 'orders refused while stock remained'
+    print('OK: no oversell')
+
+
+if __name__ == '__main__':
+    main()
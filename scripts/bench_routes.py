@@ -0,0 +1,151 @@
+"""
+Route benchmark
+
+Times every major page through the Flask test client against a large
+synthetic dataset (app/seed_utils.py) and records, per route, the status,
+query count and p50/p95 latency. Compare against a saved baseline to catch
+regressions: a route regresses when its p95 grows by more than --tolerance
+(and by at least --min-ms, so fast pages don't trip on noise) or when it
+issues more queries than before (exit status 1).
+
+Usage: python scripts/bench_routes.py [--scale 0.1] [--repeat 20] [--db bench.db]
+                                      [--save baseline.json] [--baseline baseline.json] [--tolerance 0.25]
+Without --db a throwaway SQLite file is seeded; with --db the file is seeded
+only when empty, so later runs reuse it. Your erp.db is not touched.
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import sys
+import tempfile
+import time
+
+# Ensure project root is importable when the script is executed from scripts/
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+ROUTES = (
+    '/dashboard',
+    '/reports',
+    '/inventory',
+    '/sales',
+    '/purchases',
+    '/customers',
+    '/batches',
+    '/warehouses',
+    '/warehouse/1/stock',
+    '/stock/alerts',
+    '/invoice',
+    '/crm/',
+    '/crm/leads',
+    '/hrm/employees',
+    '/hrm/attendance',
+    '/hrm/payroll',
+    '/hrm/leaves',
+    '/finance/billing',
+    '/finance/expenses',
+    '/finance/accounts',
+)
+
+_QUERIES = re.compile(r'desc="(\d+) queries"')
+
+
+def percentile(timings, pct):
+    ordered = sorted(timings)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def measure(client, url, repeat):
+    client.get(url)  # warm-up: template compilation, page cache
+    timings, queries, status = [], 0, None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        response = client.get(url)
+        timings.append((time.perf_counter() - started) * 1000)
+        status = response.status_code
+        match = _QUERIES.search(response.headers.get('Server-Timing', ''))
+        queries = int(match.group(1)) if match else 0
+    return {'status': status, 'queries': queries, 'p50_ms': round(statistics.median(timings), 2),
+            'p95_ms': round(percentile(timings, 95), 2)}
+
+
+def regressions(results, baseline, tolerance, min_ms):
+    found = []
+    for url, result in results.items():
+        before = baseline.get(url)
+        if not before:
+            continue
+        growth = result['p95_ms'] - before['p95_ms']
+        if growth > before['p95_ms'] * tolerance and growth >= min_ms:
+            found.append(f"{url}: p95 {before['p95_ms']} ms -> {result['p95_ms']} ms")
+        if result['queries'] > before['queries']:
+            found.append(f"{url}: {before['queries']} -> {result['queries']} queries")
+        if result['status'] != before['status']:
+            found.append(f"{url}: status {before['status']} -> {result['status']}")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scale', type=float, default=0.1, help='dataset size; 1.0 is 2M orders')
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--db', help='SQLite file to reuse (seeded when empty)')
+    parser.add_argument('--save', help='write the results to this JSON file')
+    parser.add_argument('--baseline', help='compare against this JSON file')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed p95 growth (0.25 = 25%%)')
+    parser.add_argument('--min-ms', type=float, default=5.0, help='ignore p95 growth below this many ms')
+    args = parser.parse_args()
+
+    path = os.path.abspath(args.db) if args.db else os.path.join(tempfile.mkdtemp(), 'bench.db')
+    os.environ['DATABASE_URL'] = 'sqlite:///' + path
+    from app import create_app, db
+    from app.migrations import upgrade
+    from app.models import Item, User
+    from app.seed_utils import generate_dataset
+    app = create_app()
+
+    app.config['WTF_CSRF_ENABLED'] = False
+    with app.app_context():
+        upgrade()
+        if not db.session.query(Item.id).first():
+            started = time.perf_counter()
+            generate_dataset(scale=args.scale)
+            print(f'seeded scale {args.scale} in {time.perf_counter() - started:.1f}s')
+        admin = User.query.filter_by(username='bench-admin').first()
+        if admin is None:
+            admin = User(username='bench-admin', role='Admin')
+            admin.set_password('bench')
+            db.session.add(admin)
+            db.session.commit()
+        admin_id = admin.id
+        db.session.remove()
+
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(admin_id)
+
+    results = {}
+    for url in ROUTES:
+        results[url] = measure(client, url, args.repeat)
+        r = results[url]
+        print(f"{url:22} {r['status']}  {r['queries']:4} queries  p50 {r['p50_ms']:9.2f} ms  p95 {r['p95_ms']:9.2f} ms")
+
+    if args.save:
+        with open(args.save, 'w') as out:
+            json.dump(results, out, indent=2, sort_keys=True)
+        print(f'results written to {args.save}')
+    if args.baseline:
+        with open(args.baseline) as f:
+            found = regressions(results, json.load(f), args.tolerance, args.min_ms)
+        for line in found:
+            print('REGRESSION ' + line)
+        if found:
+            sys.exit(1)
+        print('no regressions against ' + args.baseline)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""
+SQLite engine profile benchmark
+
+Runs a mixed read/write workload from several worker processes (like gunicorn
+workers) for a fixed time, once with the driver defaults (SQLITE_TUNING=0) and
+once with the engine profile (WAL, pragmas, BEGIN IMMEDIATE for writes), and
+prints read/write throughput and errors for each.
+
+Reads fetch one item and a page of the item list; writes place a one-unit
+order through place_order (conditional UPDATE, movement, rollups).
+
+Usage: python scripts/bench_sqlite.py [--workers 8] [--seconds 10] [--write-ratio 0.2] [--items 500]
+Runs against throwaway SQLite files; your erp.db is not touched.
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+
+# Ensure project root is importable when the script is executed from scripts/
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+PROFILES = (('default', '0'), ('tuned', '1'))
+
+
+def _setup(items):
+    from app import create_app, db
+    from app.models import Item
+    app = create_app()
+
+    with app.app_context():
+        db.create_all()
+        db.session.add_all(Item(name=f'Item {n}', quantity=10 ** 6, price=1) for n in range(items))
+        db.session.commit()
+        db.session.remove()
+    return True
+
+
+def _worker(args):
+    seconds, write_ratio, items, seed = args
+    from app import create_app, db
+    from app.models import Item
+    from app.stock_utils import place_order
+    app = create_app()
+
+    rng = random.Random(seed)
+    reads = writes = errors = 0
+    deadline = time.perf_counter() + seconds
+    with app.app_context():
+        while time.perf_counter() < deadline:
+            item_id = rng.randint(1, items)
+            try:
+                if rng.random() < write_ratio:
+                    place_order(item_id, 1)
+                    writes += 1
+                else:
+                    db.session.get(Item, item_id)
+                    Item.query.order_by(Item.id).limit(50).all()
+                    reads += 1
+            except Exception as e:
+                errors += 1
+                print(f'worker {os.getpid()}: {e}', file=sys.stderr)
+            finally:
+                # One session per "request", as in the web app
+                db.session.remove()
+    return reads, writes, errors
+
+
+def _run(profile, tuning, args):
+    os.environ['SQLITE_TUNING'] = tuning
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), f'bench_{profile}.db')
+    ctx = multiprocessing.get_context('spawn')
+    with ctx.Pool(1) as pool:
+        pool.apply(_setup, (args.items,))
+    with ctx.Pool(args.workers) as pool:
+        # Each worker runs for exactly args.seconds once started, so process start-up is not counted
+        results = pool.map(_worker, [(args.seconds, args.write_ratio, args.items, n) for n in range(args.workers)])
+    reads, writes, errors = (sum(r[i] for r in results) for i in range(3))
+    print(f'{profile:>8}: {reads / args.seconds:8.0f} reads/s {writes / args.seconds:7.0f} writes/s '
+          f'{errors:5d} errors  ({args.workers} workers)')
+    return reads / args.seconds, writes / args.seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--write-ratio', type=float, default=0.2)
+    parser.add_argument('--items', type=int, default=500)
+    args = parser.parse_args()
+
+    (base_reads, base_writes), (reads, writes) = (_run(profile, tuning, args) for profile, tuning in PROFILES)
+    print(f'   speedup: reads x{reads / max(base_reads, 1e-9):.2f}, writes x{writes / max(base_writes, 1e-9):.2f}')
+
+
+if __name__ == '__main__':
+    main()
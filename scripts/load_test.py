@@ -0,0 +1,308 @@
+"""
+Closed-loop load test
+
+Runs the app under gunicorn the way the Procfile does (gunicorn --preload run:app).
+Many concurrent clients log in as the default users (admin, manager and
+staff) and replay a weighted mix of dashboard polls, order entry, stock
+transfers, stock matrix reads and report views. Each client sends its next
+request as soon as the previous one returns, optionally after a think time.
+
+Each stage runs a fixed number of clients for --duration seconds. For every
+stage and endpoint it reports throughput, p50/p95/p99 latency, the database
+share of the time (from the Server-Timing header) and the error rate. Passing
+several client counts (--clients 1,4,16,32) sweeps the load. The sweep shows
+where throughput stops growing (saturation) and which stages still meet the
+latency/error SLO (--slo-p95, --max-error-rate). A stage where the write
+endpoints slow down while their DB time stays low is waiting on the SQLite
+write lock. Exit status 1 when no stage meets the SLO.
+
+Usage: python scripts/load_test.py [--clients 1,4,16] [--duration 20] [--workers 4] [--scale 0.01]
+       python scripts/load_test.py --url http://127.0.0.1:8000 [--clients 8]
+Without --url a throwaway database is seeded (app/seed_utils.py) and
+gunicorn is started on it; your erp.db is not touched. Run the harness from
+a separate machine for loads a single host cannot generate.
+"""
+import argparse
+import json
+import os
+import random
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import defaultdict
+from http.cookiejar import CookieJar
+
+# Ensure project root is importable when the script is executed from scripts/
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+# The default users `flask --app run init` creates
+USERS = (('admin', 'adminpass', 'Admin'), ('manager', 'managerpass', 'Manager'), ('staff', 'staffpass', 'Staff'))
+
+# action -> (weight, roles allowed to perform it)
+MIX = {
+    'dashboard': (40, ('Admin', 'Manager', 'Staff')),
+    'order': (25, ('Admin', 'Manager', 'Staff')),
+    'transfer': (10, ('Admin', 'Manager')),
+    'stock_matrix': (10, ('Admin', 'Manager')),
+    'reports': (15, ('Admin',)),
+}
+
+_DB_TIME = re.compile(r'db;dur=([\d.]+)')
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class Client:
+    """One logged-in user with its own cookie jar"""
+
+    def __init__(self, base_url, username, password, role):
+        self.base_url, self.role = base_url.rstrip('/'), role
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(CookieJar()), _NoRedirect())
+        # Success and failure both redirect; only success lands on the dashboard
+        status, _, headers = self.request('POST', '/login', form={'username': username, 'password': password,
+                                                                  'role': role})
+        if status != 302 or not headers.get('Location', '').endswith('/dashboard'):
+            raise RuntimeError(f'could not log in as {username}')
+
+    def request(self, method, path, form=None, payload=None):
+        """(status, body, headers); redirects are returned, not followed"""
+        headers, data = {}, None
+        if form is not None:
+            data = urllib.parse.urlencode(form).encode()
+        elif payload is not None:
+            data, headers['Content-Type'] = json.dumps(payload).encode(), 'application/json'
+        req = urllib.request.Request(self.base_url + path, data=data, headers=headers, method=method)
+        try:
+            with self.opener.open(req, timeout=60) as response:
+                return response.status, response.read(), response.headers
+        except urllib.error.HTTPError as e:
+            return e.code, e.read(), e.headers
+
+
+def db_time(headers):
+    """Database milliseconds from the Server-Timing header, when the app reports it"""
+    match = _DB_TIME.search(headers.get('Server-Timing', ''))
+    return float(match.group(1)) if match else None
+
+
+class Workload:
+    """Picks the next request for a client; stock targets come from the stock matrix"""
+
+    def __init__(self, client):
+        status, body, _ = client.request('GET', '/api/stock/matrix?limit=200')
+        if status != 200:
+            raise RuntimeError(f'/api/stock/matrix returned {status}')
+        items = json.loads(body)['items']
+        self.stocked = [item['id'] for item in items if item['total'] > 0] or [1]
+        self.placements = [(item['id'], int(wh)) for item in items for wh, qty in item['stock'].items() if qty > 0]
+        self.warehouses = [w['id'] for w in json.loads(body)['warehouses']]
+        # Every action in MIX must run; dropping one would silently change the mix being measured
+        if not self.placements or len(self.warehouses) < 2:
+            raise RuntimeError('transfers need stock in one of at least two warehouses; '
+                               f'found {len(self.warehouses)} warehouse(s), {len(self.placements)} stocked placement(s)')
+
+    def actions(self, role):
+        names = [name for name, (_, roles) in MIX.items() if role in roles]
+        return names, [MIX[name][0] for name in names]
+
+    def run(self, client, action, rng):
+        if action == 'dashboard':
+            return client.request('GET', '/dashboard?partial=1')
+        if action == 'order':
+            return client.request('POST', '/sales', form={'item_id': rng.choice(self.stocked), 'quantity': 1})
+        if action == 'transfer':
+            item_id, source = rng.choice(self.placements)
+            target = rng.choice([w for w in self.warehouses if w != source])
+            return client.request('POST', '/api/stock/transfers', payload={
+                'from_warehouse_id': source, 'to_warehouse_id': target, 'lines': [{'item_id': item_id, 'quantity': 1}]})
+        if action == 'stock_matrix':
+            return client.request('GET', '/api/stock/matrix')
+        return client.request('GET', '/reports')
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def run_stage(base_url, workload, clients, duration, warmup, think_ms, seed):
+    """Run `clients` closed-loop users; returns {action: [(latency_ms, status, db_ms)]}"""
+    samples = defaultdict(list)
+    lock = threading.Lock()
+    started = time.perf_counter()
+    measure_from, stop_at = started + warmup, started + warmup + duration
+    errors = []
+
+    def user(n):
+        try:
+            client = Client(base_url, *USERS[n % len(USERS)])
+        except Exception as e:
+            errors.append(e)
+            return
+        rng = random.Random(seed + n)
+        names, weights = workload.actions(client.role)
+        while time.perf_counter() < stop_at:
+            action = rng.choices(names, weights)[0]
+            sent = time.perf_counter()
+            try:
+                status, _, headers = workload.run(client, action, rng)
+                db_ms = db_time(headers)
+            except OSError:
+                status, db_ms = 0, None  # connection refused/reset or timeout
+            done = time.perf_counter()
+            if sent >= measure_from and done <= stop_at:
+                with lock:
+                    samples[action].append(((done - sent) * 1000, status, db_ms))
+            if think_ms:
+                time.sleep(rng.expovariate(1000 / think_ms))
+
+    threads = [threading.Thread(target=user, args=(n,), daemon=True) for n in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise RuntimeError(f'{len(errors)} clients failed to start: {errors[0]}')
+    return samples
+
+
+def summarize(samples, duration):
+    report = {}
+    for action in sorted(samples):
+        latencies = [s[0] for s in samples[action]]
+        # 409 is a refused transfer (not enough stock), a business outcome rather than a failure
+        failed = sum(1 for s in samples[action] if s[1] == 0 or (s[1] >= 400 and s[1] != 409))
+        db_times = [s[2] for s in samples[action] if s[2] is not None]
+        report[action] = {
+            'requests': len(latencies), 'rps': round(len(latencies) / duration, 2),
+            'p50_ms': round(statistics.median(latencies), 1), 'p95_ms': round(percentile(latencies, 95), 1),
+            'p99_ms': round(percentile(latencies, 99), 1),
+            'db_p95_ms': round(percentile(db_times, 95), 1) if db_times else None,
+            'error_rate': round(failed / len(latencies), 4),
+        }
+    total = sum(r['requests'] for r in report.values())
+    failed = sum(r['requests'] * r['error_rate'] for r in report.values())
+    report['ALL'] = {'requests': total, 'rps': round(total / duration, 2),
+                     'error_rate': round(failed / total, 4) if total else 0.0}
+    return report
+
+
+def meets_slo(report, slo_p95, max_error_rate):
+    return all(r['p95_ms'] <= slo_p95 and r['error_rate'] <= max_error_rate
+               for action, r in report.items() if action != 'ALL') and bool(report['ALL']['requests'])
+
+
+def print_stage(clients, report, ok):
+    print(f"\n{clients} clients: {report['ALL']['rps']} req/s, error rate {report['ALL']['error_rate']:.2%}, "
+          f"SLO {'met' if ok else 'BREACHED'}")
+    print(f"  {'endpoint':14} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'db p95':>8} {'errors':>7}")
+    for action, r in report.items():
+        if action != 'ALL':
+            db = f"{r['db_p95_ms']:8.1f}" if r['db_p95_ms'] is not None else '       -'
+            print(f"  {action:14} {r['rps']:8.2f} {r['p50_ms']:8.1f} {r['p95_ms']:8.1f} {r['p99_ms']:8.1f} "
+                  f"{db} {r['error_rate']:7.2%}")
+
+
+def start_server(workers, scale):
+    """Seed a throwaway database and start gunicorn --preload run:app on it; returns (process, base_url)"""
+    path = os.path.join(tempfile.mkdtemp(), 'load.db')
+    os.environ['DATABASE_URL'] = 'sqlite:///' + path
+    from app import create_app, db
+    from app.commands import init_database
+    from app.seed_utils import generate_dataset
+    app = create_app()
+
+    with app.app_context():
+        init_database()  # schema and default users, as `flask --app run init` does
+        generate_dataset(scale=scale)
+        db.session.remove()
+        db.engine.dispose()
+
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        port = s.getsockname()[1]
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '--preload', 'run:app', '--workers', str(workers), '--bind', f'127.0.0.1:{port}'],
+        cwd=ROOT, env=dict(os.environ), stdout=subprocess.DEVNULL,
+    )
+    base_url = f'http://127.0.0.1:{port}'
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError('gunicorn exited; is it installed (pip install gunicorn)?')
+        try:
+            urllib.request.urlopen(base_url + '/login', timeout=2).close()
+            return process, base_url
+        except OSError:
+            time.sleep(0.5)
+    process.terminate()
+    raise RuntimeError('gunicorn did not start within 60s')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--url', help='target a running server instead of starting gunicorn')
+    parser.add_argument('--clients', default='1,4,16', help='comma-separated concurrent clients per stage')
+    parser.add_argument('--duration', type=float, default=20, help='measured seconds per stage')
+    parser.add_argument('--warmup', type=float, default=3, help='unmeasured seconds before each stage')
+    parser.add_argument('--think', type=float, default=0, help='mean think time between requests (ms)')
+    parser.add_argument('--workers', type=int, default=4, help='gunicorn workers (without --url)')
+    parser.add_argument('--scale', type=float, default=0.01, help='seeded dataset size (without --url)')
+    parser.add_argument('--slo-p95', type=float, default=1000, help='p95 latency objective per endpoint (ms)')
+    parser.add_argument('--max-error-rate', type=float, default=0.01)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--save', help='write every stage report to this JSON file')
+    args = parser.parse_args()
+
+    stages = [int(n) for n in args.clients.split(',')]
+    process, base_url = (None, args.url) if args.url else start_server(args.workers, args.scale)
+    results = []
+    try:
+        workload = Workload(Client(base_url, *USERS[1]))
+        for clients in stages:
+            samples = run_stage(base_url, workload, clients, args.duration, args.warmup, args.think, args.seed)
+            report = summarize(samples, args.duration)
+            ok = meets_slo(report, args.slo_p95, args.max_error_rate)
+            print_stage(clients, report, ok)
+            results.append({'clients': clients, 'slo_met': ok, 'endpoints': report})
+    finally:
+        if process:
+            process.terminate()
+            process.wait()
+
+    # Saturation: the first stage whose throughput gains less than 10% over the previous one
+    for previous, current in zip(results, results[1:]):
+        if current['endpoints']['ALL']['rps'] < previous['endpoints']['ALL']['rps'] * 1.1:
+            print(f"\nsaturation: throughput flattens at {previous['clients']} clients "
+                  f"({previous['endpoints']['ALL']['rps']} req/s)")
+            break
+    within = [r for r in results if r['slo_met']]
+    if within:
+        best = max(within, key=lambda r: r['endpoints']['ALL']['rps'])
+        print(f"capacity within SLO: {best['clients']} clients, {best['endpoints']['ALL']['rps']} req/s")
+
+    if args.save:
+        with open(args.save, 'w') as out:
+            json.dump({'slo_p95_ms': args.slo_p95, 'max_error_rate': args.max_error_rate, 'stages': results},
+                      out, indent=2)
+        print(f'results written to {args.save}')
+    if not within:
+        print('no stage met the SLO')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -6,7 +6,8 @@ ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 if ROOT not in sys.path:
     sys.path.insert(0, ROOT)
 
-from app import app
+from app import create_app
+app = create_app()
 
 if __name__ == '__main__':
     # Render dashboard template inside test request context to catch template errors
@@ -1,2 +1,57 @@
 // Minimal JS for future enhancements
 console.log('Simple ERP loaded');
+
+// Infinite scroll for keyset-paginated tables.
+// A `.keyset-more` element carries the JSON endpoint (data-url), the next cursor
+// (data-cursor) and the tbody to append to (data-target). Pages are fetched when
+// the element scrolls into view or its button is clicked.
+(function(){
+    function loadNext(more){
+        if(more.dataset.loading === '1' || !more.dataset.cursor) return;
+        more.dataset.loading = '1';
+
+        var url = new URL(more.dataset.url, window.location.origin);
+        url.searchParams.set('cursor', more.dataset.cursor);
+
+        fetch(url, {headers: {'Accept': 'application/json'}})
+            .then(function(resp){
+                if(!resp.ok) throw new Error('HTTP ' + resp.status);
+                return resp.json();
+            })
+            .then(function(data){
+                var body = document.querySelector(more.dataset.target);
+                if(body) body.insertAdjacentHTML('beforeend', data.rows_html);
+                if(data.next_cursor){
+                    more.dataset.cursor = data.next_cursor;
+                } else {
+                    more.remove();
+                }
+            })
+            .catch(function(e){
+                console.error('Failed to load next page', e);
+            })
+            .finally(function(){
+                more.dataset.loading = '0';
+            });
+    }
+
+    function init(){
+        var observer = ('IntersectionObserver' in window) ? new IntersectionObserver(function(entries){
+            entries.forEach(function(entry){
+                if(entry.isIntersecting) loadNext(entry.target);
+            });
+        }, {rootMargin: '400px'}) : null;
+
+        document.querySelectorAll('.keyset-more').forEach(function(more){
+            var button = more.querySelector('button');
+            if(button) button.addEventListener('click', function(){ loadNext(more); });
+            if(observer) observer.observe(more);
+        });
+    }
+
+    if(document.readyState === 'loading'){
+        document.addEventListener('DOMContentLoaded', init);
+    } else {
+        init();
+    }
+})();
@@ -0,0 +1,127 @@
+// Typeahead for row pickers (app/lookup_utils.py).
+// A text input with data-lookup (the /api/lookup/<entity> URL) and
+// data-lookup-target (the id of the hidden input that is submitted) shows the
+// rows whose name starts with what was typed; picking one stores its id.
+(function(){
+    var DELAY_MS = 150;
+
+    function attach(input){
+        var target = document.getElementById(input.dataset.lookupTarget);
+        if(!target) return;
+
+        var menu = document.createElement('div');
+        menu.className = 'dropdown-menu';
+        menu.style.maxHeight = '18rem';
+        menu.style.overflowY = 'auto';
+        input.insertAdjacentElement('afterend', menu);
+
+        var timer = null, seq = 0, active = -1;
+
+        function hide(){
+            menu.classList.remove('show');
+            active = -1;
+        }
+
+        function highlight(index){
+            var options = menu.querySelectorAll('.dropdown-item');
+            if(!options.length) return;
+            active = (index + options.length) % options.length;
+            options.forEach(function(option, i){ option.classList.toggle('active', i === active); });
+            options[active].scrollIntoView({block: 'nearest'});
+        }
+
+        function choose(result){
+            input.value = result.label;
+            target.value = result.id;
+            target.dispatchEvent(new Event('change', {bubbles: true}));
+            hide();
+        }
+
+        function render(results){
+            menu.innerHTML = '';
+            if(!results.length){
+                var empty = document.createElement('span');
+                empty.className = 'dropdown-item-text text-muted small';
+                empty.textContent = 'No matches';
+                menu.appendChild(empty);
+            }
+            results.forEach(function(result){
+                var option = document.createElement('button');
+                option.type = 'button';
+                option.className = 'dropdown-item';
+                option.textContent = result.label;
+                if(result.hint){
+                    var hint = document.createElement('small');
+                    hint.className = 'text-muted ms-2';
+                    hint.textContent = result.hint;
+                    option.appendChild(hint);
+                }
+                // mousedown fires before the input's blur
+                option.addEventListener('mousedown', function(e){
+                    e.preventDefault();
+                    choose(result);
+                });
+                menu.appendChild(option);
+            });
+            menu.style.top = (input.offsetTop + input.offsetHeight) + 'px';
+            menu.style.left = input.offsetLeft + 'px';
+            menu.style.minWidth = input.offsetWidth + 'px';
+            menu.classList.add('show');
+            active = -1;
+        }
+
+        function lookup(){
+            var url = new URL(input.dataset.lookup, window.location.origin);
+            url.searchParams.set('q', input.value.trim());
+            var current = ++seq;
+            fetch(url, {headers: {'Accept': 'application/json'}})
+                .then(function(resp){
+                    if(!resp.ok) throw new Error('HTTP ' + resp.status);
+                    return resp.json();
+                })
+                .then(function(data){
+                    // Ignore answers to queries the user has already typed past
+                    if(current === seq && document.activeElement === input) render(data.results);
+                })
+                .catch(function(e){
+                    console.error('Lookup failed', e);
+                });
+        }
+
+        input.addEventListener('input', function(){
+            // Typing invalidates the previous choice until a row is picked
+            target.value = '';
+            clearTimeout(timer);
+            timer = setTimeout(lookup, DELAY_MS);
+        });
+        input.addEventListener('focus', function(){
+            if(!target.value) lookup();
+        });
+        input.addEventListener('blur', function(){
+            clearTimeout(timer);
+            hide();
+        });
+        input.addEventListener('keydown', function(e){
+            if(!menu.classList.contains('show')) return;
+            if(e.key === 'ArrowDown' || e.key === 'ArrowUp'){
+                e.preventDefault();
+                highlight(active + (e.key === 'ArrowDown' ? 1 : -1));
+            } else if(e.key === 'Enter' && active >= 0){
+                e.preventDefault();
+                menu.querySelectorAll('.dropdown-item')[active].dispatchEvent(new MouseEvent('mousedown'));
+            } else if(e.key === 'Escape'){
+                hide();
+            }
+        });
+    }
+
+    function init(){
+        document.querySelectorAll('input[data-lookup]').forEach(attach);
+    }
+
+    if(document.readyState === 'loading'){
+        document.addEventListener('DOMContentLoaded', init);
+    } else {
+        init();
+    }
+})();
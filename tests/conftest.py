@@ -0,0 +1,37 @@
+import pytest
+
+from app import create_app, db
+
+
+@pytest.fixture
+def config(tmp_path):
+    """Settings for one test's app; a test module adds to them by overriding this fixture"""
+    config = type('C', (), {})()
+    config.SQLALCHEMY_DATABASE_URI = 'sqlite:///' + str(tmp_path / 'test.db')
+    config.SECRET_KEY = 'test'
+    config.WTF_CSRF_ENABLED = False
+    return config
+
+
+@pytest.fixture
+def app_with_db(config):
+    """An app on an empty database, inside its app context"""
+    app = create_app(config)
+    app.testing = True
+    with app.app_context():
+        db.create_all()
+        yield app
+
+
+@pytest.fixture
+def client(app_with_db):
+    """A test client signed in as an Admin"""
+    from app.models import User
+    admin = User(username='admin', role='Admin')
+    admin.set_password('secret')
+    db.session.add(admin)
+    db.session.commit()
+    client = app_with_db.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(admin.id)
+    return client
@@ -0,0 +1,106 @@
+from datetime import datetime, timedelta
+from app import db
+
+
+def _open_alerts():
+    from app.models import StockAlert
+    return sorted((a.item.name, a.alert_type) for a in StockAlert.query.filter_by(is_resolved=False))
+
+
+def test_bulk_evaluation_is_idempotent_and_closes_cleared_alerts(app_with_db):
+    from app.models import Item, Warehouse, InventoryBatch
+    from app.alert_utils import evaluate_stock_alerts
+
+    low = Item(name='Low', quantity=2, reorder_point=10, max_stock=100)
+    high = Item(name='High', quantity=500, reorder_point=10, max_stock=100)
+    ok = Item(name='Ok', quantity=50, reorder_point=10, max_stock=100)
+    warehouse = Warehouse(name='Main', location='HQ')
+    db.session.add_all([low, high, ok, warehouse])
+    db.session.flush()
+    db.session.add(InventoryBatch(item_id=ok.id, warehouse_id=warehouse.id, batch_number='OLD',
+                                  quantity=5, expiry_date=datetime.utcnow() - timedelta(days=1)))
+    db.session.commit()
+
+    assert evaluate_stock_alerts() == {'opened': 3, 'closed': 0, 'expired_batches': 1}
+    assert _open_alerts() == [('High', 'overstock'), ('Low', 'low_stock'), ('Ok', 'expired')]
+
+    # Nothing changed: no churn
+    assert evaluate_stock_alerts() == {'opened': 0, 'closed': 0, 'expired_batches': 0}
+
+    low.quantity = 20
+    db.session.commit()
+    assert evaluate_stock_alerts([low.id]) == {'opened': 0, 'closed': 1, 'expired_batches': 0}
+    assert _open_alerts() == [('High', 'overstock'), ('Ok', 'expired')]
+
+
+def test_low_stock_api_pages_by_shortage(app_with_db):
+    from app.models import Item, User
+
+    db.session.add_all([Item(name=f'Item {q}', quantity=q, reorder_point=10) for q in (9, 1, 50, 1, 5)])
+    admin = User(username='admin', role='Admin')
+    admin.set_password('secret')
+    db.session.add(admin)
+    db.session.commit()
+    client = app_with_db.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(admin.id)
+
+    seen, cursor = [], None
+    while True:
+        data = client.get('/api/stock/low', query_string={'limit': 2, 'cursor': cursor or ''}).get_json()
+        seen += [item['quantity'] for item in data['items']]
+        cursor = data['next_cursor']
+        if not cursor:
+            break
+    assert seen == [1, 1, 5, 9]
+
+
+def test_expiry_sweep_expires_and_flags_expiring_batches(app_with_db):
+    from app.models import Item, Warehouse, InventoryBatch
+    from app.alert_utils import sweep_expiry
+    from app.inventory_utils import expiring_batches_query
+
+    now = datetime.utcnow()
+    item = Item(name='Milk', quantity=50)
+    warehouse = Warehouse(name='Cold', location='HQ')
+    db.session.add_all([item, warehouse])
+    db.session.flush()
+    for number, days in (('OLD', -1), ('SOON', 3), ('LATER', 30)):
+        db.session.add(InventoryBatch(item_id=item.id, warehouse_id=warehouse.id, batch_number=number,
+                                      quantity=5, expiry_date=now + timedelta(days=days)))
+    db.session.commit()
+
+    assert sweep_expiry(expiry_days=7) == {'opened': 2, 'closed': 0, 'expired_batches': 1}
+    assert _open_alerts() == [('Milk', 'expired'), ('Milk', 'expiring_soon')]
+    assert [b.batch_number for b in expiring_batches_query(7)] == ['SOON']
+
+    # Once the soon-to-expire batch is used up the warning clears
+    InventoryBatch.query.filter_by(batch_number='SOON').one().is_active = False
+    db.session.commit()
+    assert sweep_expiry(expiry_days=7) == {'opened': 0, 'closed': 1, 'expired_batches': 0}
+
+
+def test_alerts_page_shows_the_count_and_pages_the_list(client):
+    from app.models import Item, StockAlert
+
+    item = Item(name='Widget', quantity=1)
+    db.session.add(item)
+    db.session.flush()
+    start = datetime(2024, 1, 1)
+    db.session.add_all([StockAlert(item_id=item.id, alert_type='low_stock', message=f'Alert {n:02d}',
+                                   created_at=start + timedelta(hours=n)) for n in range(5)])
+    db.session.add(StockAlert(item_id=item.id, alert_type='low_stock', message='Done', is_resolved=True))
+    db.session.commit()
+
+    body = client.get('/stock/alerts', query_string={'limit': 2}).data
+    assert b'Active Alerts (5)' in body
+    assert b'Alert 04' in body and b'Alert 03' in body and b'Alert 02' not in body
+
+    seen, cursor = [], None
+    while True:
+        data = client.get('/api/stock/alerts', query_string={'limit': 2, 'cursor': cursor or ''}).get_json()
+        seen += [alert['message'] for alert in data['items']]
+        cursor = data['next_cursor']
+        if not cursor:
+            break
+    assert seen == [f'Alert {n:02d}' for n in (4, 3, 2, 1, 0)]
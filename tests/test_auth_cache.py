@@ -0,0 +1,76 @@
+from app import db
+
+
+def _user(role='Staff'):
+    from app.models import User
+    user = User(username=role.lower(), role=role)
+    user.set_password('secret')
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+def test_principal_is_cached_and_dropped_when_role_or_password_changes(app_with_db):
+    from app.auth_cache import load_principal
+    from app.query_stats import track_queries
+
+    user = _user('Staff')
+    principal = load_principal(user.id)
+    assert (principal.username, principal.role, principal.is_authenticated) == ('staff', 'Staff', True)
+    with track_queries() as stats:
+        assert load_principal(user.id) is principal
+    assert stats.count == 0
+
+    user.role = 'Manager'
+    db.session.commit()
+    assert load_principal(user.id).is_manager()
+
+    cached = load_principal(user.id)
+    user.set_password('changed')
+    db.session.commit()
+    assert load_principal(user.id) is not cached
+
+    # Unrelated edits, and rolled-back changes, keep the entry
+    cached = load_principal(user.id)
+    user.role = 'Admin'
+    db.session.flush()
+    db.session.rollback()
+    assert load_principal(user.id) is cached
+    assert load_principal(999) is None
+
+
+def test_principal_carries_department_memberships(app_with_db):
+    from app.auth_cache import load_principal
+    from app.enterprise_models import Company, Department, UserDepartment
+
+    user = _user('Manager')
+    company = Company(name='Acme')
+    department = Department(name='Sales', company=company)
+    db.session.add_all([company, department])
+    db.session.commit()
+    assert load_principal(user.id).departments == ()
+
+    db.session.add(UserDepartment(user_id=user.id, department_id=department.id, role='Lead'))
+    db.session.commit()
+    principal = load_principal(user.id)
+    assert principal.departments == ((department.id, company.id, 'Lead'),)
+    assert principal.company_id == company.id
+
+
+def test_requests_authenticate_from_the_cache(app_with_db):
+    from flask import g
+    from app.auth_cache import Principal
+
+    user = _user('Staff')
+    client = app_with_db.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user.id)
+
+    assert client.get('/sales').status_code == 200
+    assert isinstance(g._login_user, Principal)
+    assert client.get('/reports').status_code == 302  # Admin only
+
+    user.role = 'Admin'
+    db.session.commit()
+    g.pop('_login_user')  # the fixture's app context (and g) outlives each request
+    assert client.get('/reports').status_code == 200
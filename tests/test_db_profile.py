@@ -0,0 +1,47 @@
+import sqlite3
+
+import pytest
+from app import db
+
+
+def test_connections_get_wal_and_pragmas(app_with_db):
+    with db.engine.connect() as conn:
+        pragma = lambda name: conn.exec_driver_sql(f'PRAGMA {name}').scalar()
+        assert pragma('journal_mode') == 'wal'
+        assert pragma('synchronous') == 1  # NORMAL
+        assert pragma('busy_timeout') == app_with_db.config['SQLITE_BUSY_TIMEOUT']
+        assert pragma('cache_size') == app_with_db.config['SQLITE_CACHE_SIZE']
+
+
+def test_write_units_take_the_write_lock_up_front(app_with_db):
+    from app.models import Item
+    from app.db_profile import write_intent
+
+    other = sqlite3.connect(db.engine.url.database, timeout=0, isolation_level=None)
+    try:
+        with write_intent():
+            # A read alone is enough to hold the write lock for the unit of work
+            db.session.query(Item).count()
+            with pytest.raises(sqlite3.OperationalError, match='locked'):
+                other.execute('BEGIN IMMEDIATE')
+            # Readers are not blocked (WAL)
+            assert other.execute('SELECT count(*) FROM item').fetchone() == (0,)
+        db.session.commit()
+        other.execute('BEGIN IMMEDIATE')
+        other.execute('ROLLBACK')
+    finally:
+        other.close()
+
+
+def test_each_app_keeps_its_own_settings(app_with_db, config, tmp_path):
+    from app import create_app
+
+    config.SQLALCHEMY_DATABASE_URI = f'sqlite:///{tmp_path / "other.db"}'
+    config.SQLITE_BUSY_TIMEOUT = 1234
+    other = create_app(config)
+    with other.app_context(), db.engine.connect() as conn:
+        assert conn.exec_driver_sql('PRAGMA busy_timeout').scalar() == 1234
+    # Building the second app does not change the first app's new connections
+    db.engine.dispose()
+    with db.engine.connect() as conn:
+        assert conn.exec_driver_sql('PRAGMA busy_timeout').scalar() == app_with_db.config['SQLITE_BUSY_TIMEOUT']
@@ -0,0 +1,44 @@
+import pytest
+from sqlalchemy import event, text
+from sqlalchemy.exc import OperationalError
+from app import db
+
+
+@pytest.fixture
+def client(client):
+    from app.models import Warehouse
+    db.session.add(Warehouse(name='Main', location='HQ'))
+    db.session.commit()
+    return client
+
+
+def _statements(engine):
+    seen = []
+    event.listen(engine, 'before_cursor_execute', lambda conn, cursor, statement, *args: seen.append(statement))
+    return seen
+
+
+def test_reads_go_to_the_read_only_engine_and_writes_to_the_primary(client):
+    from app.models import Item
+    from app.db_routing import READ_ONLY_BIND, read_only_session
+
+    read_engine = db.engines[READ_ONLY_BIND]
+    with read_only_session():
+        assert db.session.get_bind(mapper=Item) is read_engine
+        db.session.add(Item(name='Widget', quantity=1))
+        db.session.commit()
+        assert Item.query.filter_by(name='Widget').count() == 1
+    assert db.session.get_bind(mapper=Item) is db.engines[None]
+
+    with read_engine.connect() as conn, pytest.raises(OperationalError, match='readonly'):
+        conn.execute(text("INSERT INTO item (name, quantity) VALUES ('x', 1)"))
+
+
+def test_report_views_read_from_the_read_only_engine(client):
+    from app.db_routing import READ_ONLY_BIND
+
+    read_statements = _statements(db.engines[READ_ONLY_BIND])
+    for url in ('/dashboard', '/reports', '/warehouse/1/stock'):
+        before = len(read_statements)
+        assert client.get(url).status_code == 200, url
+        assert len(read_statements) > before, url
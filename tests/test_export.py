@@ -0,0 +1,65 @@
+import csv
+import io
+import zipfile
+from datetime import date, datetime
+
+import pytest
+from app import db
+
+
+@pytest.fixture
+def config(config):
+    config.EXPORT_BATCH_SIZE = 2
+    return config
+
+
+@pytest.fixture
+def client(client):
+    from app.models import Item, Order, Customer
+    from app.finance.models import Expense
+    item = Item(name='Widget', quantity=10, price=3)
+    customer = Customer(name='Acme')
+    db.session.add_all([item, customer])
+    db.session.flush()
+    db.session.add_all([Order(item_id=item.id, quantity=day, customer_id=customer.id if day % 2 else None,
+                              order_date=datetime(2024, 1, day, 15)) for day in range(1, 6)])
+    db.session.add_all([Expense(description='Rent <office>', amount=100, date=date(2024, 1, day),
+                                category='Rent') for day in (1, 31)])
+    db.session.commit()
+    return client
+
+
+def test_csv_export_streams_rows_in_the_date_range(client):
+    response = client.get('/export/orders.csv?start=2024-01-02&end=2024-01-04')
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert 'orders_2024-01-02_2024-01-04.csv' in response.headers['Content-Disposition']
+
+    rows = list(csv.reader(io.StringIO(response.get_data(as_text=True))))
+    assert rows[0][:4] == ['Order ID', 'Date', 'Item', 'Customer']
+    assert [(row[0], row[3], row[6]) for row in rows[1:]] == [('2', '', '6.00'), ('3', 'Acme', '9.00'), ('4', '', '12.00')]
+
+    rows = list(csv.reader(io.StringIO(client.get('/export/expenses.csv?end=2024-01-30').get_data(as_text=True))))
+    assert len(rows) == 2 and rows[1][1] == '2024-01-01'
+
+
+def test_xlsx_export_rolls_over_sheets(client):
+    from app.export_utils import stream_xlsx
+
+    response = client.get('/export/expenses.xlsx')
+    assert response.status_code == 200
+    with zipfile.ZipFile(io.BytesIO(response.get_data())) as workbook:
+        assert 'xl/workbook.xml' in workbook.namelist()
+        sheet = workbook.read('xl/worksheets/sheet1.xml').decode()
+    assert sheet.count('<row>') == 3
+    assert 'Rent &lt;office&gt;' in sheet
+
+    # Header plus two rows per sheet: five orders need three sheets
+    data = b''.join(stream_xlsx('orders', max_rows=3))
+    with zipfile.ZipFile(io.BytesIO(data)) as workbook:
+        sheets = [workbook.read(f'xl/worksheets/sheet{n}.xml').decode() for n in (1, 2, 3)]
+        assert 'sheet4' not in workbook.read('xl/workbook.xml').decode()
+    assert [sheet.count('<row>') for sheet in sheets] == [3, 3, 2]
+
+    assert client.get('/export/orders.pdf').status_code == 404
+    assert client.get('/export/users.csv').status_code == 404
@@ -0,0 +1,59 @@
+import io
+
+from app import db
+
+
+def test_items_and_batches_import_in_chunks_with_row_errors(app_with_db):
+    from app.models import Item, InventoryBatch, StockAlert, StockMovement, Warehouse, WarehouseStock
+    from app.import_utils import import_csv
+
+    items_csv = 'name,quantity,price,reorder_point\n' + ''.join(
+        f'Item {n},{n},1.50,3\n' for n in range(7)) + ',5,1\nBad,-1,x\n'
+    report = import_csv('items', io.StringIO(items_csv), chunk_size=3)
+    assert (report['rows'], report['imported'], report['failed']) == (9, 7, 2)
+    assert [e['line'] for e in report['errors']] == [9, 10]
+    assert set(report['errors'][1]['errors']) == {'quantity', 'price'}
+    assert Item.query.count() == 7
+    assert db.session.query(db.func.sum(StockMovement.quantity)).scalar() == sum(range(7))
+    # Items 0-2 are below their reorder point of 3
+    assert StockAlert.query.filter_by(alert_type='low_stock').count() == 3
+
+    warehouse = Warehouse(name='Main', location='HQ')
+    db.session.add(warehouse)
+    db.session.commit()
+    wh = warehouse.id  # the importer expunges the session between chunks
+    batches_csv = ('item_id,warehouse_id,batch_number,quantity,expiry_date\n'
+                   f'1,{wh},B1,10,2030-01-01\n'
+                   f'1,{wh},B2,5,\n'
+                   f'999,{wh},B3,5,\n'
+                   f'2,{wh},B4,5,01/02/2030\n')
+    report = import_csv('batches', io.StringIO(batches_csv), chunk_size=2)
+    assert (report['imported'], report['failed']) == (2, 2)
+    errors = {e['line']: e['errors'] for e in report['errors']}
+    assert errors == {4: {'item_id': ['No such record.']},
+                      5: {'expiry_date': ['Invalid expiry date format. Use YYYY-MM-DD.']}}
+    assert InventoryBatch.query.count() == 2
+    assert db.session.get(Item, 1).quantity == 15
+    assert db.session.get(WarehouseStock, (wh, 1)).active_quantity == 15
+
+
+def test_upload_endpoint_reports_missing_columns(app_with_db):
+    from app.models import User, Customer
+
+    admin = User(username='admin', role='Admin')
+    admin.set_password('x')
+    db.session.add(admin)
+    db.session.commit()
+    client = app_with_db.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(admin.id)
+
+    def upload(kind, body):
+        return client.post('/import?format=json', data={'kind': kind, 'file': (io.BytesIO(body), 'data.csv')},
+                           content_type='multipart/form-data')
+
+    assert upload('customers', b'phone\n123\n').status_code == 400
+    response = upload('customers', '﻿name,email\nAsha,asha@example.com\nRavi,not-an-email\n'.encode())
+    assert response.get_json()['imported'] == 1
+    assert response.get_json()['errors'][0]['errors'] == {'email': ['Invalid email address.']}
+    assert [c.name for c in Customer.query.all()] == ['Asha']
@@ -0,0 +1,111 @@
+import os
+
+import pytest
+from app import db
+
+
+@pytest.fixture
+def config(config, tmp_path):
+    config.INVOICE_DIR = str(tmp_path / 'invoices')
+    return config
+
+
+@pytest.fixture
+def client(client):
+    from app.models import Item, Order
+    item = Item(name='Widget', quantity=10, price=3)
+    db.session.add(item)
+    db.session.flush()
+    db.session.add_all([Order(item_id=item.id, quantity=n) for n in (1, 2)])
+    db.session.commit()
+    return client
+
+
+def test_invoice_is_rendered_by_the_job_runner(client):
+    from app.models import Job, Order
+    from app.job_utils import run_jobs
+
+    response = client.post('/invoice?format=json', data={
+        'po_number': 'PO-1', 'po_date': '2024-01-31', 'company_name': 'ACME', 'order_ids': ['1', '2'],
+    })
+    assert response.status_code == 202
+    job_id = response.get_json()['job_id']
+    assert client.get(f'/jobs/{job_id}').get_json()['status'] == 'queued'
+    assert client.get(f'/jobs/{job_id}/download').status_code == 409
+    assert Order.query.filter_by(invoiced=True).count() == 0
+
+    with client.application.app_context():  # the runner is its own process in production
+        assert run_jobs(workers=1, stop_when_idle=True) == 1
+
+    status = client.get(f'/jobs/{job_id}').get_json()
+    assert status['status'] == 'done'
+    assert os.path.exists(db.session.get(Job, job_id).result)
+    assert Order.query.filter_by(invoiced=True).count() == 2
+    download = client.get(status['download_url'])
+    assert download.status_code == 200 and download.data.startswith(b'%PDF')
+
+
+def test_failed_jobs_are_retried_then_marked_failed(client):
+    from app.models import Job, Order
+    from app.job_utils import enqueue, run_jobs
+
+    job = enqueue('invoice_pdf', {'po_number': 'X', 'po_date': '', 'company_name': '', 'order_ids': [999]})
+    with client.application.app_context():
+        run_jobs(workers=1, stop_when_idle=True)
+
+    job = db.session.get(Job, job.id, populate_existing=True)
+    assert job.status == 'failed' and job.attempts == 3 and 'orders' in job.error
+    assert Order.query.filter_by(invoiced=True).count() == 0
+
+
+def test_invoice_run_renders_one_pdf_per_customer_as_a_zip(client):
+    import io
+    import zipfile
+    from app.models import Customer, Item, Order
+    from app.job_utils import run_jobs
+
+    item = Item.query.first()
+    customers = [Customer(name=f'C{n}') for n in range(3)]
+    db.session.add_all(customers)
+    db.session.flush()
+    db.session.add_all([Order(item_id=item.id, customer_id=c.id, quantity=1) for c in customers for _ in range(2)])
+    db.session.commit()
+
+    response = client.post('/invoice/run?format=json', data={
+        'reference': 'R1', 'po_date': '2024-01-31', 'company_name': 'ACME',
+    })
+    job_id = response.get_json()['job_id']
+    # Placed after the run was queued, so left for the next one
+    db.session.add(Order(item_id=item.id, customer_id=customers[0].id, quantity=1))
+    db.session.commit()
+
+    with client.application.app_context():
+        assert run_jobs(workers=2, stop_when_idle=True) == 1
+
+    download = client.get(client.get(f'/jobs/{job_id}').get_json()['download_url'])
+    names = zipfile.ZipFile(io.BytesIO(download.data)).namelist()
+    assert sorted(names) == sorted([f'Invoice_R1-{c.id}.pdf' for c in customers] + ['Invoice_R1-WALKIN.pdf'])
+    assert [o.invoiced for o in Order.query.order_by(Order.id).populate_existing()] == [True] * 8 + [False]
+
+
+def test_invoice_run_marks_only_the_orders_it_rendered(client):
+    from app.models import Order
+    from app.job_utils import enqueue
+    from app.invoice_utils import _mark_run_invoiced, prepare_invoice_run
+
+    # Order 1 is already on a queued single invoice, so the run leaves it out
+    enqueue('invoice_pdf', {'po_number': 'X', 'po_date': '', 'company_name': '', 'order_ids': [1]})
+    run = enqueue('invoice_run', {'reference': 'R1', 'po_date': '', 'company_name': '', 'cutoff_order_id': 2})
+    tasks = prepare_invoice_run(run)
+    assert [args[2] for _, args in tasks] == [[2]]
+
+    _mark_run_invoiced(run, [(args[1], args[2]) for _, args in tasks])
+    db.session.commit()
+    assert [o.invoiced for o in Order.query.order_by(Order.id).populate_existing()] == [False, True]
+
+
+def test_invoice_page_shows_the_count_and_one_page_of_orders(client):
+    page = client.get('/invoice?limit=1')
+    assert b'(2 pending)' in page.data
+    assert b'name="order_ids" value="1"' in page.data and b'name="order_ids" value="2"' not in page.data
+    assert b'Next 1 orders' in page.data
@@ -0,0 +1,46 @@
+from decimal import Decimal
+from app import db
+
+
+def test_dashboard_kpis_are_cached_and_invalidated_on_write(app_with_db):
+    from app.models import Item, Order
+    from app.kpi import get_dashboard_kpis, invalidate_kpi_cache
+
+    invalidate_kpi_cache()
+    db.session.add(Item(name='Widget', quantity=4, price=Decimal('2.50')))
+    db.session.commit()
+
+    kpis = get_dashboard_kpis()
+    assert kpis['total_items'] == 1
+    assert kpis['total_stock_value'] == 10.0
+    assert kpis['total_orders'] == 0
+
+    # A commit touching an Order must drop the cached figures
+    item = Item.query.first()
+    db.session.add(Order(item_id=item.id, quantity=1))
+    item.quantity -= 1
+    db.session.commit()
+
+    kpis = get_dashboard_kpis()
+    assert kpis['total_orders'] == 1
+    assert kpis['total_stock_value'] == 7.5
+
+
+def test_a_compute_that_races_an_invalidation_is_not_cached(app_with_db, monkeypatch):
+    from app import kpi
+
+    compute = kpi.compute_dashboard_kpis
+
+    def racing_compute():
+        kpis = compute()
+        kpi.invalidate_kpi_cache()  # a commit lands while the figures are computed
+        return kpis
+
+    kpi.invalidate_kpi_cache()
+    monkeypatch.setattr(kpi, 'compute_dashboard_kpis', racing_compute)
+    kpi.get_dashboard_kpis()
+    assert 'dashboard' not in kpi._cache
+
+    monkeypatch.setattr(kpi, 'compute_dashboard_kpis', compute)
+    kpi.get_dashboard_kpis()
+    assert 'dashboard' in kpi._cache
@@ -0,0 +1,109 @@
+from datetime import datetime, timedelta
+
+from app import db
+
+
+def _ledger_total(item_id):
+    from app.models import StockMovement
+    return db.session.query(db.func.sum(StockMovement.quantity)).filter(StockMovement.item_id == item_id).scalar()
+
+
+def test_every_stock_change_is_ledgered(app_with_db):
+    from app.models import Item, InventoryBatch, Warehouse
+    from app.ledger_utils import record_opening_balances, stock_at
+    from app.stock_utils import place_order, record_purchase, cancel_sales_order
+    from app.transfer_utils import transfer_stock_lines
+
+    item = Item(name='Widget', quantity=5)
+    wh1, wh2 = Warehouse(name='A', location='a'), Warehouse(name='B', location='b')
+    db.session.add_all([item, wh1, wh2])
+    db.session.flush()
+    db.session.add(InventoryBatch(item_id=item.id, warehouse_id=wh1.id, batch_number='B1', quantity=5))
+    db.session.commit()
+    assert record_opening_balances() == 1
+    assert record_opening_balances() == 0
+
+    record_purchase(item.id, 10)
+    order = place_order(item.id, 4)
+    place_order(item.id, 1)
+    cancel_sales_order(order.id)
+    assert transfer_stock_lines(wh1.id, wh2.id, [{'item_id': item.id, 'quantity': 3}])['success']
+
+    assert _ledger_total(item.id) == db.session.get(Item, item.id).quantity == 14
+    balances = stock_at(datetime.utcnow(), item_id=item.id)
+    assert balances == {(item.id, wh1.id): 2, (item.id, wh2.id): 3, (item.id, 0): 9}
+
+
+def test_point_in_time_reads_snapshot_plus_tail(app_with_db):
+    from app.models import Item, StockMovement, StockSnapshot
+    from app.ledger_utils import record_movement, take_stock_snapshots, item_stock_at
+
+    item = Item(name='Widget', quantity=0)
+    db.session.add(item)
+    db.session.commit()
+
+    start = datetime(2024, 1, 1)
+    for delta in [10, -3, 5, -2]:
+        record_movement(item.id, delta, 'adjustment')
+    for day, movement in enumerate(StockMovement.query.order_by(StockMovement.id)):
+        movement.created_at = start + timedelta(days=day)
+    db.session.commit()
+
+    expected = [item_stock_at(item.id, start + timedelta(days=day, hours=1)) for day in range(4)]
+    assert expected == [10, 7, 12, 10]
+
+    assert take_stock_snapshots(now=start + timedelta(days=3, hours=2)) == 1
+    record_movement(item.id, 6, 'adjustment')
+    db.session.commit()
+    assert take_stock_snapshots() == 1
+    assert take_stock_snapshots() == 0
+    assert StockSnapshot.query.count() == 2
+
+    # Before the first snapshot the full ledger is replayed; after it only the tail is
+    assert [item_stock_at(item.id, start + timedelta(days=day, hours=1)) for day in range(4)] == expected
+    assert item_stock_at(item.id, datetime.utcnow()) == 16
+
+
+def test_item_and_batch_edits_ledger_the_change_applied(app_with_db):
+    from app.models import Item, Warehouse, StockMovement
+    from app.stock_utils import place_order, receive_batch, update_batch, remove_batch, update_item
+
+    item = Item(name='Widget', quantity=0)
+    warehouse = Warehouse(name='Main', location='HQ')
+    db.session.add_all([item, warehouse])
+    db.session.commit()
+
+    batch = receive_batch(item_id=item.id, warehouse_id=warehouse.id, batch_number='B1', quantity=5)
+    update_batch(batch.id, 8, notes='recount')
+    place_order(item.id, 6)
+    # Only 2 units are left to take off the shelf, and only those are ledgered
+    assert remove_batch(batch.id)
+    assert not remove_batch(batch.id)
+    deleted = StockMovement.query.filter_by(reason='batch_delete').one()
+    assert deleted.quantity == -2
+    assert _ledger_total(item.id) == db.session.get(Item, item.id).quantity == 0
+
+    update_item(item.id, 7, name='Gadget')
+    assert _ledger_total(item.id) == 7
+    assert (db.session.get(Item, item.id).name, db.session.get(Item, item.id).quantity) == ('Gadget', 7)
+
+
+def test_deleting_an_item_takes_its_stock_out_of_the_ledger(client):
+    from app.models import Item, Warehouse
+    from app.ledger_utils import stock_at, take_stock_snapshots
+    from app.stock_utils import receive_batch, record_purchase
+
+    item = Item(name='Widget', quantity=0)
+    warehouse = Warehouse(name='Main', location='HQ')
+    db.session.add_all([item, warehouse])
+    db.session.commit()
+    item_id = item.id
+    receive_batch(item_id=item_id, warehouse_id=warehouse.id, batch_number='B1', quantity=7)
+    take_stock_snapshots()
+    record_purchase(item_id, 2)
+    assert stock_at(datetime.utcnow()) == {(item_id, warehouse.id): 7, (item_id, 0): 2}
+
+    assert client.post(f'/inventory/delete/{item_id}').status_code == 302
+    assert db.session.get(Item, item_id) is None
+    assert _ledger_total(item_id) == 0
+    assert not any(stock_at(datetime.utcnow()).values())
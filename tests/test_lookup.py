@@ -0,0 +1,90 @@
+from sqlalchemy import select
+from app import db
+
+
+def _client(app, role='Admin'):
+    from app.models import User
+    user = User(username=role.lower(), role=role)
+    user.set_password('secret')
+    db.session.add(user)
+    db.session.commit()
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user.id)
+    return client
+
+
+def test_lookup_is_a_case_insensitive_prefix_search_on_an_index(app_with_db):
+    from app.crm.crm_models import Lead
+    from app.lookup_utils import search
+    from app.models import Item
+
+    db.session.add_all([Item(name=name, quantity=5, price=2) for name in ('Bolt', 'bolt cutter', 'Nut', 'Bo_x', 'Box')])
+    db.session.add_all([Lead(lead_id='L0000001', name='Acme'), Lead(lead_id='L0000002', name='Lumber Co')])
+    db.session.commit()
+
+    assert [r['label'] for r in search('items', 'BO')] == ['Bo_x', 'Bolt', 'bolt cutter', 'Box']
+    assert [r['label'] for r in search('items', 'bo_')] == ['Bo_x']  # wildcards are literal
+    assert [r['label'] for r in search('items', '', limit=2)] == ['Bo_x', 'Bolt']
+    assert search('items', 'nut')[0]['hint'] == 'Stock 5 · ₹2.00'
+    # Leads match on their code or their name
+    assert [r['label'] for r in search('leads', 'l')] == ['L0000001 - Acme', 'L0000002 - Lumber Co']
+    assert [r['label'] for r in search('leads', 'ac')] == ['L0000001 - Acme']
+
+    query = select(Item.id, Item.name).where(Item.name.like('bo%', escape='\\')).order_by(Item.name.collate('NOCASE'))
+    with db.engine.connect() as conn:
+        plan = str(conn.exec_driver_sql('EXPLAIN QUERY PLAN ' + str(query.compile(
+            db.engine, compile_kwargs={'literal_binds': True}))).fetchall())
+    assert 'ix_item_name_nocase' in plan and 'TEMP B-TREE' not in plan
+
+
+def test_lookup_endpoint_checks_the_entity_and_role(app_with_db):
+    from app.models import Supplier
+
+    db.session.add(Supplier(name='Acme Supply'))
+    db.session.commit()
+    admin = _client(app_with_db)
+    response = admin.get('/api/lookup/suppliers?q=ac')
+    assert response.status_code == 200
+    assert response.get_json()['results'][0]['label'] == 'Acme Supply'
+    assert admin.get('/api/lookup/users').status_code == 404
+
+    from flask import g
+    g.pop('_login_user')  # the fixture's app context (and g) outlives each request
+    staff = _client(app_with_db, 'Staff')
+    assert staff.get('/api/lookup/suppliers?q=ac').status_code == 403
+    assert staff.get('/api/lookup/items?q=ac').status_code == 200
+
+
+def test_form_pages_render_only_the_choice_and_validate_the_id_on_submit(app_with_db):
+    from app.crm.crm_models import Lead, Note
+    from app.query_stats import track_queries
+
+    client = _client(app_with_db)
+    db.session.add_all([Lead(lead_id=f'L{i:07d}', name=f'Lead {i}') for i in range(1, 301)])
+    db.session.commit()
+
+    response = client.get('/crm/notes')
+    assert response.status_code == 200
+    assert b'Lead 150' not in response.data and b'data-lookup="/api/lookup/leads"' in response.data
+
+    response = client.post('/crm/notes', data={'lead_id': '9999', 'content': 'hello'})
+    assert response.status_code == 200  # form shown again: no such lead
+    assert Note.query.count() == 0
+
+    with track_queries() as stats:
+        response = client.post('/crm/notes', data={'lead_id': '150', 'content': 'hello'})
+    assert response.status_code == 302
+    assert Note.query.one().lead_id == 150
+    assert stats.count < 10
+
+
+def test_customer_list_filter_is_a_literal_prefix(client):
+    from app.models import Customer
+
+    db.session.add_all([Customer(name=name) for name in ('50% Off Stores', '500 Traders', 'Box_Co', 'Boxer')])
+    db.session.commit()
+    for q, expected in (('50%', [b'50% Off Stores']), ('box_', [b'Box_Co']), ('%off', [])):
+        body = client.get('/customers', query_string={'q': q}).data
+        found = [name for name in (b'50% Off Stores', b'500 Traders', b'Box_Co', b'Boxer') if name in body]
+        assert found == expected, q
@@ -0,0 +1,31 @@
+from sqlalchemy import create_engine, inspect
+from app import db
+
+
+def test_upgrade_adds_indexes_to_an_existing_database_once(app_with_db, tmp_path):
+    from app.migrations import upgrade, migration_status
+
+    # A database created before the performance indexes existed
+    engine = create_engine('sqlite:///' + str(tmp_path / 'old.db'))
+    db.metadata.create_all(engine)
+    with engine.begin() as conn:
+        for name in ('ix_order_date', 'ix_batch_warehouse_item_active', 'ix_expense_date_amount'):
+            conn.exec_driver_sql(f'DROP INDEX {name}')
+        conn.exec_driver_sql('CREATE INDEX ix_batch_warehouse_item ON inventory_batches (warehouse_id, item_id)')
+
+    versions = [m['version'] for m in migration_status(engine)]
+    assert upgrade(engine) == versions
+    assert upgrade(engine) == []
+    assert all(m['applied_at'] for m in migration_status(engine))
+
+    inspector = inspect(engine)
+    assert 'ix_order_date' in {i['name'] for i in inspector.get_indexes('order')}
+    assert 'ix_expense_date_amount' in {i['name'] for i in inspector.get_indexes('expenses')}
+    assert {i['name'] for i in inspector.get_indexes('inventory_batches')} >= {'ix_batch_warehouse_item_active'}
+    assert 'ix_batch_warehouse_item' not in {i['name'] for i in inspector.get_indexes('inventory_batches')}
+
+    with engine.connect() as conn:
+        plan = conn.exec_driver_sql(
+            'EXPLAIN QUERY PLAN SELECT id FROM "order" ORDER BY order_date DESC, id DESC LIMIT 50').fetchall()
+    assert 'ix_order_date' in str(plan)
+    engine.dispose()
@@ -0,0 +1,149 @@
+from datetime import datetime, timedelta
+
+from app import db
+
+
+def _walk(client, url, limit):
+    """Every id a list returns, following next_cursor from the first page to the last"""
+    ids, cursor = [], None
+    while True:
+        query = f'format=json&limit={limit}' + (f'&cursor={cursor}' if cursor else '')
+        page = client.get(url + ('&' if '?' in url else '?') + query).get_json()
+        ids += [row['id'] for row in page['items']]
+        cursor = page['next_cursor']
+        if cursor is None:
+            return ids
+
+
+def _seed_customers():
+    """Three dated customers, newest first, then three without created_at; returns both id lists"""
+    from app.models import Customer
+
+    now = datetime(2024, 1, 31)
+    customers = [Customer(name=f'C{n}', created_at=now - timedelta(days=n)) for n in range(3)]
+    db.session.add_all(customers)
+    db.session.flush()
+    # A NULL key ends the second page, so its cursor carries None
+    undated = [Customer(name=f'U{n}') for n in range(3)]
+    db.session.add_all(undated)
+    db.session.flush()
+    Customer.query.filter(Customer.id.in_([c.id for c in undated])).update(
+        {'created_at': None}, synchronize_session=False)
+    db.session.commit()
+    return [c.id for c in customers], [c.id for c in undated]
+
+
+def test_rows_without_a_sort_key_are_paged_after_the_keyed_rows(client):
+    dated, undated = _seed_customers()
+    expected = dated + undated[::-1]
+    assert _walk(client, '/customers', 2) == expected
+    assert _walk(client, '/customers', 50) == expected
+
+
+def test_ascending_pages_start_with_the_rows_without_a_sort_key(app_with_db):
+    from app.models import Customer
+    from app.pagination import keyset_paginate
+
+    dated, undated = _seed_customers()
+    ids, cursor = [], None
+    while True:
+        page = keyset_paginate(Customer.query, Customer.created_at, Customer.id, cursor=cursor, limit=2,
+                               descending=False)
+        ids += [customer.id for customer in page]
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+    assert ids == undated + dated[::-1]
+
+
+# ---------------- List views ----------------
+DAYS = [datetime(2024, 1, d, 12) for d in (10, 10, 10, 11, 11, 12, 12)]
+
+
+def _seed_lists():
+    """Two of each parent and seven orders, purchases and batches on DAYS (ties included)"""
+    from app.models import Customer, InventoryBatch, Item, Order, Purchase, Supplier, Warehouse
+
+    items = [Item(name=f'Item {n}', quantity=100, price=2) for n in range(2)]
+    customers = [Customer(name=name, created_at=DAYS[0]) for name in ('Acme', 'Bolt')]
+    suppliers = [Supplier(name=f'Supplier {n}') for n in range(2)]
+    warehouses = [Warehouse(name=f'W{n}', location='x') for n in range(2)]
+    db.session.add_all(items + customers + suppliers + warehouses)
+    db.session.flush()
+    for n, day in enumerate(DAYS):
+        db.session.add_all([
+            Order(item_id=items[n % 2].id, customer_id=customers[n % 2].id, quantity=1,
+                  order_date=day, invoiced=n % 3 == 0),
+            Purchase(item_id=items[n % 2].id, supplier_id=suppliers[n % 2].id, quantity=1, purchase_date=day),
+            InventoryBatch(item_id=items[n % 2].id, warehouse_id=warehouses[n % 2].id, batch_number=f'B{n}',
+                           quantity=1, received_date=day, is_active=n % 3 != 0),
+        ])
+    db.session.commit()
+    return {'item_id': items[0].id, 'customer_id': customers[0].id, 'supplier_id': suppliers[0].id,
+            'warehouse_id': warehouses[0].id}
+
+
+def _newest_first(rows, date_attr, keep=lambda row: True):
+    return [row.id for row in sorted(rows, key=lambda row: (getattr(row, date_attr), row.id), reverse=True)
+            if keep(row)]
+
+
+def test_list_pages_walk_every_row_across_ties(client):
+    from app.models import Customer, InventoryBatch, Order, Purchase
+
+    _seed_lists()
+    for url, model, date_attr in (('/sales', Order, 'order_date'), ('/purchases', Purchase, 'purchase_date'),
+                                  ('/batches', InventoryBatch, 'received_date'),
+                                  ('/customers', Customer, 'created_at')):
+        expected = _newest_first(model.query.all(), date_attr)
+        for limit in (1, 2, 3, 50):
+            assert _walk(client, url, limit) == expected, (url, limit)
+
+
+def test_list_filters(client):
+    from app.models import Customer, InventoryBatch, Order, Purchase
+
+    ids = _seed_lists()
+    day = datetime(2024, 1, 11)
+    cases = [
+        ('/sales?item_id={item_id}', Order, 'order_date', lambda o: o.item_id == ids['item_id']),
+        ('/sales?customer_id={customer_id}', Order, 'order_date', lambda o: o.customer_id == ids['customer_id']),
+        ('/sales?start=2024-01-11', Order, 'order_date', lambda o: o.order_date >= day),
+        ('/sales?end=2024-01-11', Order, 'order_date', lambda o: o.order_date < day + timedelta(days=1)),
+        ('/sales?invoiced=1', Order, 'order_date', lambda o: o.invoiced),
+        ('/sales?invoiced=0', Order, 'order_date', lambda o: not o.invoiced),
+        ('/purchases?item_id={item_id}', Purchase, 'purchase_date', lambda p: p.item_id == ids['item_id']),
+        ('/purchases?supplier_id={supplier_id}', Purchase, 'purchase_date',
+         lambda p: p.supplier_id == ids['supplier_id']),
+        ('/purchases?start=2024-01-11', Purchase, 'purchase_date', lambda p: p.purchase_date >= day),
+        ('/purchases?end=2024-01-11', Purchase, 'purchase_date',
+         lambda p: p.purchase_date < day + timedelta(days=1)),
+        ('/batches?item_id={item_id}', InventoryBatch, 'received_date', lambda b: b.item_id == ids['item_id']),
+        ('/batches?warehouse_id={warehouse_id}', InventoryBatch, 'received_date',
+         lambda b: b.warehouse_id == ids['warehouse_id']),
+        ('/batches?status=active', InventoryBatch, 'received_date', lambda b: b.is_active),
+        ('/batches?status=inactive', InventoryBatch, 'received_date', lambda b: not b.is_active),
+        ('/customers?q=ac', Customer, 'created_at', lambda c: c.name == 'Acme'),
+        # LIKE wildcards in the search are matched literally
+        ('/customers?q=%25', Customer, 'created_at', lambda c: False),
+    ]
+    for url, model, date_attr, keep in cases:
+        url = url.format(**ids)
+        expected = _newest_first(model.query.all(), date_attr, keep)
+        assert expected or url.endswith('%25'), url
+        assert _walk(client, url, 2) == expected, url
+
+
+def test_list_json_shape_and_bad_cursors(client):
+    _seed_lists()
+    for url in ('/sales', '/purchases', '/batches', '/customers'):
+        page = client.get(f'{url}?format=json&limit=1').get_json()
+        assert set(page) == {'items', 'next_cursor', 'rows_html'}, url
+        assert len(page['items']) == 1 and page['next_cursor'], url
+        assert f'{page["items"][0]["id"]}' in page['rows_html'], url
+
+        last = client.get(f'{url}?format=json&limit=50').get_json()
+        assert last['next_cursor'] is None, url
+
+        assert client.get(f'{url}?format=json&cursor=not-a-cursor').status_code == 400, url
+        assert client.get(f'{url}?cursor=not-a-cursor').status_code == 400, url
@@ -0,0 +1,56 @@
+import pytest
+from flask import g
+from app import db
+
+
+@pytest.fixture
+def config(config):
+    config.QUERY_AUDIT = 'raise'
+    return config
+
+
+@pytest.fixture
+def client(client):
+    from app.models import Warehouse
+    db.session.add(Warehouse(name='Main', location='HQ'))
+    db.session.commit()
+    return client
+
+
+def _seed(n):
+    """Add n orders, purchases, batches and alerts, each on its own item/customer/supplier"""
+    from app.models import Item, Customer, Supplier, Order, Purchase, InventoryBatch, StockAlert, Warehouse
+    warehouse = Warehouse.query.first()
+    for i in range(n):
+        item = Item(name=f'Item {i}', quantity=1, price=2)
+        customer = Customer(name=f'Customer {i}')
+        supplier = Supplier(name=f'Supplier {i}')
+        db.session.add_all([item, customer, supplier])
+        db.session.flush()
+        db.session.add_all([
+            Order(item_id=item.id, customer_id=customer.id, quantity=1),
+            Purchase(item_id=item.id, supplier_id=supplier.id, quantity=1),
+            InventoryBatch(item_id=item.id, warehouse_id=warehouse.id, supplier_id=supplier.id,
+                           batch_number=f'B{i}', quantity=1),
+            StockAlert(item_id=item.id, alert_type='low_stock', message='Low stock'),
+        ])
+    db.session.commit()
+
+
+def _query_count(client, url):
+    with client:
+        response = client.get(url)
+        assert response.status_code == 200, url
+        return g.query_stats.count
+
+
+@pytest.mark.parametrize('url', [
+    '/inventory', '/sales', '/purchases', '/batches', '/warehouse/1/stock', '/stock/alerts', '/invoice', '/reports',
+])
+def test_list_pages_issue_a_bounded_number_of_queries(client, url):
+    # QUERY_AUDIT='raise' fails the request on a lazy load per row; the count must not grow with rows
+    _query_count(client, url)  # warm-up: the first request also loads the user's principal
+    _seed(3)
+    small = _query_count(client, url)
+    _seed(20)
+    assert _query_count(client, url) == small
@@ -0,0 +1,63 @@
+import pytest
+from app import db
+
+
+@pytest.fixture
+def config(config):
+    config.QUERY_STATS = True
+    return config
+
+
+def _login(app, role):
+    from app.models import User
+    user = User(username=role.lower(), role=role)
+    user.set_password('secret')
+    db.session.add(user)
+    db.session.commit()
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user.id)
+    return client
+
+
+def test_server_timing_header_and_debug_endpoint(app_with_db):
+    client = _login(app_with_db, 'Admin')
+
+    response = client.get('/sales')
+    assert response.status_code == 200
+    assert response.headers['Server-Timing'].startswith('db;dur=')
+
+    data = client.get('/admin/debug/queries').get_json()
+    latest = data['requests'][0]
+    assert latest['endpoint'] == 'sales'
+    assert latest['count'] > 0 and latest['slowest']
+
+
+def test_debug_endpoint_is_admin_only(app_with_db):
+    client = _login(app_with_db, 'Staff')
+    assert client.get('/admin/debug/queries').status_code == 302
+
+
+def test_slow_queries_are_logged_with_query_plan(app_with_db, caplog):
+    from app.models import Item
+    from app.query_stats import track_queries
+
+    with caplog.at_level('WARNING', logger='erp.slow_queries'):
+        with track_queries(slow_query_ms=0) as stats:
+            Item.query.filter(Item.name == 'Widget').all()
+
+    assert stats.count == 1
+    assert 'plan: SCAN item' in caplog.text
+
+
+def test_slow_query_log_file_gets_one_handler_per_process(config, tmp_path):
+    from app import create_app
+    from app.query_stats import slow_query_logger
+
+    config.SLOW_QUERY_LOG = str(tmp_path / 'slow.log')
+    for _ in range(3):
+        create_app(config)
+    handlers = [h for h in slow_query_logger.handlers if getattr(h, 'baseFilename', None) == config.SLOW_QUERY_LOG]
+    assert len(handlers) == 1
+    slow_query_logger.removeHandler(handlers[0])
+    handlers[0].close()
@@ -0,0 +1,37 @@
+from app import db
+
+
+def _rollup_rows():
+    from app.models import SalesDailyRollup
+    return sorted(
+        (r.day, r.item_id, r.customer_id, r.order_count, r.quantity)
+        for r in SalesDailyRollup.query.all()
+    )
+
+
+def test_rollups_track_orders_and_match_rebuild(app_with_db):
+    from app.models import Item, Customer, Order
+    from app.report_utils import rebuild_rollups, sales_summary
+
+    item = Item(name='Widget', quantity=100, price=3)
+    customer = Customer(name='Acme')
+    db.session.add_all([item, customer])
+    db.session.commit()
+
+    orders = [
+        Order(item_id=item.id, quantity=2, customer_id=customer.id),
+        Order(item_id=item.id, quantity=5),
+        Order(item_id=item.id, quantity=1, customer_id=customer.id),
+    ]
+    db.session.add_all(orders)
+    db.session.commit()
+
+    # Cancelling an order and editing another keep the buckets in step
+    db.session.delete(orders[1])
+    orders[2].quantity = 4
+    db.session.commit()
+
+    assert sales_summary() == {'count': 2, 'total': 18.0}
+    incremental = _rollup_rows()
+    rebuild_rollups()
+    assert _rollup_rows() == incremental
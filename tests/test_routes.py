@@ -1,22 +1,10 @@
-import pytest
-from app import create_app, db
-
-
-@pytest.fixture
-def app_with_db(tmp_path, monkeypatch):
-    # use a temporary sqlite file
-    config = type('C', (), {})()
-    config.SQLALCHEMY_DATABASE_URI = 'sqlite:///' + str(tmp_path / 'test.db')
-    config.SECRET_KEY = 'test'
-
-    app = create_app(config)
-    app.testing = True
-
-    yield app
-
-
-def test_index(app_with_db):
-    client = app_with_db.test_client()
+def test_index(client):
     res = client.get('/')
     assert res.status_code == 200
     assert b'Dashboard' in res.data
+
+
+def test_index_sends_anonymous_users_to_login(app_with_db):
+    res = app_with_db.test_client().get('/')
+    assert res.status_code == 302
+    assert res.headers['Location'].startswith('/login')
@@ -0,0 +1,107 @@
+import pytest
+from app import db
+
+
+@pytest.fixture
+def app_with_db(app_with_db):
+    # Results carry URLs, so searches run in a request context
+    with app_with_db.test_request_context():
+        yield app_with_db
+
+
+def _titles(query, **kwargs):
+    from app.search_utils import search
+    return [r['title'] for r in search(query, **kwargs)[0]]
+
+
+def test_index_follows_orm_and_core_writes(app_with_db):
+    from app.crm.crm_models import Lead
+    from app.models import Customer, Item
+
+    customer = Customer(name='Acme Traders', email='orders@acme.example', phone='5550101')
+    db.session.add(customer)
+    db.session.add(Lead(lead_id='L0000001', name='Globex', email='sales@acme.example'))
+    db.session.commit()
+    db.session.execute(Item.__table__.insert(), [{'name': 'Acme Anvil', 'quantity': 1, 'description': 'Heavy'}])
+    db.session.commit()
+
+    # Title matches rank above body matches; every word must match as a prefix
+    assert _titles('acme') == ['Acme Anvil', 'Acme Traders', 'L0000001 Globex']
+    assert _titles('acm trad') == ['Acme Traders']
+    assert _titles('5550101') == ['Acme Traders']
+    assert _titles('acme', kinds=['leads']) == ['L0000001 Globex']
+
+    customer.name = 'Initech'
+    db.session.commit()
+    assert _titles('traders') == []
+    assert _titles('initech') == ['Initech']
+    db.session.delete(customer)
+    db.session.commit()
+    assert _titles('initech') == []
+
+
+def test_results_page_with_a_cursor_and_rebuild_restores_the_index(app_with_db):
+    from app.models import Customer
+    from app.search_utils import rebuild_search_index, search
+
+    db.session.add_all([Customer(name=f'Northwind {i}') for i in range(25)])
+    db.session.commit()
+
+    first, cursor = search('northwind', limit=10)
+    second, cursor = search('northwind', cursor=cursor, limit=10)
+    third, cursor = search('northwind', cursor=cursor, limit=10)
+    assert (len(first), len(second), len(third), cursor) == (10, 10, 5, None)
+    assert len({r['id'] for r in first + second + third}) == 25
+
+    # A broad query is ranked over its newest SEARCH_RANK_LIMIT matches, plus
+    # older rows matching its words exactly
+    app_with_db.config['SEARCH_RANK_LIMIT'] = 10
+    first, cursor = search('north', limit=6)
+    second, cursor = search('north', cursor=cursor, limit=6)
+    assert cursor is None
+    assert sorted(r['id'] for r in first + second) == list(range(16, 26))
+    assert _titles('northwind 1')[:2] == ['Northwind 1', 'Northwind 19']
+    app_with_db.config['SEARCH_RANK_LIMIT'] = 1000
+
+    with db.engine.begin() as conn:
+        conn.exec_driver_sql('DELETE FROM search_index')
+    assert _titles('northwind') == []
+    assert rebuild_search_index()['customers'] == 25
+    assert len(_titles('northwind', limit=100)) == 25
+
+
+def test_query_syntax_is_literal_and_snippets_are_escaped(app_with_db):
+    from app.models import Item
+    from app.search_utils import search
+
+    db.session.add(Item(name='Widget', quantity=1, description='<b>bold</b> "quoted" widget'))
+    db.session.commit()
+
+    for query in ('"', 'widget OR', 'NEAR(', '*', 'a:b', '-widget'):
+        search(query)  # no FTS5 syntax errors
+    result = search('quoted')[0][0]
+    assert '&lt;b&gt;' in result['snippet'] and '<mark>quoted</mark>' in result['snippet']
+
+
+def test_search_page_hides_what_the_role_cannot_see(app_with_db):
+    from flask import g
+    from app.models import Supplier, User
+
+    db.session.add(Supplier(name='Umbrella Supply'))
+    staff = User(username='staff', role='Staff')
+    staff.set_password('secret')
+    db.session.add(staff)
+    db.session.commit()
+
+    client = app_with_db.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(staff.id)
+    assert client.get('/search?q=umbrella&format=json').get_json()['items'] == []
+    assert client.get('/search?q=umbrella&kind=nothing&format=json').get_json()['items'] == []
+    assert client.get('/search?q=umbrella&cursor=bad').status_code == 400
+    g.pop('_login_user')  # the fixture's app context (and g) outlives each request
+
+    staff.role = 'Manager'
+    db.session.commit()
+    response = client.get('/search?q=umbrella')
+    assert response.status_code == 200 and b'Umbrella Supply' in response.data
@@ -0,0 +1,24 @@
+import pytest
+from sqlalchemy import func
+from app import db
+
+
+def test_generate_dataset_is_consistent_and_refuses_a_seeded_database(app_with_db):
+    from app.models import InventoryBatch, Item, Order, SalesDailyRollup, Warehouse, WarehouseStock
+    from app.seed_utils import generate_dataset
+
+    written = generate_dataset(scale=0.0005, seed=1)
+    assert written['orders'] == Order.query.count() == 1000
+    assert written['items'] == Item.query.count() == 100
+    # At least two warehouses, so transfers can be exercised at any scale
+    assert written['warehouses'] == Warehouse.query.count() == 2
+
+    # Derived tables are rebuilt from the generated history
+    assert db.session.query(func.sum(SalesDailyRollup.order_count)).scalar() == 1000
+    active = db.session.query(func.sum(InventoryBatch.quantity)).filter(InventoryBatch.is_active == True).scalar()
+    assert db.session.query(func.sum(WarehouseStock.active_quantity)).scalar() == active
+    assert db.session.query(func.sum(Item.quantity)).scalar() >= active
+    assert Order.query.filter_by(invoiced=False).count() < 10
+
+    with pytest.raises(ValueError):
+        generate_dataset(scale=0.0005)
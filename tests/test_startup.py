@@ -0,0 +1,43 @@
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Seconds to import the package and build an app in a fresh interpreter
+STARTUP_BUDGET = 3.0
+# Imported on first use only
+HEAVY_MODULES = ('xhtml2pdf', 'reportlab', 'weasyprint')
+
+_PROBE = '''
+import json, sys, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+views_on_import = 'app.routes' in sys.modules
+application = app.create_app()
+built = time.perf_counter()
+print(json.dumps({
+    'import': imported - started, 'total': built - started, 'views_on_import': views_on_import,
+    'heavy': [name for name in %r if name in sys.modules], 'rules': len(list(application.url_map.iter_rules())),
+}))
+''' % (HEAVY_MODULES,)
+
+
+def test_cold_start_is_fast_and_side_effect_free(tmp_path):
+    db_path = tmp_path / 'untouched.db'
+    env = dict(os.environ, DATABASE_URL='sqlite:///' + str(db_path), PYTHONPATH=ROOT)
+    result = subprocess.run([sys.executable, '-c', _PROBE], cwd=ROOT, env=env,
+                            capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    lines = result.stdout.strip().splitlines()
+    assert len(lines) == 1, 'startup printed to stdout: %r' % lines[:-1]
+    probe = json.loads(lines[0])
+
+    assert probe['total'] < STARTUP_BUDGET, probe
+    assert not probe['views_on_import']
+    assert probe['heavy'] == []
+    assert probe['rules'] > 50
+    # Building the app opens no database, so gunicorn --preload forks clean workers
+    assert not db_path.exists()
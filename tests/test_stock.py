@@ -0,0 +1,74 @@
+import threading
+
+import pytest
+from app import db
+
+
+def test_decrement_is_conditional(app_with_db):
+    from app.models import Item, Order
+    from app.stock_utils import place_order, cancel_sales_order, InsufficientStock
+
+    item = Item(name='Hot', quantity=3)
+    db.session.add(item)
+    db.session.commit()
+
+    order = place_order(item.id, 2)
+    with pytest.raises(InsufficientStock) as excinfo:
+        place_order(item.id, 2)
+    assert excinfo.value.available == 1
+    assert Order.query.count() == 1
+
+    assert cancel_sales_order(order.id)
+    assert not cancel_sales_order(order.id)
+    assert db.session.get(Item, item.id).quantity == 3
+
+
+def test_concurrent_orders_never_oversell(app_with_db):
+    from app.models import Item, Order
+    from app.stock_utils import place_order, InsufficientStock
+
+    item = Item(name='Hot', quantity=50)
+    db.session.add(item)
+    db.session.commit()
+    item_id = item.id
+    placed = []
+
+    def worker():
+        with app_with_db.app_context():
+            for _ in range(20):
+                try:
+                    place_order(item_id, 1)
+                    placed.append(1)
+                except InsufficientStock:
+                    pass
+            db.session.remove()
+
+    threads = [threading.Thread(target=worker) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    db.session.expire_all()
+    assert len(placed) == 50
+    assert db.session.get(Item, item_id).quantity == 0
+    assert Order.query.count() == 50
+
+
+def test_locked_database_is_retried(app_with_db):
+    import sqlite3
+    from sqlalchemy.exc import OperationalError
+    from app.stock_utils import retry_on_locked
+
+    app_with_db.config['DB_LOCK_BACKOFF'] = 0
+    calls = []
+
+    @retry_on_locked
+    def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise OperationalError('UPDATE item', {}, sqlite3.OperationalError('database is locked'))
+        return 'done'
+
+    assert flaky() == 'done'
+    assert len(calls) == 3
@@ -0,0 +1,69 @@
+import threading
+
+from app import db
+
+
+def _setup_stock(batches):
+    """Two warehouses and one item with the given (batch_number, quantity) batches in the first"""
+    from app.models import Item, Warehouse, InventoryBatch
+    item = Item(name='Bolt', quantity=sum(q for _, q in batches))
+    source, target = Warehouse(name='A', location='x'), Warehouse(name='B', location='y')
+    db.session.add_all([item, source, target])
+    db.session.flush()
+    for number, quantity in batches:
+        db.session.add(InventoryBatch(item_id=item.id, warehouse_id=source.id, batch_number=number, quantity=quantity))
+    db.session.commit()
+    return item.id, source.id, target.id
+
+
+def _stock(warehouse_id):
+    from app.models import InventoryBatch
+    return sum(b.quantity for b in InventoryBatch.query.filter_by(warehouse_id=warehouse_id, is_active=True))
+
+
+def test_multi_line_transfer_is_fifo_and_all_or_nothing(app_with_db):
+    from app.transfer_utils import transfer_stock_lines
+
+    item_id, source, target = _setup_stock([('B1', 5), ('B2', 10)])
+
+    result = transfer_stock_lines(source, target, [
+        {'item_id': item_id, 'quantity': 3},
+        {'item_id': item_id, 'quantity': 4},
+    ])
+    assert result['success']
+    assert result['lines'][1]['batches'] == [{'batch_number': 'B1', 'quantity': 2},
+                                             {'batch_number': 'B2', 'quantity': 2}]
+    assert (_stock(source), _stock(target)) == (8, 7)
+
+    # One unfulfillable line rejects the whole document
+    result = transfer_stock_lines(source, target, [
+        {'item_id': item_id, 'quantity': 1},
+        {'item_id': item_id, 'quantity': 50},
+    ])
+    assert not result['success']
+    assert [line['status'] for line in result['lines']] == ['ok', 'insufficient']
+    assert (_stock(source), _stock(target)) == (8, 7)
+
+
+def test_concurrent_transfers_never_oversell(app_with_db):
+    from app.transfer_utils import transfer_stock_lines
+
+    item_id, source, target = _setup_stock([('B1', 20)])
+    outcomes = []
+
+    def worker():
+        with app_with_db.app_context():
+            for _ in range(5):
+                result = transfer_stock_lines(source, target, [{'item_id': item_id, 'quantity': 3}])
+                outcomes.append(result['success'])
+            db.session.remove()
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # 20 units allow exactly six 3-unit transfers out of the 20 attempted
+    assert outcomes.count(True) == 6
+    assert (_stock(source), _stock(target)) == (2, 18)
@@ -0,0 +1,72 @@
+from datetime import datetime, timedelta
+
+from app import db
+
+
+def _balances():
+    from app.models import WarehouseStock
+    return {(r.warehouse_id, r.item_id): (r.active_quantity, r.expired_quantity, r.batch_count)
+            for r in WarehouseStock.query.all()}
+
+
+def test_balances_follow_batch_writes(app_with_db):
+    from app.models import Item, InventoryBatch, Warehouse
+    from app.alert_utils import sweep_expiry
+    from app.balance_utils import rebuild_warehouse_stock
+    from app.transfer_utils import transfer_stock_lines
+
+    now = datetime.utcnow()
+    item = Item(name='Milk', quantity=30)
+    wh1, wh2 = Warehouse(name='A', location='a'), Warehouse(name='B', location='b')
+    db.session.add_all([item, wh1, wh2])
+    db.session.flush()
+    fresh = InventoryBatch(item_id=item.id, warehouse_id=wh1.id, batch_number='F', quantity=20)
+    stale = InventoryBatch(item_id=item.id, warehouse_id=wh1.id, batch_number='S', quantity=10,
+                           expiry_date=now + timedelta(days=1))
+    db.session.add_all([fresh, stale])
+    db.session.commit()
+    assert _balances() == {(wh1.id, item.id): (30, 0, 2)}
+
+    fresh.quantity = 15
+    db.session.commit()
+    assert transfer_stock_lines(wh1.id, wh2.id, [{'item_id': item.id, 'batch_number': 'F', 'quantity': 5}])['success']
+    assert _balances() == {(wh1.id, item.id): (20, 0, 2), (wh2.id, item.id): (5, 0, 1)}
+
+    sweep_expiry(now=now + timedelta(days=2))
+    assert _balances()[(wh1.id, item.id)][:2] == (10, 10)
+
+    db.session.delete(InventoryBatch.query.filter_by(warehouse_id=wh2.id).one())
+    db.session.commit()
+    assert (wh2.id, item.id) not in _balances()
+
+    maintained = _balances()
+    rebuild_warehouse_stock(now=now + timedelta(days=2))
+    assert _balances() == maintained
+
+
+def test_stock_matrix_endpoint(app_with_db):
+    from app.models import User, Item, InventoryBatch, Warehouse
+
+    admin = User(username='admin', role='Admin')
+    admin.set_password('x')
+    items = [Item(name=f'I{i}', quantity=0) for i in range(3)]
+    wh1, wh2 = Warehouse(name='A', location='a'), Warehouse(name='B', location='b')
+    db.session.add_all([admin, wh1, wh2, *items])
+    db.session.flush()
+    for n, item in enumerate(items):
+        db.session.add(InventoryBatch(item_id=item.id, warehouse_id=wh1.id, batch_number=f'A{n}', quantity=n + 1))
+    db.session.add(InventoryBatch(item_id=items[0].id, warehouse_id=wh2.id, batch_number='B0', quantity=7))
+    db.session.commit()
+
+    client = app_with_db.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(admin.id)
+    first = client.get('/api/stock/matrix?limit=2').get_json()
+    assert [w['name'] for w in first['warehouses']] == ['A', 'B']
+    assert first['items'][0]['stock'] == {str(wh1.id): 1, str(wh2.id): 7}
+    assert first['items'][0]['total'] == 8
+    rest = client.get(f"/api/stock/matrix?limit=2&cursor={first['next_cursor']}").get_json()
+    assert [i['name'] for i in rest['items']] == ['I2'] and rest['next_cursor'] is None
+
+    page = client.get(f'/warehouse/{wh1.id}/stock?format=json&limit=2').get_json()
+    assert [r['active_qty'] for r in page['items']] == [1, 2] and page['next_cursor']